@@ -113,6 +113,9 @@ def sync_apply_locked(repos_notify, repos_notify_files, unique_ext):
                 filepath_dst = filepath[:-len(unique_ext)]
                 try:
                     os.remove(filepath_dst)
+                except FileNotFoundError:
+                    # Files such as the sync validators may not exist yet.
+                    pass
                 except Exception as ex:
                     print("Failed to remove file before renaming:", ex)
                     continue
@@ -135,25 +138,21 @@ def sync_status_generator(repos_notify):
     # An extension unique to this session.
     unique_ext = "@{:x}".format(os.getpid())
 
-    from functools import partial
-
-    cmd_batch_partial = []
-    for repo_item in repos_notify:
-        # Local only repositories should still refresh, but not run the sync.
-        assert repo_item.remote_url
-        cmd_batch_partial.append(partial(
-            bl_extension_utils.repo_sync,
-            directory=repo_item.directory,
-            remote_url=repo_item.remote_url,
-            online_user_agent=bl_extension_ops.online_user_agent_from_blender(),
-            # Never sleep while there is no input, as this blocks Blender.
-            use_idle=False,
-            # Needed so the user can exit blender without warnings about a broken pipe.
-            # TODO: write to a temporary location, once done:
-            # There is no chance of corrupt data as the data isn't written directly to the target JSON.
-            force_exit_ok=not USE_GRACEFUL_EXIT,
-            extension_override=unique_ext,
-        ))
+    # Local only repositories should still refresh, but not run the sync.
+    assert all(repo_item.remote_url for repo_item in repos_notify)
+
+    # Sync all repositories from a single process, messages are split per repository.
+    cmd_batch_partial = bl_extension_utils.repo_sync_multi(
+        repos=[(repo_item.directory, repo_item.remote_url) for repo_item in repos_notify],
+        online_user_agent=bl_extension_ops.online_user_agent_from_blender(),
+        # Never sleep while there is no input, as this blocks Blender.
+        use_idle=False,
+        # Needed so the user can exit blender without warnings about a broken pipe.
+        # TODO: write to a temporary location, once done:
+        # There is no chance of corrupt data as the data isn't written directly to the target JSON.
+        force_exit_ok=not USE_GRACEFUL_EXIT,
+        extension_override=unique_ext,
+    )
 
     yield None
 
@@ -1047,17 +1047,17 @@ class BlPkgRepoSyncAll(Operator, _BlPkgCmdMixIn):
                     self.report({'WARNING'}, str(ex))
                     return None
 
-        cmd_batch = []
-        for repo_item in repos_all:
-            # Local only repositories should still refresh, but not run the sync.
-            if repo_item.remote_url:
-                cmd_batch.append(partial(
-                    bl_extension_utils.repo_sync,
-                    directory=repo_item.directory,
-                    remote_url=repo_item.remote_url,
-                    online_user_agent=online_user_agent_from_blender(),
-                    use_idle=is_modal,
-                ))
+        # Sync all repositories from a single process, messages are split per repository.
+        cmd_batch = bl_extension_utils.repo_sync_multi(
+            repos=[
+                (repo_item.directory, repo_item.remote_url)
+                for repo_item in repos_all
+                # Local only repositories should still refresh, but not run the sync.
+                if repo_item.remote_url
+            ],
+            online_user_agent=online_user_agent_from_blender(),
+            use_idle=is_modal,
+        )
 
         repos_lock = [repo_item.directory for repo_item in repos_all]
 
@@ -11,6 +11,7 @@ Non-blocking access to package management.
 __all__ = (
     # Public Repository Actions.
     "repo_sync",
+    "repo_sync_multi",
     "repo_upgrade",
     "repo_listing",
 
@@ -45,14 +46,24 @@ __all__ = (
 )
 
 import json
+import mmap
 import os
+import selectors
 import sys
 import signal
 import stat
+import struct
 import subprocess
 import time
 import tomllib
 
+from collections import deque
+from collections.abc import (
+    Generator as GeneratorABC,
+    ItemsView,
+    Iterator,
+    Mapping,
+)
 
 from typing import (
     Any,
@@ -74,7 +85,13 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 BLENDER_EXT_CMD = (
     # When run from within Blender, it will point to Blender's local Python binary.
     sys.executable,
-    os.path.normpath(os.path.join(BASE_DIR, "cli", "blender_ext.py")),
+    # Run as a module instead of a script so the byte-code cache is used,
+    # otherwise ``blender_ext.py`` is compiled every time a command runs.
+    "-c",
+    "import runpy, sys; sys.path.insert(0, {!r}); runpy.run_module({!r}, run_name=\"__main__\", alter_sys=True)".format(
+        os.path.normpath(os.path.join(BASE_DIR, "cli")),
+        "blender_ext",
+    ),
 )
 
 # This directory is in the local repository.
@@ -88,6 +105,8 @@ PKG_EXT = ".zip"
 
 # Add this to the local JSON file.
 REPO_LOCAL_JSON = os.path.join(REPO_LOCAL_PRIVATE_DIR, PKG_REPO_LIST_FILENAME)
+# A binary cache of `REPO_LOCAL_JSON`, see `_RepoCacheBinary`.
+REPO_LOCAL_JSON_BINARY = os.path.join(REPO_LOCAL_PRIVATE_DIR, "bl_ext_repo.bin")
 
 # An item we communicate back to Blender.
 InfoItem = Tuple[str, Any]
@@ -95,6 +114,8 @@ InfoItemSeq = Sequence[InfoItem]
 
 COMPLETE_ITEM = ('DONE', "")
 
+InfoItemCallable = Callable[[], Generator[InfoItemSeq, bool, None]]
+
 # Time to wait when there is no output, avoid 0 as it causes high CPU usage.
 IDLE_WAIT_ON_READ = 0.05
 # IDLE_WAIT_ON_READ = 0.2
@@ -188,68 +209,234 @@ def non_blocking_call(cmd: Sequence[str]) -> subprocess.Popen[bytes]:
     return ps
 
 
-def command_output_from_json_0(
-        args: Sequence[str],
-        use_idle: bool,
-) -> Generator[InfoItemSeq, bool, None]:
-    cmd = [*BLENDER_EXT_CMD, *args, "--output-type=JSON_0"]
-    ps = non_blocking_call(cmd)
-    stdout = ps.stdout
-    assert stdout is not None
-    chunk_list = []
-    request_exit_signal_sent = False
+class _JSON0Decoder:
+    """
+    Incrementally decode NUL terminated JSON messages, as written by ``--output-type=JSON_0``.
+    """
+    __slots__ = (
+        "_data",
+    )
+
+    def __init__(self) -> None:
+        # Data after the last NUL terminator, never contains a terminator.
+        self._data = bytearray()
+
+    def feed(self, chunk: bytes) -> List[InfoItem]:
+        data = self._data
+        # Only search new data, as the previous data is known not to contain a terminator.
+        index_search = len(data)
+        data += chunk
+
+        json_messages: List[InfoItem] = []
+        index_beg = 0
+        while (index_end := data.find(b'\0', index_search)) != -1:
+            json_data = json.loads(data[index_beg:index_end].decode("utf-8"))
+
+            assert len(json_data) == 2
+            assert isinstance(json_data[0], str)
+
+            json_messages.append((json_data[0], json_data[1]))
+            index_beg = index_search = index_end + 1
+
+        if index_beg:
+            del data[:index_beg]
+        return json_messages
+
+
+class _CommandOutputJSON0(GeneratorABC[InfoItemSeq, bool, None]):
+    """
+    A generator reading messages from a ``blender_ext.py`` command.
+
+    Each ``send`` reads the output which is available (without waiting) & returns the messages read,
+    sending true requests the command to exit.
+    Unlike a generator function, the output is exposed by ``fileno`` so callers may wait on it,
+    see ``CommandBatch.exec_non_blocking``.
+    """
+    __slots__ = (
+        "_ps",
+        "_stdout",
+        "_decoder",
+        "_use_idle",
+        "_request_exit_signal_sent",
+        "_is_complete",
+    )
+
+    def __init__(self, args: Sequence[str], use_idle: bool) -> None:
+        cmd = [*BLENDER_EXT_CMD, *args, "--output-type=JSON_0"]
+        self._ps = non_blocking_call(cmd)
+        stdout = self._ps.stdout
+        assert stdout is not None
+        self._stdout = stdout
+        self._decoder = _JSON0Decoder()
+        self._use_idle = use_idle
+        self._request_exit_signal_sent = False
+        self._is_complete = False
+
+    def fileno(self) -> int:
+        return self._stdout.fileno()
+
+    def send(self, request_exit: Optional[bool]) -> InfoItemSeq:
+        if self._is_complete:
+            raise StopIteration
+
+        if request_exit and not self._request_exit_signal_sent:
+            self._ps.send_signal(signal.SIGINT)
+            self._request_exit_signal_sent = True
 
-    while True:
         # It's possible this is multiple chunks.
         try:
-            chunk = stdout.read()
+            chunk = self._stdout.read()
         except BaseException as ex:
             if not file_handle_non_blocking_is_error_blocking(ex):
                 raise ex
             chunk = b''
 
-        json_messages = []
-
         if not chunk:
-            if ps.poll() is not None:
-                break
-            if use_idle:
+            if self._ps.poll() is not None:
+                self._is_complete = True
+                raise StopIteration
+            if self._use_idle:
                 time.sleep(IDLE_WAIT_ON_READ)
-        elif (chunk_zero_index := chunk.find(b'\0')) == -1:
-            chunk_list.append(chunk)
-        else:
-            # Extract contiguous data from `chunk_list`.
-            chunk_list.append(chunk[:chunk_zero_index])
+            # Return even when there are no messages, otherwise the caller can block.
+            # It also means a request to exit might not be responded to soon enough.
+            return []
 
-            json_bytes_list = [b''.join(chunk_list)]
-            chunk_list.clear()
+        return self._decoder.feed(chunk)
 
-            # There may be data afterwards, even whole chunks.
-            if chunk_zero_index + 1 != len(chunk):
-                chunk = chunk[chunk_zero_index + 1:]
-                # Add whole chunks.
-                while (chunk_zero_index := chunk.find(b'\0')) != -1:
-                    json_bytes_list.append(chunk[:chunk_zero_index])
-                    chunk = chunk[chunk_zero_index + 1:]
-                if chunk:
-                    chunk_list.append(chunk)
+    def throw(self, typ: Any, val: Any = None, tb: Any = None) -> InfoItemSeq:
+        # There is nothing to handle, propagate the exception.
+        if val is None:
+            val = typ() if isinstance(typ, type) else typ
+        if tb is not None:
+            val = val.with_traceback(tb)
+        raise val
 
-            request_exit = False
 
-            for json_bytes in json_bytes_list:
-                json_data = json.loads(json_bytes.decode("utf-8"))
+class _CommandOutputJSON0Multi:
+    """
+    Share the output of a command operating on multiple repositories,
+    where messages following a ``REPO`` message are for the repository at that index.
+    """
+    __slots__ = (
+        "_args",
+        "_use_idle",
+        "_command",
+        "_is_complete",
+        "_repo_index",
+        "_repo_messages",
+        "_repo_is_complete",
+    )
 
-                assert len(json_data) == 2
-                assert isinstance(json_data[0], str)
+    def __init__(self, args: Sequence[str], use_idle: bool, repo_len: int) -> None:
+        self._args = args
+        self._use_idle = use_idle
+        # Started by the first item to run.
+        self._command: Optional[_CommandOutputJSON0] = None
+        self._is_complete = False
+        # Messages before any "REPO" message are for the first repository.
+        self._repo_index = 0
+        self._repo_messages: List[List[InfoItem]] = [[] for _ in range(repo_len)]
+        self._repo_is_complete = [False] * repo_len
+
+    def command_ensure(self) -> _CommandOutputJSON0:
+        if self._command is None:
+            self._command = _CommandOutputJSON0(self._args, self._use_idle)
+        return self._command
+
+    def has_pending(self, repo_index: int) -> bool:
+        # True when messages for the repository have been read (by any item) & not yet returned by ``send``.
+        return bool(self._repo_messages[repo_index]) or self._is_complete or self._repo_is_complete[repo_index]
+
+    def send(self, repo_index: int, request_exit: Optional[bool]) -> InfoItemSeq:
+        command = self.command_ensure()
+        if not self._is_complete:
+            try:
+                json_messages = command.send(request_exit)
+            except StopIteration:
+                json_messages = ()
+                self._is_complete = True
+
+            for ty, msg in json_messages:
+                if ty == 'REPO':
+                    self._repo_index = msg
+                elif ty == 'DONE':
+                    # Complete items are handled by the caller.
+                    self._repo_is_complete[self._repo_index] = True
+                else:
+                    self._repo_messages[self._repo_index].append((ty, msg))
 
-                json_messages.append((json_data[0], json_data[1]))
+        json_messages = self._repo_messages[repo_index]
+        if not json_messages:
+            if self._is_complete or self._repo_is_complete[repo_index]:
+                raise StopIteration
+            return json_messages
 
-        # Yield even when `json_messages`, otherwise this generator can block.
-        # It also means a request to exit might not be responded to soon enough.
-        request_exit = yield json_messages
-        if request_exit and not request_exit_signal_sent:
-            ps.send_signal(signal.SIGINT)
-            request_exit_signal_sent = True
+        self._repo_messages[repo_index] = []
+        return json_messages
+
+
+class _CommandOutputJSON0MultiItem(GeneratorABC[InfoItemSeq, bool, None]):
+    """
+    A generator reading messages for a single repository from a ``_CommandOutputJSON0Multi``.
+    """
+    __slots__ = (
+        "_command_multi",
+        "_repo_index",
+    )
+
+    def __init__(self, command_multi: _CommandOutputJSON0Multi, repo_index: int) -> None:
+        self._command_multi = command_multi
+        self._repo_index = repo_index
+        command_multi.command_ensure()
+
+    def fileno(self) -> int:
+        return self._command_multi.command_ensure().fileno()
+
+    def has_pending(self) -> bool:
+        return self._command_multi.has_pending(self._repo_index)
+
+    def send(self, request_exit: Optional[bool]) -> InfoItemSeq:
+        return self._command_multi.send(self._repo_index, request_exit)
+
+    def throw(self, typ: Any, val: Any = None, tb: Any = None) -> InfoItemSeq:
+        # There is nothing to handle, propagate the exception.
+        if val is None:
+            val = typ() if isinstance(typ, type) else typ
+        if tb is not None:
+            val = val.with_traceback(tb)
+        raise val
+
+
+def command_output_from_json_0(
+        args: Sequence[str],
+        use_idle: bool,
+) -> Generator[InfoItemSeq, bool, None]:
+    return _CommandOutputJSON0(args, use_idle)
+
+
+def _command_output_fileno_or_none(fn_iter: Optional[Generator[InfoItemSeq, bool, None]]) -> Optional[int]:
+    """
+    Return the file descriptor a command reads it's output from (when known).
+    Multiple generators may share a file descriptor.
+    """
+    # Follow generators delegating (using ``yield from``) to the command output.
+    while fn_iter is not None:
+        if isinstance(fn_iter, (_CommandOutputJSON0, _CommandOutputJSON0MultiItem)):
+            return fn_iter.fileno()
+        fn_iter = getattr(fn_iter, "gi_yieldfrom", None)
+    return None
+
+
+def _command_output_has_pending(fn_iter: Optional[Generator[InfoItemSeq, bool, None]]) -> bool:
+    """
+    Return true when messages have been read for a command which shares it's output with other commands
+    (by one of the other commands), so the command should be stepped without waiting on it's output.
+    """
+    while fn_iter is not None:
+        if isinstance(fn_iter, _CommandOutputJSON0MultiItem):
+            return fn_iter.has_pending()
+        fn_iter = getattr(fn_iter, "gi_yieldfrom", None)
+    return False
 
 
 # -----------------------------------------------------------------------------
@@ -305,6 +492,56 @@ def repo_sync(
     yield [COMPLETE_ITEM]
 
 
+def _repo_sync_multi_item(
+        command_multi: _CommandOutputJSON0Multi,
+        repo_index: int,
+) -> Generator[InfoItemSeq, bool, None]:
+    yield from _CommandOutputJSON0MultiItem(command_multi, repo_index)
+    yield [COMPLETE_ITEM]
+
+
+def _repo_sync_multi_item_callable(
+        command_multi: _CommandOutputJSON0Multi,
+        repo_index: int,
+) -> InfoItemCallable:
+    def fn() -> Generator[InfoItemSeq, bool, None]:
+        return _repo_sync_multi_item(command_multi, repo_index)
+    return fn
+
+
+def repo_sync_multi(
+        *,
+        repos: Sequence[Tuple[str, str]],
+        online_user_agent: str,
+        use_idle: bool,
+        force_exit_ok: bool = False,
+        extension_override: str = "",
+) -> List[InfoItemCallable]:
+    """
+    Sync multiple repositories (``(directory, remote_url)`` pairs) using a single process.
+
+    Return a callable for each repository, for use with ``CommandBatch``.
+    """
+    if not repos:
+        return []
+
+    command_multi = _CommandOutputJSON0Multi([
+        "sync",
+        *[
+            arg for directory, remote_url in repos
+            for arg in ("--local-dir", directory, "--remote-url", remote_url)
+        ],
+        "--online-user-agent", online_user_agent,
+        *(("--force-exit-ok",) if force_exit_ok else ()),
+        *(("--extension-override", extension_override) if extension_override else ()),
+    ], use_idle, len(repos))
+
+    return [
+        _repo_sync_multi_item_callable(command_multi, repo_index)
+        for repo_index in range(len(repos))
+    ]
+
+
 def repo_upgrade(
         *,
         directory: str,
@@ -525,9 +762,6 @@ def pkg_repo_cache_clear(local_dir: str) -> None:
 # Public Command Pool (non-command-line wrapper)
 #
 
-InfoItemCallable = Callable[[], Generator[InfoItemSeq, bool, None]]
-
-
 class CommandBatchItem:
     __slots__ = (
         "fn_with_args",
@@ -540,6 +774,8 @@ class CommandBatchItem:
 
         "msg_type",
         "msg_info",
+
+        "fileno",
     )
 
     STATUS_NOT_YET_STARTED = 0
@@ -556,6 +792,8 @@ class CommandBatchItem:
         self.msg_log_len_last = 0
         self.msg_type = ""
         self.msg_info = ""
+        # The file descriptor of the commands output (when known & registered with a selector).
+        self.fileno: Optional[int] = None
 
     def invoke(self) -> Generator[InfoItemSeq, bool, None]:
         return self.fn_with_args()
@@ -583,6 +821,7 @@ class CommandBatch:
         "_batch",
         "_request_exit",
         "_log_added_since_accessed",
+        "_selector",
     )
 
     def __init__(
@@ -595,6 +834,12 @@ class CommandBatch:
         self._batch = [CommandBatchItem(fn_with_args) for fn_with_args in batch]
         self._request_exit = False
         self._log_added_since_accessed = True
+        # Wait on the output of all commands so only commands with new output are stepped.
+        # WIN32: selectors only support sockets, step all commands instead.
+        self._selector: Optional[selectors.BaseSelector] = (
+            None if sys.platform == "win32" else
+            selectors.DefaultSelector()
+        )
 
     def _exec_blocking_single(
             self,
@@ -647,23 +892,68 @@ class CommandBatch:
             )
         return self._exec_blocking_single(report_fn, request_exit_fn)
 
+    def _selector_register(self, cmd: CommandBatchItem, cmd_index: int, fileno: int) -> None:
+        assert self._selector is not None
+        # Commands may share their output, see: `repo_sync_multi`.
+        try:
+            key = self._selector.get_key(fileno)
+        except KeyError:
+            self._selector.register(fileno, selectors.EVENT_READ, [cmd_index])
+        else:
+            key.data.append(cmd_index)
+        cmd.fileno = fileno
+
+    def _selector_unregister(self, cmd: CommandBatchItem, cmd_index: int) -> None:
+        if cmd.fileno is None:
+            return
+        assert self._selector is not None
+        cmd_indices = self._selector.get_key(cmd.fileno).data
+        cmd_indices.remove(cmd_index)
+        if not cmd_indices:
+            self._selector.unregister(cmd.fileno)
+        cmd.fileno = None
+
     def exec_non_blocking(
             self,
             *,
             request_exit: bool,
+            timeout: float = 0.0,
     ) -> CommandBatch_ExecNonBlockingResult:
         """
         Return the result of running multiple commands.
+
+        :arg timeout: Wait up to this many seconds for output when none of the commands have any.
         """
         command_output: Tuple[List[Tuple[str, str]], ...] = tuple([] for _ in range(len(self._batch)))
 
+        # Only request exit once, so commands which wait on their output aren't stepped unnecessarily.
+        request_exit_changed = request_exit and not self._request_exit
         if request_exit:
             self._request_exit = True
 
         status_data_changed = False
 
+        # Commands with output which can be read (or have exited).
+        # Commands not registered with the selector are always stepped.
+        cmd_ready: Set[int] = set()
+        if (self._selector is not None) and self._selector.get_map():
+            if request_exit_changed or any(
+                    (cmd.status == CommandBatchItem.STATUS_NOT_YET_STARTED) or
+                    (cmd.status == CommandBatchItem.STATUS_RUNNING and cmd.fileno is None)
+                    for cmd in self._batch
+            ):
+                # Some commands must be stepped, don't wait.
+                timeout = 0.0
+            for key, _events in self._selector.select(timeout=timeout):
+                cmd_ready.update(key.data)
+
         complete_count = 0
-        for cmd_index in reversed(range(len(self._batch))):
+        # Commands left to step, commands sharing their output may be added while stepping.
+        cmd_todo = deque(reversed(range(len(self._batch))))
+        cmd_todo_set = set(cmd_todo)
+        while cmd_todo:
+            cmd_index = cmd_todo.popleft()
+            cmd_todo_set.remove(cmd_index)
             cmd = self._batch[cmd_index]
             if cmd.status == CommandBatchItem.STATUS_COMPLETE:
                 complete_count += 1
@@ -677,16 +967,37 @@ class CommandBatch:
                 cmd.status = CommandBatchItem.STATUS_RUNNING
                 status_data_changed = True
                 send_arg = None
+            elif cmd.fileno is not None:
+                if not (request_exit_changed or cmd_index in cmd_ready):
+                    continue
 
             try:
                 json_messages = cmd.fn_iter.send(send_arg)  # type: ignore
             except StopIteration:
                 # FIXME: This should not happen, we should get a "DONE" instead.
+                self._selector_unregister(cmd, cmd_index)
                 cmd.status = CommandBatchItem.STATUS_COMPLETE
                 complete_count += 1
                 status_data_changed = True
                 continue
 
+            if cmd.fileno is None and self._selector is not None:
+                if (fileno := _command_output_fileno_or_none(cmd.fn_iter)) is not None:
+                    self._selector_register(cmd, cmd_index, fileno)
+
+            if cmd.fileno is not None:
+                # Reading the output may have read messages for other commands sharing it,
+                # step them now instead of waiting for more output (which may never arrive).
+                assert self._selector is not None
+                for cmd_other_index in self._selector.get_key(cmd.fileno).data:
+                    if cmd_other_index == cmd_index:
+                        continue
+                    if _command_output_has_pending(self._batch[cmd_other_index].fn_iter):
+                        cmd_ready.add(cmd_other_index)
+                        if cmd_other_index not in cmd_todo_set:
+                            cmd_todo.append(cmd_other_index)
+                            cmd_todo_set.add(cmd_other_index)
+
             if json_messages:
                 for ty, msg in json_messages:
                     self._log_added_since_accessed = True
@@ -695,6 +1006,7 @@ class CommandBatch:
                     cmd.msg_info = msg
                     if ty == 'DONE':
                         assert msg == ""
+                        self._selector_unregister(cmd, cmd_index)
                         cmd.status = CommandBatchItem.STATUS_COMPLETE
                         complete_count += 1
                         status_data_changed = True
@@ -804,6 +1116,321 @@ class CommandBatch:
         return result if found else None
 
 
+# -----------------------------------------------------------------------------
+# Public Repo Cache (binary)
+#
+# A compact version of the repositories JSON which is memory-mapped and decoded on demand,
+# so accessing a repository with many packages doesn't need to load every package.
+#
+# Layout (all integers are unsigned 32 bit little-endian unless noted):
+#
+# - Header: see `_REPO_CACHE_BINARY_HEADER`.
+# - String offsets: `string_count + 1` offsets into the string data (the last is the end of the data).
+# - Package index: `pkg_count` offsets into the records (in the order packages are found in the JSON).
+# - Package index (sorted): `pkg_count` positions in the package index, sorted by package ID.
+# - Records: for each package: `id, field_count`, then `key, value, value_type` for each field,
+#   where `id`, `key` & `value` are string indices.
+# - String data: UTF8 encoded strings (without any terminator).
+
+_REPO_CACHE_BINARY_MAGIC = b"BLEXTBIN"
+_REPO_CACHE_BINARY_VERSION = 1
+# Magic, version, JSON size, JSON modification time (nanoseconds), package count, string count, records size.
+_REPO_CACHE_BINARY_HEADER = struct.Struct("<8sIQqIII")
+_REPO_CACHE_BINARY_UINT = struct.Struct("<I")
+_REPO_CACHE_BINARY_FIELD = struct.Struct("<III")
+
+# Values types, strings are stored directly, anything else is encoded as JSON.
+_REPO_CACHE_BINARY_VALUE_STR = 0
+_REPO_CACHE_BINARY_VALUE_JSON = 1
+
+
+def _repo_cache_binary_from_json_data(json_data: Any, json_size: int, json_mtime_ns: int) -> bytes:
+    if not isinstance(json_data, dict):
+        raise ValueError("JSON expected a dict, not a {:s}".format(str(type(json_data))))
+    json_items = json_data.get("data")
+    if json_items is None:
+        raise ValueError("JSON was missing \"data\" key")
+
+    strings: List[bytes] = []
+    strings_map: Dict[str, int] = {}
+
+    def string_index(value: str) -> int:
+        if (index := strings_map.get(value)) is None:
+            index = strings_map[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return index
+
+    pkg_ids: List[str] = []
+    pkg_offsets: List[int] = []
+    records: List[bytes] = []
+    records_size = 0
+    for item in json_items:
+        pkg_idname = item["id"]
+        fields = [
+            (key, value) for key, value in item.items()
+            if key != "id"
+        ]
+        record = [_REPO_CACHE_BINARY_UINT.pack(string_index(pkg_idname)), _REPO_CACHE_BINARY_UINT.pack(len(fields))]
+        for key, value in fields:
+            if isinstance(value, str):
+                value_type = _REPO_CACHE_BINARY_VALUE_STR
+            else:
+                value_type = _REPO_CACHE_BINARY_VALUE_JSON
+                value = json.dumps(value)
+            record.append(_REPO_CACHE_BINARY_FIELD.pack(string_index(key), string_index(value), value_type))
+
+        pkg_ids.append(pkg_idname)
+        pkg_offsets.append(records_size)
+        record_bytes = b"".join(record)
+        records.append(record_bytes)
+        records_size += len(record_bytes)
+
+    string_offsets = []
+    offset = 0
+    for value_bytes in strings:
+        string_offsets.append(offset)
+        offset += len(value_bytes)
+    string_offsets.append(offset)
+
+    pkg_index_sorted = sorted(range(len(pkg_ids)), key=lambda i: pkg_ids[i].encode("utf-8"))
+
+    return b"".join((
+        _REPO_CACHE_BINARY_HEADER.pack(
+            _REPO_CACHE_BINARY_MAGIC,
+            _REPO_CACHE_BINARY_VERSION,
+            json_size,
+            json_mtime_ns,
+            len(pkg_ids),
+            len(strings),
+            records_size,
+        ),
+        struct.pack("<{:d}I".format(len(string_offsets)), *string_offsets),
+        struct.pack("<{:d}I".format(len(pkg_offsets)), *pkg_offsets),
+        struct.pack("<{:d}I".format(len(pkg_index_sorted)), *pkg_index_sorted),
+        *records,
+        *strings,
+    ))
+
+
+class _RepoCacheBinaryItem(Mapping[str, Any]):
+    """
+    The manifest for a single package (without the ``"id"``), values are decoded on access.
+    """
+    __slots__ = (
+        "_store",
+        "_offset",
+    )
+
+    def __init__(self, store: "_RepoCacheBinary", offset: int) -> None:
+        self._store = store
+        # Offset of the first field.
+        self._offset = offset
+
+    def _field_iter(self) -> Generator[Tuple[int, int, int], None, None]:
+        store = self._store
+        offset = self._offset
+        field_count = _REPO_CACHE_BINARY_UINT.unpack_from(store._data, offset - _REPO_CACHE_BINARY_UINT.size)[0]
+        for i in range(field_count):
+            yield _REPO_CACHE_BINARY_FIELD.unpack_from(store._data, offset + (i * _REPO_CACHE_BINARY_FIELD.size))
+
+    def __getitem__(self, key: str) -> Any:
+        store = self._store
+        for key_index, value_index, value_type in self._field_iter():
+            if store._key_from_index(key_index) != key:
+                continue
+            value = store._string_from_index(value_index)
+            if value_type == _REPO_CACHE_BINARY_VALUE_JSON:
+                return json.loads(value)
+            return value
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        store = self._store
+        for key_index, _value_index, _value_type in self._field_iter():
+            yield store._key_from_index(key_index)
+
+    def __len__(self) -> int:
+        return int(_REPO_CACHE_BINARY_UINT.unpack_from(self._store._data, self._offset - _REPO_CACHE_BINARY_UINT.size)[0])
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+class _RepoCacheBinaryItemsView(ItemsView[str, _RepoCacheBinaryItem]):
+    # Avoid looking up every item by it's ID while iterating.
+    _mapping: "_RepoCacheBinary"
+
+    def __iter__(self) -> Iterator[Tuple[str, _RepoCacheBinaryItem]]:
+        yield from self._mapping._items_iter()
+
+
+class _RepoCacheBinary(Mapping[str, _RepoCacheBinaryItem]):
+    """
+    Package manifests keyed by the package ID (in the order they're stored in the repositories JSON).
+    """
+    __slots__ = (
+        "_data",
+        "_pkg_count",
+        "_offset_strings",
+        "_offset_index",
+        "_offset_index_sorted",
+        "_offset_records",
+        "_offset_string_data",
+        "_key_cache",
+    )
+
+    def __init__(self, data: Union[bytes, mmap.mmap]) -> None:
+        (
+            magic,
+            version,
+            _json_size,
+            _json_mtime_ns,
+            pkg_count,
+            string_count,
+            records_size,
+        ) = _REPO_CACHE_BINARY_HEADER.unpack_from(data, 0)
+        if magic != _REPO_CACHE_BINARY_MAGIC or version != _REPO_CACHE_BINARY_VERSION:
+            raise ValueError("Unknown binary cache format")
+
+        self._data = data
+        self._pkg_count = int(pkg_count)
+        uint_size = _REPO_CACHE_BINARY_UINT.size
+        self._offset_strings = _REPO_CACHE_BINARY_HEADER.size
+        self._offset_index: int = self._offset_strings + ((string_count + 1) * uint_size)
+        self._offset_index_sorted: int = self._offset_index + (pkg_count * uint_size)
+        self._offset_records: int = self._offset_index_sorted + (pkg_count * uint_size)
+        self._offset_string_data: int = self._offset_records + records_size
+        # Keys are used for every package, there is no need to decode them every time.
+        self._key_cache: Dict[int, str] = {}
+
+    @staticmethod
+    def header_matches_json(data: Union[bytes, mmap.mmap], json_size: int, json_mtime_ns: int) -> bool:
+        if len(data) < _REPO_CACHE_BINARY_HEADER.size:
+            return False
+        magic, version, json_size_test, json_mtime_ns_test, *_ = _REPO_CACHE_BINARY_HEADER.unpack_from(data, 0)
+        return (magic, version, json_size_test, json_mtime_ns_test) == (
+            _REPO_CACHE_BINARY_MAGIC,
+            _REPO_CACHE_BINARY_VERSION,
+            json_size,
+            json_mtime_ns,
+        )
+
+    def _string_bytes_from_index(self, index: int) -> bytes:
+        beg, end = struct.unpack_from("<II", self._data, self._offset_strings + (index * _REPO_CACHE_BINARY_UINT.size))
+        return self._data[self._offset_string_data + beg:self._offset_string_data + end]
+
+    def _string_from_index(self, index: int) -> str:
+        return self._string_bytes_from_index(index).decode("utf-8")
+
+    def _key_from_index(self, index: int) -> str:
+        if (key := self._key_cache.get(index)) is None:
+            key = self._key_cache[index] = self._string_from_index(index)
+        return key
+
+    def _record_offset_from_position(self, position: int) -> int:
+        record_offset: int = _REPO_CACHE_BINARY_UINT.unpack_from(
+            self._data,
+            self._offset_index + (position * _REPO_CACHE_BINARY_UINT.size),
+        )[0]
+        return self._offset_records + record_offset
+
+    def _id_index_from_record_offset(self, record_offset: int) -> int:
+        return int(_REPO_CACHE_BINARY_UINT.unpack_from(self._data, record_offset)[0])
+
+    def _item_from_record_offset(self, record_offset: int) -> _RepoCacheBinaryItem:
+        # Skip the ID & field count.
+        return _RepoCacheBinaryItem(self, record_offset + (_REPO_CACHE_BINARY_UINT.size * 2))
+
+    def _items_iter(self) -> Iterator[Tuple[str, _RepoCacheBinaryItem]]:
+        for position in range(self._pkg_count):
+            record_offset = self._record_offset_from_position(position)
+            yield (
+                self._string_from_index(self._id_index_from_record_offset(record_offset)),
+                self._item_from_record_offset(record_offset),
+            )
+
+    def __getitem__(self, pkg_idname: str) -> _RepoCacheBinaryItem:
+        # Binary search the sorted index.
+        pkg_idname_bytes = pkg_idname.encode("utf-8")
+        lo = 0
+        hi = self._pkg_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = _REPO_CACHE_BINARY_UINT.unpack_from(
+                self._data,
+                self._offset_index_sorted + (mid * _REPO_CACHE_BINARY_UINT.size),
+            )[0]
+            record_offset = self._record_offset_from_position(position)
+            pkg_idname_test = self._string_bytes_from_index(self._id_index_from_record_offset(record_offset))
+            if pkg_idname_test < pkg_idname_bytes:
+                lo = mid + 1
+            elif pkg_idname_test > pkg_idname_bytes:
+                hi = mid
+            else:
+                return self._item_from_record_offset(record_offset)
+        raise KeyError(pkg_idname)
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(self._pkg_count):
+            yield self._string_from_index(self._id_index_from_record_offset(
+                self._record_offset_from_position(position),
+            ))
+
+    def __len__(self) -> int:
+        return self._pkg_count
+
+    def items(self) -> _RepoCacheBinaryItemsView:
+        return _RepoCacheBinaryItemsView(self)
+
+
+def _repo_cache_binary_from_json_filepath(
+        filepath_json: str,
+        filepath_binary: str,
+) -> Optional[_RepoCacheBinary]:
+    """
+    Return the binary cache for ``filepath_json``, (re)creating it when the JSON has changed.
+    Return None when the JSON doesn't exist.
+    """
+    try:
+        json_stat = os.stat(filepath_json)
+    except FileNotFoundError:
+        return None
+
+    try:
+        with open(filepath_binary, "rb") as fh:
+            # WIN32 prevents files that are memory-mapped from being replaced, read the data instead.
+            data: Union[bytes, mmap.mmap] = (
+                fh.read() if sys.platform == "win32" else
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+        if _RepoCacheBinary.header_matches_json(data, json_stat.st_size, json_stat.st_mtime_ns):
+            return _RepoCacheBinary(data)
+        del data
+    except (FileNotFoundError, ValueError):
+        # The file doesn't exist or is empty (which can't be memory-mapped).
+        pass
+
+    with open(filepath_json, "r", encoding="utf-8") as fh:
+        json_data = json.load(fh)
+    data_bytes = _repo_cache_binary_from_json_data(json_data, json_stat.st_size, json_stat.st_mtime_ns)
+    del json_data
+
+    # Failure to write the cache isn't an error, it will be regenerated next time.
+    filepath_binary_temp = "{:s}@{:x}".format(filepath_binary, os.getpid())
+    try:
+        with open(filepath_binary_temp, "wb") as fh:
+            fh.write(data_bytes)
+        os.replace(filepath_binary_temp, filepath_binary)
+    except BaseException as ex:
+        print("Error: writing repository cache", ex)
+        try:
+            os.unlink(filepath_binary_temp)
+        except BaseException:
+            pass
+
+    return _RepoCacheBinary(data_bytes)
+
+
 # -----------------------------------------------------------------------------
 # Public Repo Cache (non-command-line wrapper)
 #
@@ -814,6 +1441,7 @@ class _RepoCacheEntry:
         "remote_url",
 
         "_pkg_manifest_local",
+        "_pkg_manifest_local_stat",
         "_pkg_manifest_remote",
         "_pkg_manifest_remote_mtime",
         "_pkg_manifest_remote_has_warning"
@@ -825,7 +1453,11 @@ class _RepoCacheEntry:
         self.remote_url = remote_url
         # Manifest data per package loaded from the packages local JSON.
         self._pkg_manifest_local: Optional[Dict[str, Dict[str, Any]]] = None
-        self._pkg_manifest_remote: Optional[Dict[str, Dict[str, Any]]] = None
+        # Validated manifest per package directory, with the stat used to detect changes:
+        # `(directory_mtime_ns, toml_mtime_ns, toml_size)`, so unchanged manifests aren't re-read.
+        self._pkg_manifest_local_stat: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+        # Manifest data per package loaded from the repositories JSON (via it's binary cache).
+        self._pkg_manifest_remote: Optional[_RepoCacheBinary] = None
         self._pkg_manifest_remote_mtime = 0
         # Avoid many noisy prints.
         self._pkg_manifest_remote_has_warning = False
@@ -836,7 +1468,7 @@ class _RepoCacheEntry:
             error_fn: Callable[[BaseException], None],
             check_files: bool = False,
             ignore_missing: bool = False,
-    ) -> Any:
+    ) -> Optional[_RepoCacheBinary]:
         if self._pkg_manifest_remote is not None:
             if check_files:
                 self._json_data_refresh(error_fn=error_fn)
@@ -845,7 +1477,10 @@ class _RepoCacheEntry:
         filepath_json = os.path.join(self.directory, REPO_LOCAL_JSON)
 
         try:
-            self._pkg_manifest_remote = json_from_filepath(filepath_json)
+            self._pkg_manifest_remote = _repo_cache_binary_from_json_filepath(
+                filepath_json,
+                os.path.join(self.directory, REPO_LOCAL_JSON_BINARY),
+            )
         except BaseException as ex:
             self._pkg_manifest_remote = None
             error_fn(ex)
@@ -876,6 +1511,8 @@ class _RepoCacheEntry:
     ) -> None:
         assert self.remote_url == ""
         # Since there is no remote repo the ID name is defined by the directory name only.
+        # Always re-scan, only manifests which changed since the last scan are read.
+        self.force_local_refresh()
         local_json_data = self.pkg_manifest_from_local_ensure(error_fn=error_fn)
         if local_json_data is None:
             return
@@ -894,23 +1531,37 @@ class _RepoCacheEntry:
             return
         del directory
 
+        # Begin: transform to list with ID's in item.
+        # TODO: this transform can probably be removed and the internal format can change
+        # to use the same structure as the actual JSON.
+        local_json_data_compat = {
+            "version": "v1",
+            "blocklist": [],
+            "data": [
+                {"id": pkg_idname, **value}
+                for pkg_idname, value in local_json_data.items()
+            ],
+        }
+        # End: compatibility change.
+
+        # Indent because it can be useful to check this file if there are any issues.
+        local_json_text = json.dumps(local_json_data_compat, indent=2)
+
+        # Leave the file (and it's modification time) untouched when nothing changed,
+        # so the cached data for this repository remains valid.
+        try:
+            with open(filepath_json, "r", encoding="utf-8") as fh:
+                if fh.read() == local_json_text:
+                    return
+        except FileNotFoundError:
+            pass
+        except BaseException as ex:
+            error_fn(ex)
+
         with open(filepath_json, "w", encoding="utf-8") as fh:
-            # Indent because it can be useful to check this file if there are any issues.
-
-            # Begin: transform to list with ID's in item.
-            # TODO: this transform can probably be removed and the internal format can change
-            # to use the same structure as the actual JSON.
-            local_json_data_compat = {
-                "version": "v1",
-                "blocklist": [],
-                "data": [
-                    {"id": pkg_idname, **value}
-                    for pkg_idname, value in local_json_data.items()
-                ],
-            }
-            # End: compatibility change.
-
-            fh.write(json.dumps(local_json_data_compat, indent=2))
+            fh.write(local_json_text)
+        # The modification time may not change within the same second, ensure the JSON is re-loaded.
+        self._pkg_manifest_remote_mtime = 0
 
     def _json_data_refresh(
             self,
@@ -932,12 +1583,15 @@ class _RepoCacheEntry:
         filepath_json = os.path.join(self.directory, REPO_LOCAL_JSON)
         mtime_test = file_mtime_or_none(filepath_json)
         if self._pkg_manifest_remote is not None:
-            # TODO: check the time of every installed package.
+            # For local-only repositories, changes to installed packages have been written to the JSON above.
             if mtime_test == self._pkg_manifest_remote_mtime:
                 return
 
         try:
-            self._pkg_manifest_remote = json_from_filepath(filepath_json)
+            self._pkg_manifest_remote = _repo_cache_binary_from_json_filepath(
+                filepath_json,
+                os.path.join(self.directory, REPO_LOCAL_JSON_BINARY),
+            )
         except BaseException as ex:
             self._pkg_manifest_remote = None
             error_fn(ex)
@@ -962,7 +1616,9 @@ class _RepoCacheEntry:
                 ignore_missing=ignore_missing,
                 error_fn=error_fn,
             )
-            pkg_manifest_local = {}
+            pkg_manifest_local: Dict[str, Dict[str, Any]] = {}
+            pkg_manifest_local_stat_prev = self._pkg_manifest_local_stat
+            pkg_manifest_local_stat: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
             try:
                 dir_entries = os.scandir(self.directory)
             except BaseException as ex:
@@ -989,13 +1645,39 @@ class _RepoCacheEntry:
 
                 filepath_toml = os.path.join(self.directory, filename, PKG_MANIFEST_FILENAME_TOML)
                 try:
-                    item_local = toml_from_filepath(filepath_toml)
-                except BaseException as ex:
-                    item_local = None
-                    error_fn(ex)
+                    toml_stat = os.stat(filepath_toml)
+                    item_stat: Optional[Tuple[int, int, int]] = (
+                        entry.stat().st_mtime_ns,
+                        toml_stat.st_mtime_ns,
+                        toml_stat.st_size,
+                    )
+                except BaseException:
+                    # Let reading the TOML report the error.
+                    item_stat = None
+
+                item_local: Optional[Dict[str, Any]] = None
+                if (
+                        (item_stat is not None) and
+                        ((item_cache := pkg_manifest_local_stat_prev.get(filename)) is not None) and
+                        (item_cache[0] == item_stat)
+                ):
+                    item_local = item_cache[1]
+                else:
+                    try:
+                        item_local = toml_from_filepath(filepath_toml)
+                    except BaseException as ex:
+                        error_fn(ex)
 
-                if item_local is None:
-                    continue
+                    if item_local is None:
+                        continue
+
+                    # Validate so local-only packages with invalid manifests aren't used.
+                    if (error_str := pkg_manifest_dict_is_valid_or_error(item_local, from_repo=False, strict=False)):
+                        error_fn(Exception(error_str))
+                        continue
+
+                if item_stat is not None:
+                    pkg_manifest_local_stat[filename] = (item_stat, item_local)
 
                 pkg_idname = item_local["id"]
                 if has_remote:
@@ -1009,13 +1691,9 @@ class _RepoCacheEntry:
                 else:
                     pkg_idname = filename
 
-                # Validate so local-only packages with invalid manifests aren't used.
-                if (error_str := pkg_manifest_dict_is_valid_or_error(item_local, from_repo=False, strict=False)):
-                    error_fn(Exception(error_str))
-                    continue
-
                 pkg_manifest_local[pkg_idname] = item_local
             self._pkg_manifest_local = pkg_manifest_local
+            self._pkg_manifest_local_stat = pkg_manifest_local_stat
         return self._pkg_manifest_local
 
     def pkg_manifest_from_remote_ensure(
@@ -1023,7 +1701,7 @@ class _RepoCacheEntry:
             *,
             error_fn: Callable[[BaseException], None],
             ignore_missing: bool = False,
-    ) -> Optional[Dict[str, Dict[str, Any]]]:
+    ) -> Optional[Mapping[str, Mapping[str, Any]]]:
         if self._pkg_manifest_remote is None:
             self._json_data_ensure(
                 ignore_missing=ignore_missing,
@@ -1107,36 +1785,20 @@ class RepoCacheStore:
             check_files: bool = False,
             ignore_missing: bool = False,
             directory_subset: Optional[Set[str]] = None,
-    ) -> Generator[Optional[Dict[str, Dict[str, Any]]], None, None]:
+    ) -> Generator[Optional[Mapping[str, Mapping[str, Any]]], None, None]:
         for repo_entry in self._repos:
             if directory_subset is not None:
                 if repo_entry.directory not in directory_subset:
                     continue
 
-            json_data = repo_entry._json_data_ensure(
+            # NOTE: the "id" is not included in each item (it's the key).
+            # Items are read-only & decoded on access, so only the values used are decoded.
+            # Missing "data" is reported via `error_fn` (the result is None).
+            yield repo_entry._json_data_ensure(
                 check_files=check_files,
                 ignore_missing=ignore_missing,
                 error_fn=error_fn,
             )
-            if json_data is None:
-                # The repository may be fresh, not yet initialized.
-                yield None
-            else:
-                pkg_manifest_remote = {}
-                # "data" should always exist, it's not the purpose of this function to fully validate though.
-                json_items = json_data.get("data")
-                if json_items is None:
-                    error_fn(ValueError("JSON was missing \"data\" key"))
-                    yield None
-                else:
-                    for item_remote in json_items:
-                        # TODO(@ideasman42): we may want to include the "id", as part of moving to a new format
-                        # the "id" used not to be part of each item so users of this API assume it's not.
-                        # The `item_remote` could be used in-place however that needs further testing.
-                        item_remove_copy = item_remote.copy()
-                        pkg_idname = item_remove_copy.pop("id")
-                        pkg_manifest_remote[pkg_idname] = item_remove_copy
-                    yield pkg_manifest_remote
 
     def pkg_manifest_from_local_ensure(
             self,
@@ -10,22 +10,18 @@ Command for managing Blender extensions.
 
 import argparse
 import contextlib
-import hashlib  # for SHA1 check-summing files.
 import io
 import json
 import os
 import re
-import shutil
 import signal  # Override `Ctrl-C`.
 import sys
-import tomllib
-import urllib.error  # For `URLError`.
-import urllib.parse  # For `urljoin`.
-import urllib.request  # For accessing remote `https://` paths.
-import zipfile
 
+# NOTE: modules which are slow to import (`hashlib`, `shutil`, `tomllib`, `urllib` & `zipfile`)
+# are imported by the functions that use them, as this script runs for every command.
 
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
     Generator,
@@ -40,6 +36,11 @@ from typing import (
     Union,
 )
 
+if TYPE_CHECKING:
+    import queue
+    import threading
+    import zipfile
+
 ArgsSubparseFn = Callable[["argparse._SubParsersAction[argparse.ArgumentParser]"], None]
 
 REQUEST_EXIT = False
@@ -74,13 +75,25 @@ PKG_EXT = ".zip"
 
 PKG_REPO_LIST_FILENAME = "bl_ext_repo.json"
 
+# Stored next to the local copy of `PKG_REPO_LIST_FILENAME`, used to detect unchanged remote data.
+PKG_REPO_LIST_VALIDATORS_FILENAME = "bl_ext_repo_validators.json"
+
+# Changes between revisions of `PKG_REPO_LIST_FILENAME`, written by `server-generate --delta`.
+PKG_REPO_DELTA_FILENAME = "bl_ext_repo_delta.json"
+# The number of revisions stored in `PKG_REPO_DELTA_FILENAME`,
+# clients with older data download the full repository data.
+PKG_REPO_DELTA_HISTORY_MAX = 32
+
+# Cache used by `server-generate --incremental` (stored in the repository directory).
+PKG_REPO_CACHE_FILENAME = ".bl_ext_repo_cache.json"
+
 # Only for building.
 PKG_MANIFEST_FILENAME_TOML = "blender_manifest.toml"
 
 # This directory is in the local repository.
 REPO_LOCAL_PRIVATE_DIR = ".blender_ext"
 
-MESSAGE_TYPES = {'STATUS', 'PROGRESS', 'WARN', 'ERROR', 'PATH', 'DONE'}
+MESSAGE_TYPES = {'STATUS', 'PROGRESS', 'WARN', 'ERROR', 'PATH', 'DONE', 'REPO'}
 
 RE_MANIFEST_SEMVER = re.compile(
     r'^'
@@ -103,6 +116,18 @@ RE_CONTROL_CHARS = re.compile(r'[\x00-\x1f\x7f-\x9f]')
 # 16kb to be responsive even on slow connections.
 CHUNK_SIZE_DEFAULT = 1 << 14
 
+# The maximum number of archives to download at once when installing packages.
+INSTALL_DOWNLOAD_JOBS_MAX = 8
+
+# The maximum number of repositories to sync at once (when syncing multiple repositories).
+SYNC_JOBS_MAX = 8
+
+# When building, files are read in chunks of this size while compressing.
+BUILD_COMPRESS_CHUNK_SIZE = 1 << 20
+# When building, compressed files larger than this are stored in a temporary file (instead of memory)
+# until they are written to the archive.
+BUILD_COMPRESS_SPOOL_SIZE = 1 << 24
+
 # Standard out may be communicating with a parent process,
 # arbitrary prints are NOT acceptable.
 
@@ -162,6 +187,13 @@ def message_path(msg_fn: MessageFn, s: str) -> bool:
     return msg_fn("PATH", s)
 
 
+def message_repo(msg_fn: MessageFn, repo_index: int) -> bool:
+    """
+    Following messages are for the repository at ``repo_index`` (when operating on multiple repositories).
+    """
+    return msg_fn("REPO", repo_index)
+
+
 def message_progress(msg_fn: MessageFn, s: str, progress: int, progress_range: int, unit: str) -> bool:
     """
     Print a progress update.
@@ -199,6 +231,8 @@ class CleanupPathsContext:
         return self
 
     def __exit__(self, _ty: Any, _value: Any, _traceback: Any) -> None:
+        import shutil
+
         for f in self.files:
             if not os.path.exists(f):
                 continue
@@ -283,6 +317,8 @@ def sha256_from_file(filepath: str, block_size: int = 1 << 20, hash_prefix: bool
     Returns an arbitrary sized unique ASCII string based on the file contents.
     (exact hashing method may change).
     """
+    import hashlib
+
     with open(filepath, 'rb') as fh:
         size = 0
         sha256 = hashlib.new('sha256')
@@ -445,6 +481,8 @@ def pkg_manifest_from_toml_and_validate_all_errors(
 
     The caller is expected to use exception handling and forward any errors to the user.
     """
+    import tomllib
+
     try:
         with open(filepath, "rb") as fh:
             data = tomllib.load(fh)
@@ -455,7 +493,7 @@ def pkg_manifest_from_toml_and_validate_all_errors(
 
 
 def pkg_zipfile_detect_subdir_or_none(
-        zip_fh: zipfile.ZipFile,
+        zip_fh: "zipfile.ZipFile",
 ) -> Optional[str]:
     if PKG_MANIFEST_FILENAME_TOML in zip_fh.NameToInfo:
         return ""
@@ -485,7 +523,7 @@ def pkg_zipfile_detect_subdir_or_none(
 
 
 def pkg_manifest_from_zipfile_and_validate_impl(
-        zip_fh: zipfile.ZipFile,
+        zip_fh: "zipfile.ZipFile",
         archive_subdir: str,
         all_errors: bool,
         strict: bool,
@@ -522,7 +560,7 @@ def pkg_manifest_from_zipfile_and_validate_impl(
 
 
 def pkg_manifest_from_zipfile_and_validate(
-        zip_fh: zipfile.ZipFile,
+        zip_fh: "zipfile.ZipFile",
         archive_subdir: str,
         strict: bool,
 ) -> Union[PkgManifest, str]:
@@ -538,7 +576,7 @@ def pkg_manifest_from_zipfile_and_validate(
 
 
 def pkg_manifest_from_zipfile_and_validate_all_errors(
-        zip_fh: zipfile.ZipFile,
+        zip_fh: "zipfile.ZipFile",
         archive_subdir: str,
         strict: bool,
 ) -> Union[PkgManifest, List[str]]:
@@ -554,6 +592,8 @@ def pkg_manifest_from_archive_and_validate(
         filepath: str,
         strict: bool,
 ) -> Union[PkgManifest, str]:
+    import zipfile
+
     try:
         zip_fh_context = zipfile.ZipFile(filepath, mode="r")
     except BaseException as ex:
@@ -565,7 +605,30 @@ def pkg_manifest_from_archive_and_validate(
         return pkg_manifest_from_zipfile_and_validate(zip_fh, archive_subdir, strict=strict)
 
 
+def pkg_repo_entry_from_archive(filepath: str) -> Union[Tuple[Dict[str, Any], int, str], str]:
+    """
+    Validate the archive and return the manifest (without ``None`` values), it's size & hash
+    or an error string on failure.
+
+    This is run in a worker process by ``server-generate``, so the result must be JSON compatible.
+    """
+    manifest = pkg_manifest_from_archive_and_validate(filepath, strict=False)
+    if isinstance(manifest, str):
+        return manifest
+    manifest_dict = manifest._asdict()
+
+    # Call all optional keys so the JSON never contains `null` items.
+    for key, value in list(manifest_dict.items()):
+        if value is None:
+            del manifest_dict[key]
+
+    archive_size, archive_hash = sha256_from_file(filepath, hash_prefix=True)
+    return manifest_dict, archive_size, archive_hash
+
+
 def remote_url_get(url: str) -> str:
+    import urllib.parse
+
     if REMOTE_REPO_HAS_JSON_IMPLIED:
         return url
     return urllib.parse.urljoin(url, PKG_REPO_LIST_FILENAME)
@@ -575,7 +638,7 @@ def remote_url_get(url: str) -> str:
 # ZipFile Helpers
 
 def zipfile_make_root_directory(
-        zip_fh: zipfile.ZipFile,
+        zip_fh: "zipfile.ZipFile",
         root_dir: str,
 ) -> None:
     """
@@ -599,6 +662,125 @@ def zipfile_make_root_directory(
         filelist.append(member)
 
 
+def zipfile_compress_member_is_supported(zip_fh: "zipfile.ZipFile") -> bool:
+    """
+    Return true when ``zipfile_compress_member`` & ``zipfile_write_compressed_member`` can be used,
+    as they depend on private ``zipfile`` API which may change between Python versions.
+    Otherwise members must be written using ``zipfile.ZipFile.write``.
+    """
+    import zipfile
+    return (
+        callable(getattr(zipfile, "_get_compressor", None)) and
+        callable(getattr(zip_fh, "_writecheck", None)) and
+        all(hasattr(zip_fh, attr) for attr in ("_lock", "_didModify", "start_dir", "fp"))
+    )
+
+
+def zipfile_compress_member(
+        filepath: str,
+        arcname: str,
+        compress_type: int,
+) -> Tuple["zipfile.ZipInfo", IO[bytes]]:
+    """
+    Compress ``filepath``, returning the member & the compressed data
+    to be written using ``zipfile_write_compressed_member``.
+
+    Safe to run in a thread, allowing multiple files to be compressed at once.
+    """
+    import tempfile
+    import zipfile
+    import zlib
+
+    # Match `zipfile.ZipFile.write`.
+    zinfo = zipfile.ZipInfo.from_file(filepath, arcname)
+    zinfo.compress_type = compress_type
+    # NOTE: private API, used so the compressed data is identical to `zipfile.ZipFile.write`.
+    compressor = zipfile._get_compressor(compress_type)  # type: ignore
+
+    data_compressed = tempfile.SpooledTemporaryFile(max_size=BUILD_COMPRESS_SPOOL_SIZE)
+    crc = 0
+    file_size = 0
+    try:
+        with open(filepath, "rb") as fh:
+            while (data := fh.read(BUILD_COMPRESS_CHUNK_SIZE)):
+                crc = zlib.crc32(data, crc)
+                file_size += len(data)
+                data_compressed.write(compressor.compress(data) if compressor is not None else data)
+        if compressor is not None:
+            data_compressed.write(compressor.flush())
+    except BaseException as ex:
+        data_compressed.close()
+        raise ex
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = data_compressed.tell()
+    data_compressed.seek(0)
+    return zinfo, data_compressed
+
+
+def zipfile_write_compressed_member(
+        zip_fh: "zipfile.ZipFile",
+        zinfo: "zipfile.ZipInfo",
+        data_compressed: IO[bytes],
+) -> None:
+    """
+    Write a member compressed by ``zipfile_compress_member``.
+    """
+    import shutil
+    import zipfile
+
+    # WARNING: there is no public API for writing compressed data,
+    # this matches `zipfile.ZipFile.open(.., mode="w")` & closing the file it returns,
+    # so the archive is identical to one created by `zipfile.ZipFile.write`.
+    zinfo.flag_bits = 0x00
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        # Compressed data includes an end-of-stream (EOS) marker (`zipfile._MASK_COMPRESS_OPTION_1`).
+        zinfo.flag_bits |= 0x02
+
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    if not zip64 and (zinfo.compress_size > zipfile.ZIP64_LIMIT):
+        raise RuntimeError("Compressed size too large")
+
+    with zip_fh._lock:  # type: ignore
+        zip_fh.fp.seek(zip_fh.start_dir)  # type: ignore
+        zinfo.header_offset = zip_fh.fp.tell()  # type: ignore
+        zip_fh._writecheck(zinfo)  # type: ignore
+        zip_fh._didModify = True  # type: ignore
+        zip_fh.fp.write(zinfo.FileHeader(zip64))  # type: ignore
+        shutil.copyfileobj(data_compressed, zip_fh.fp)  # type: ignore
+        zip_fh.start_dir = zip_fh.fp.tell()  # type: ignore
+        zip_fh.filelist.append(zinfo)
+        zip_fh.NameToInfo[zinfo.filename] = zinfo
+
+
+def zipfile_member_errors(
+        zip_fh: "zipfile.ZipFile",
+) -> Generator[str, None, None]:
+    """
+    Read all members in a single pass (in the order they are stored),
+    yielding an error for each member with unexpected size or CRC.
+    """
+    for zinfo in sorted(zip_fh.infolist(), key=lambda zinfo: zinfo.header_offset):
+        if zinfo.is_dir():
+            continue
+        file_size = 0
+        try:
+            # The CRC is checked when reading reaches the end of the file.
+            with zip_fh.open(zinfo, "r") as fh:
+                while (data := fh.read(BUILD_COMPRESS_CHUNK_SIZE)):
+                    file_size += len(data)
+        except BaseException as ex:
+            yield "Error reading \"{:s}\" ({:s})".format(zinfo.filename, str(ex))
+            continue
+        if file_size != zinfo.file_size:
+            yield "Error, size mismatch for \"{:s}\" (expected {:d}, found {:d})".format(
+                zinfo.filename,
+                zinfo.file_size,
+                file_size,
+            )
+
+
 # -----------------------------------------------------------------------------
 # URL Downloading
 
@@ -629,9 +811,12 @@ def url_retrieve_to_data_iter(
     data file as well as the resulting HTTPMessage object.
     """
     from urllib.error import ContentTooShortError
-    from urllib.request import urlopen
+    from urllib.request import (
+        Request,
+        urlopen,
+    )
 
-    request = urllib.request.Request(
+    request = Request(
         url,
         data=data,
         headers=headers,
@@ -1117,16 +1302,36 @@ def url_request_headers_create(*, accept_json: bool, user_agent: str) -> Dict[st
     return headers
 
 
-def repo_json_is_valid_or_error(filepath: str) -> Optional[str]:
-    if not os.path.exists(filepath):
-        return "File missing: " + filepath
+def repo_json_item_is_valid_or_error(item: Any) -> Optional[str]:
+    if not isinstance(item, dict):
+        return "Expected a dictionary, not a {!r}".format(type(item))
+
+    if (pkg_idname := item.get("id")) is None:
+        return "Expected an \"id\""
+
+    if not isinstance(pkg_idname, str):
+        return "Expected a string id, not a {!r}".format(type(pkg_idname))
+
+    if (error_msg := pkg_idname_is_valid_or_error(pkg_idname)) is not None:
+        return "Expected key to be an identifier, \"{:s}\" failed: {:s}".format(pkg_idname, error_msg)
+
+    if (error_msg := pkg_manifest_is_valid_or_error(item, from_repo=True, strict=False)) is not None:
+        return error_msg
+
+    return None
+
+
+def repo_json_blocklist_is_valid_or_error(value: Any) -> Optional[str]:
+    if not isinstance(value, list):
+        return "Expected \"blocklist\" to be a list, not a {:s}".format(str(type(value)))
+    for item in value:
+        if isinstance(item, str):
+            continue
+        return "Expected \"blocklist\" to be a list of strings, found {:s}".format(str(type(item)))
+    return None
 
-    try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            result = json.load(fh)
-    except BaseException as ex:
-        return str(ex)
 
+def repo_json_data_is_valid_or_error(result: Any) -> Optional[str]:
     if not isinstance(result, dict):
         return "Expected a dictionary, not a {!r}".format(type(result))
 
@@ -1136,12 +1341,8 @@ def repo_json_is_valid_or_error(filepath: str) -> Optional[str]:
         return "Expected \"version\" value to be a version string"
 
     if (value := result.get("blocklist")) is not None:
-        if not isinstance(value, list):
-            return "Expected \"blocklist\" to be a list, not a {:s}".format(str(type(value)))
-        for item in value:
-            if isinstance(item, str):
-                continue
-            return "Expected \"blocklist\" to be a list of strings, found {:s}".format(str(type(item)))
+        if (error_msg := repo_json_blocklist_is_valid_or_error(value)) is not None:
+            return error_msg
 
     if (value := result.get("data")) is None:
         return "Expected a \"data\" key which was not found"
@@ -1149,25 +1350,101 @@ def repo_json_is_valid_or_error(filepath: str) -> Optional[str]:
         return "Expected \"data\" value to be a list"
 
     for i, item in enumerate(value):
+        if (error_msg := repo_json_item_is_valid_or_error(item)) is not None:
+            return "Error at index {:d}: {:s}".format(i, error_msg)
 
-        if (pkg_idname := item.get("id")) is None:
-            return "Expected item at index {:d} to have an \"id\"".format(i)
+    return None
 
-        if not isinstance(pkg_idname, str):
-            return "Expected item at index {:d} to have a string id, not a {!r}".format(i, type(pkg_idname))
 
-        if (error_msg := pkg_idname_is_valid_or_error(pkg_idname)) is not None:
-            return "Expected key at index {:d} to be an identifier, \"{:s}\" failed: {:s}".format(
-                i, pkg_idname, error_msg,
-            )
+def repo_json_is_valid_or_error(filepath: str) -> Optional[str]:
+    if not os.path.exists(filepath):
+        return "File missing: " + filepath
 
-        if (error_msg := pkg_manifest_is_valid_or_error(item, from_repo=True, strict=False)) is not None:
-            return "Error at index {:d}: {:s}".format(i, error_msg)
+    try:
+        with open(filepath, "r", encoding="utf-8") as fh:
+            result = json.load(fh)
+    except BaseException as ex:
+        return str(ex)
 
-    return None
+    return repo_json_data_is_valid_or_error(result)
+
+
+def repo_json_apply_deltas_or_error(
+        json_data: Dict[str, Any],
+        delta_data: Any,
+) -> Union[Tuple[int, int], str, None]:
+    """
+    Apply changes from ``PKG_REPO_DELTA_FILENAME`` to ``json_data`` (in-place),
+    only items in the delta are validated.
+
+    Return the number of updated & removed packages, None when the delta can't be used
+    (the full repository data must be downloaded instead) or an error string.
+    """
+    if not isinstance(delta_data, dict):
+        return "Expected a dictionary, not a {!r}".format(type(delta_data))
+    if delta_data.get("version") != "1":
+        return None
+
+    revision = json_data.get("revision")
+    revision_remote = delta_data.get("revision")
+    if not (isinstance(revision, int) and isinstance(revision_remote, int)):
+        return None
+    if json_data.get("revision_uuid") != delta_data.get("revision_uuid"):
+        return None
+    if revision == revision_remote:
+        return (0, 0)
+
+    if not isinstance(deltas := delta_data.get("deltas"), list):
+        return "Expected \"deltas\" to be a list"
+    # Each delta must follow the previous, starting from the local revision.
+    deltas_apply: List[Dict[str, Any]] = []
+    for delta in deltas:
+        if not isinstance(delta, dict):
+            return "Expected \"deltas\" to be a list of dictionaries"
+        if (delta_revision := delta.get("revision")) == revision + len(deltas_apply) + 1:
+            deltas_apply.append(delta)
+        elif deltas_apply or (not isinstance(delta_revision, int)) or (delta_revision > revision):
+            # Out of order or older revisions have been removed.
+            return None
+    if revision + len(deltas_apply) != revision_remote:
+        return None
+
+    items = json_data["data"]
+    item_index_map = {item["id"]: i for i, item in enumerate(items)}
+    update_count = 0
+    remove_count = 0
+    for delta in deltas_apply:
+        items_update = delta.get("update")
+        items_remove = delta.get("remove")
+        if not (isinstance(items_update, list) and isinstance(items_remove, list)):
+            return "Expected \"update\" & \"remove\" lists at revision {!r}".format(delta["revision"])
+        if (blocklist := delta.get("blocklist")) is not None:
+            if (error_msg := repo_json_blocklist_is_valid_or_error(blocklist)) is not None:
+                return error_msg
+            json_data["blocklist"] = blocklist
+
+        for pkg_idname in items_remove:
+            if (i := item_index_map.pop(pkg_idname, None)) is not None:
+                items[i] = None
+                remove_count += 1
+        for item in items_update:
+            if (error_msg := repo_json_item_is_valid_or_error(item)) is not None:
+                return "Error at revision {!r}: {:s}".format(delta["revision"], error_msg)
+            if (i := item_index_map.get(item["id"])) is not None:
+                items[i] = item
+            else:
+                item_index_map[item["id"]] = len(items)
+                items.append(item)
+            update_count += 1
+
+    json_data["data"] = [item for item in items if item is not None]
+    json_data["revision"] = revision_remote
+    return (update_count, remove_count)
 
 
 def pkg_manifest_toml_is_valid_or_error(filepath: str, strict: bool) -> Tuple[Optional[str], Dict[str, Any]]:
+    import tomllib
+
     if not os.path.exists(filepath):
         return "File missing: " + filepath, {}
 
@@ -1184,6 +1461,8 @@ def pkg_manifest_toml_is_valid_or_error(filepath: str, strict: bool) -> Tuple[Op
 
 
 def toml_from_bytes(data: bytes) -> Optional[Dict[str, Any]]:
+    import tomllib
+
     result = tomllib.loads(data.decode('utf-8'))
     assert isinstance(result, dict)
     return result
@@ -1196,6 +1475,18 @@ def toml_from_filepath(filepath: str) -> Optional[Dict[str, Any]]:
     return result
 
 
+def json_to_filepath_atomic(filepath: str, data: Any, *, indent: Optional[int] = None) -> None:
+    """
+    Write JSON to a temporary file which replaces ``filepath`` once written,
+    so readers never see a partially written file.
+    """
+    filepath_temp = filepath + "@"
+    with CleanupPathsContext(files=(filepath_temp,), directories=()):
+        with open(filepath_temp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=indent)
+        os.replace(filepath_temp, filepath)
+
+
 def repo_local_private_dir(*, local_dir: str) -> str:
     """
     Ensure the repos hidden directory exists.
@@ -1223,6 +1514,94 @@ def repo_local_private_dir_ensure_with_subdir(*, local_dir: str, subdir: str) ->
     return local_private_subdir
 
 
+def repo_sync_validators_from_local(
+        *,
+        local_json_path: str,
+        local_validators_path: str,
+        remote_url: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Return the validators stored by the last sync, only when they can be used
+    (the remote URL is unchanged & the local JSON matches the size & hash it had when it was downloaded).
+    """
+    try:
+        with open(local_validators_path, "r", encoding="utf-8") as fh:
+            validators = json.load(fh)
+    except BaseException:
+        return None
+    if not isinstance(validators, dict):
+        return None
+    if validators.get("remote_url") != remote_url:
+        return None
+
+    try:
+        local_json_size = os.path.getsize(local_json_path)
+    except OSError:
+        return None
+    if local_json_size != validators.get("size"):
+        return None
+    if (local_json_size, validators.get("hash")) != sha256_from_file(local_json_path, hash_prefix=True):
+        return None
+    return validators
+
+
+def repo_sync_validators_from_remote(
+        remote_json_path: str,
+        *,
+        is_filesystem: bool,
+        headers: Dict[str, str],
+        timeout_in_seconds: float,
+) -> Tuple[str, str]:
+    """
+    Return the validators ``(etag, last_modified)`` of the remote JSON without downloading it,
+    empty strings when they can't be read.
+    """
+    if is_filesystem:
+        try:
+            remote_json_stat = os.stat(remote_json_path)
+        except OSError:
+            return "", ""
+        return "fs:{:d}:{:d}".format(remote_json_stat.st_size, remote_json_stat.st_mtime_ns), ""
+
+    from urllib.request import (
+        Request,
+        urlopen,
+    )
+    try:
+        request = Request(remote_json_path, headers=headers, method="HEAD")
+        with contextlib.closing(urlopen(request, timeout=timeout_in_seconds)) as fp:
+            response_headers = fp.info()
+    except BaseException:
+        return "", ""
+    return (response_headers.get("ETag") or ""), (response_headers.get("Last-Modified") or "")
+
+
+def repo_sync_delta_from_remote(
+        remote_delta_path: str,
+        *,
+        is_filesystem: bool,
+        headers: Dict[str, str],
+        timeout_in_seconds: float,
+) -> Optional[Any]:
+    """
+    Return the data from ``PKG_REPO_DELTA_FILENAME`` or None when it can't be read.
+    Errors are not reported as repositories are not required to provide this file.
+    """
+    try:
+        result = io.BytesIO()
+        for block in url_retrieve_to_data_iter_or_filesystem(
+                remote_delta_path,
+                is_filesystem=is_filesystem,
+                headers=headers,
+                chunk_size=CHUNK_SIZE_DEFAULT,
+                timeout_in_seconds=timeout_in_seconds,
+        ):
+            result.write(block)
+        return json.loads(result.getvalue().decode("utf-8"))
+    except BaseException:
+        return None
+
+
 def repo_sync_from_remote(
         *,
         msg_fn: MessageFn,
@@ -1235,6 +1614,9 @@ def repo_sync_from_remote(
     """
     Load package information into the local path.
     """
+    import urllib.error
+    import urllib.parse
+
     request_exit = False
     request_exit |= message_status(msg_fn, "Sync repo: {:s}".format(remote_url))
     if request_exit:
@@ -1243,16 +1625,29 @@ def repo_sync_from_remote(
     is_repo_filesystem = repo_is_filesystem(remote_url=remote_url)
     if is_repo_filesystem:
         remote_json_path = os.path.join(remote_url, PKG_REPO_LIST_FILENAME)
+        remote_delta_path = os.path.join(remote_url, PKG_REPO_DELTA_FILENAME)
     else:
         remote_json_path = remote_url_get(remote_url)
+        remote_delta_path = urllib.parse.urljoin(remote_json_path, PKG_REPO_DELTA_FILENAME)
 
     local_private_dir = repo_local_private_dir_ensure(local_dir=local_dir)
     local_json_path = os.path.join(local_private_dir, PKG_REPO_LIST_FILENAME)
     local_json_path_temp = local_json_path + "@"
+    local_validators_path = os.path.join(local_private_dir, PKG_REPO_LIST_VALIDATORS_FILENAME)
+
+    # Validators from the previous sync, used to skip downloading when the remote data is unchanged.
+    validators_prev = repo_sync_validators_from_local(
+        local_json_path=local_json_path,
+        local_validators_path=local_validators_path,
+        remote_url=remote_url,
+    )
+    # The current local JSON (before `extension_override` is applied), deltas are applied to this.
+    local_json_path_curr = local_json_path
 
     assert extension_override != "@"
     if extension_override:
         local_json_path = local_json_path + extension_override
+        local_validators_path = local_validators_path + extension_override
 
     if os.path.exists(local_json_path_temp):
         os.unlink(local_json_path_temp)
@@ -1263,23 +1658,117 @@ def repo_sync_from_remote(
         if request_exit:
             return False
 
+        headers = url_request_headers_create(accept_json=True, user_agent=online_user_agent)
+        etag = ""
+        last_modified = ""
+        is_modified = True
+        # Set when the data was created by applying deltas to the local JSON.
+        json_data: Optional[Dict[str, Any]] = None
+
+        # When the repository provides deltas, only download the changes.
+        if validators_prev is not None and isinstance(revision_prev := validators_prev.get("revision"), int):
+            # Read before the delta (which is written after the JSON), so the validators are never
+            # for a newer JSON than the data the delta leads to.
+            etag, last_modified = repo_sync_validators_from_remote(
+                remote_json_path,
+                is_filesystem=is_repo_filesystem,
+                headers=headers,
+                timeout_in_seconds=timeout_in_seconds,
+            )
+            delta_data = repo_sync_delta_from_remote(
+                remote_delta_path,
+                is_filesystem=is_repo_filesystem,
+                headers=headers,
+                timeout_in_seconds=timeout_in_seconds,
+            )
+            if not isinstance(delta_data, dict):
+                pass
+            elif (
+                    (delta_data.get("revision"), delta_data.get("revision_uuid")) ==
+                    (revision_prev, validators_prev.get("revision_uuid"))
+            ):
+                # Only a hint the local data is up to date, the JSON may have been generated without deltas
+                # (leaving an outdated delta), so its validators must match too.
+                # Otherwise it's checked below (using the `ETag` or file-system stat).
+                if (etag or last_modified) and (etag, last_modified) == (
+                        validators_prev.get("etag"),
+                        validators_prev.get("last_modified"),
+                ):
+                    is_modified = False
+            else:
+                try:
+                    with open(local_json_path_curr, "r", encoding="utf-8") as fh:
+                        json_data = json.load(fh)
+                        assert isinstance(json_data, dict)
+                except BaseException:
+                    json_data = None
+
+                if json_data is not None:
+                    result = repo_json_apply_deltas_or_error(json_data, delta_data)
+                    if isinstance(result, str):
+                        message_warn(msg_fn, "sync: invalid delta ({:s}) reading {!r}!".format(result, remote_url))
+                        json_data = None
+                    elif result is None:
+                        json_data = None
+                    else:
+                        request_exit |= message_status(
+                            msg_fn,
+                            "Sync applying changes ({:d} updated, {:d} removed)".format(*result),
+                        )
+                    del result
+            del delta_data
+        if request_exit:
+            return False
+
         # No progress for file copying, assume local file system is fast enough.
         # `shutil.copyfile(remote_json_path, local_json_path_temp)`.
         try:
-            read_total = 0
-            for (read, size) in url_retrieve_to_filepath_iter_or_filesystem(
-                    remote_json_path,
-                    local_json_path_temp,
-                    is_filesystem=is_repo_filesystem,
-                    headers=url_request_headers_create(accept_json=True, user_agent=online_user_agent),
-                    chunk_size=CHUNK_SIZE_DEFAULT,
-                    timeout_in_seconds=timeout_in_seconds,
-            ):
-                request_exit |= message_progress(msg_fn, "Downloading...", read_total, size, 'BYTE')
-                if request_exit:
-                    break
-                read_total += read
-            del read_total
+            if not is_modified or json_data is not None:
+                pass
+            elif is_repo_filesystem:
+                # There is no `ETag` for the file-system, use the size & modification time instead.
+                remote_json_stat = os.stat(remote_json_path)
+                etag = "fs:{:d}:{:d}".format(remote_json_stat.st_size, remote_json_stat.st_mtime_ns)
+                del remote_json_stat
+                if validators_prev is not None and validators_prev.get("etag") == etag:
+                    is_modified = False
+                else:
+                    read_total = 0
+                    for (read, size) in filepath_retrieve_to_filepath_iter(
+                            remote_json_path,
+                            local_json_path_temp,
+                            chunk_size=CHUNK_SIZE_DEFAULT,
+                            timeout_in_seconds=timeout_in_seconds,
+                    ):
+                        request_exit |= message_progress(msg_fn, "Downloading...", read_total, size, 'BYTE')
+                        if request_exit:
+                            break
+                        read_total += read
+                    del read_total
+            else:
+                if validators_prev is not None:
+                    # NOTE: servers only check `If-Modified-Since` when `If-None-Match` isn't sent.
+                    if value := validators_prev.get("etag"):
+                        headers["If-None-Match"] = value
+                    elif value := validators_prev.get("last_modified"):
+                        headers["If-Modified-Since"] = value
+
+                read_total = 0
+                for (read, size, response_headers) in url_retrieve_to_filepath_iter(
+                        remote_json_path,
+                        local_json_path_temp,
+                        headers=headers,
+                        chunk_size=CHUNK_SIZE_DEFAULT,
+                        timeout_in_seconds=timeout_in_seconds,
+                ):
+                    if read_total == 0:
+                        etag = response_headers.get("ETag") or ""
+                        last_modified = response_headers.get("Last-Modified") or ""
+                    request_exit |= message_progress(msg_fn, "Downloading...", read_total, size, 'BYTE')
+                    if request_exit:
+                        break
+                    read_total += read
+                del read_total
 
         except FileNotFoundError as ex:
             message_error(msg_fn, "sync: file-not-found ({:s}) reading {!r}!".format(str(ex), remote_url))
@@ -1287,6 +1776,12 @@ def repo_sync_from_remote(
         except TimeoutError as ex:
             message_error(msg_fn, "sync: timeout ({:s}) reading {!r}!".format(str(ex), remote_url))
             return False
+        except urllib.error.HTTPError as ex:
+            if ex.code == 304:
+                is_modified = False
+            else:
+                message_error(msg_fn, "sync: URL error ({:s}) reading {!r}!".format(str(ex), remote_url))
+                return False
         except urllib.error.URLError as ex:
             message_error(msg_fn, "sync: URL error ({:s}) reading {!r}!".format(str(ex), remote_url))
             return False
@@ -1297,16 +1792,42 @@ def repo_sync_from_remote(
         if request_exit:
             return False
 
-        error_msg = repo_json_is_valid_or_error(local_json_path_temp)
-        if error_msg is not None:
-            message_error(msg_fn, "sync: invalid manifest ({:s}) reading {!r}!".format(error_msg, remote_url))
-            return False
-        del error_msg
+        if not is_modified:
+            # Leave the local JSON as-is (including it's modification time), so cached data remains valid.
+            request_exit |= message_status(msg_fn, "Sync unchanged: {:s}".format(remote_url))
+            return not request_exit
+
+        if json_data is not None:
+            # Items have been validated while applying the deltas.
+            try:
+                with open(local_json_path_temp, "w", encoding="utf-8") as fh:
+                    json.dump(json_data, fh)
+            except BaseException as ex:
+                message_error(msg_fn, "sync: unexpected error ({:s}) writing {!r}!".format(
+                    str(ex), local_json_path_temp,
+                ))
+                return False
+        else:
+            error_msg: Optional[str] = None
+            try:
+                with open(local_json_path_temp, "r", encoding="utf-8") as fh:
+                    json_data = json.load(fh)
+            except BaseException as ex:
+                error_msg = str(ex)
+            else:
+                error_msg = repo_json_data_is_valid_or_error(json_data)
+            if error_msg is not None:
+                message_error(msg_fn, "sync: invalid manifest ({:s}) reading {!r}!".format(error_msg, remote_url))
+                return False
+            del error_msg
+        assert isinstance(json_data, dict)
 
         request_exit |= message_status(msg_fn, "Sync complete: {:s}".format(remote_url))
         if request_exit:
             return False
 
+        local_json_size, local_json_hash = sha256_from_file(local_json_path_temp, hash_prefix=True)
+
         if os.path.exists(local_json_path):
             os.unlink(local_json_path)
 
@@ -1316,6 +1837,29 @@ def repo_sync_from_remote(
         if extension_override:
             request_exit |= message_path(msg_fn, os.path.relpath(local_json_path, local_dir))
 
+        # Store validators so the next sync can skip downloading unchanged data.
+        revision = json_data.get("revision")
+        revision_uuid = json_data.get("revision_uuid")
+        if not (isinstance(revision, int) and isinstance(revision_uuid, str)):
+            revision = None
+            revision_uuid = None
+        if etag or last_modified or (revision is not None):
+            try:
+                json_to_filepath_atomic(local_validators_path, {
+                    "remote_url": remote_url,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "size": local_json_size,
+                    "hash": local_json_hash,
+                    "revision": revision,
+                    "revision_uuid": revision_uuid,
+                })
+            except BaseException as ex:
+                message_warn(msg_fn, "sync: failed to write {!r} ({:s})".format(local_validators_path, str(ex)))
+            else:
+                if extension_override:
+                    request_exit |= message_path(msg_fn, os.path.relpath(local_validators_path, local_dir))
+
     return True
 
 
@@ -1412,27 +1956,33 @@ def generic_arg_repo_dir(subparse: argparse.ArgumentParser) -> None:
     )
 
 
-def generic_arg_remote_url(subparse: argparse.ArgumentParser) -> None:
+def generic_arg_remote_url(subparse: argparse.ArgumentParser, *, allow_multiple: bool = False) -> None:
     subparse.add_argument(
         "--remote-url",
         dest="remote_url",
         type=str,
         help=(
             "The remote repository URL."
+        ) + (
+            "\nMay be passed multiple times, each paired with a ``--local-dir``." if allow_multiple else ""
         ),
         required=True,
+        **({"action": "append"} if allow_multiple else {}),
     )
 
 
-def generic_arg_local_dir(subparse: argparse.ArgumentParser) -> None:
+def generic_arg_local_dir(subparse: argparse.ArgumentParser, *, allow_multiple: bool = False) -> None:
     subparse.add_argument(
         "--local-dir",
         dest="local_dir",
         type=str,
         help=(
             "The local checkout."
+        ) + (
+            "\nMay be passed multiple times, each paired with a ``--remote-url``." if allow_multiple else ""
         ),
         required=True,
+        **({"action": "append"} if allow_multiple else {}),
     )
 
 
@@ -1576,16 +2126,141 @@ def generic_arg_extension_override(subparse: argparse.ArgumentParser) -> None:
     )
 
 
+def generic_arg_incremental(subparse: argparse.ArgumentParser) -> None:
+    subparse.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        default=False,
+        help=(
+            "Reuse results for archives which have not changed since the last run "
+            "(stored in ``{:s}``).".format(PKG_REPO_CACHE_FILENAME)
+        ),
+    )
+
+
+def generic_arg_delta(subparse: argparse.ArgumentParser) -> None:
+    subparse.add_argument(
+        "--delta",
+        dest="delta",
+        action="store_true",
+        default=False,
+        help=(
+            "Write ``{:s}`` containing changes since previous revisions, "
+            "so clients only download changed packages when syncing.".format(PKG_REPO_DELTA_FILENAME)
+        ),
+    )
+
+
+def generic_arg_jobs(subparse: argparse.ArgumentParser) -> None:
+    subparse.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help=(
+            "The number of jobs to run at once, zero to use the number of CPU cores."
+        ),
+        default=0,
+        required=False,
+    )
+
+
 class subcmd_server:
 
     def __new__(cls) -> Any:
         raise RuntimeError("{:s} should not be instantiated".format(cls))
 
+    @staticmethod
+    def _generate_cache_load(filepath_cache: str) -> Dict[str, Any]:
+        # Any problem reading the cache is not an error, all archives are simply recomputed.
+        try:
+            with open(filepath_cache, "r", encoding="utf-8") as fh:
+                result = json.load(fh)
+        except BaseException:
+            return {}
+        if not isinstance(result, dict) or result.get("version") != "1":
+            return {}
+        data = result.get("data")
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    @staticmethod
+    def _generate_delta(
+            repo_gen_dict: Dict[str, Any],
+            *,
+            filepath_repo_json: str,
+            filepath_repo_delta: str,
+    ) -> Dict[str, Any]:
+        # Add revision information to `repo_gen_dict` & return the delta data,
+        # comparing against the previously generated files (when they exist).
+        import uuid
+
+        repo_json_prev: Dict[str, Any] = {}
+        repo_delta_prev: Dict[str, Any] = {}
+        for filepath, data_prev in (
+                (filepath_repo_json, repo_json_prev),
+                (filepath_repo_delta, repo_delta_prev),
+        ):
+            try:
+                with open(filepath, "r", encoding="utf-8") as fh:
+                    value = json.load(fh)
+            except BaseException:
+                continue
+            if isinstance(value, dict):
+                data_prev.update(value)
+
+        revision_prev = repo_json_prev.get("revision")
+        revision_uuid = repo_json_prev.get("revision_uuid")
+        deltas: List[Dict[str, Any]] = []
+
+        if isinstance(revision_prev, int) and isinstance(revision_uuid, str):
+            items_prev = {item["id"]: item for item in repo_json_prev.get("data", ()) if isinstance(item, dict)}
+            items_curr = {item["id"]: item for item in repo_gen_dict["data"]}
+            items_update = [item for pkg_idname, item in items_curr.items() if items_prev.get(pkg_idname) != item]
+            items_remove = [pkg_idname for pkg_idname in items_prev.keys() if pkg_idname not in items_curr]
+
+            # Deltas are only useful when they are contiguous with the previous revision.
+            if (
+                    (repo_delta_prev.get("revision"), repo_delta_prev.get("revision_uuid")) ==
+                    (revision_prev, revision_uuid)
+            ):
+                if isinstance(value := repo_delta_prev.get("deltas"), list):
+                    deltas.extend(value)
+
+            if items_update or items_remove or repo_json_prev.get("blocklist") != repo_gen_dict["blocklist"]:
+                revision = revision_prev + 1
+                deltas.append({
+                    "revision": revision,
+                    "blocklist": repo_gen_dict["blocklist"],
+                    "update": items_update,
+                    "remove": items_remove,
+                })
+                del deltas[:-PKG_REPO_DELTA_HISTORY_MAX]
+            else:
+                revision = revision_prev
+        else:
+            # No previous revision, start from scratch.
+            revision = 1
+            revision_uuid = uuid.uuid4().hex
+
+        repo_gen_dict["revision"] = revision
+        repo_gen_dict["revision_uuid"] = revision_uuid
+        return {
+            "version": "1",
+            "revision": revision,
+            "revision_uuid": revision_uuid,
+            "deltas": deltas,
+        }
+
     @staticmethod
     def generate(
             msg_fn: MessageFn,
             *,
             repo_dir: str,
+            incremental: bool,
+            jobs: int,
+            delta: bool,
     ) -> bool:
 
         is_repo_filesystem = repo_is_filesystem(remote_url=repo_dir)
@@ -1597,14 +2272,16 @@ class subcmd_server:
             message_error(msg_fn, "Directory: {!r} not found!".format(repo_dir))
             return False
 
-        repo_data_idname_unique: Set[str] = set()
-        repo_data: List[Dict[str, Any]] = []
-        # Write package meta-data into each directory.
-        repo_gen_dict = {
-            "version": "1",
-            "blocklist": [],
-            "data": repo_data,
-        }
+        filepath_cache = os.path.join(repo_dir, PKG_REPO_CACHE_FILENAME)
+        # Keyed by the archive filename, values store the size & modification time of the archive
+        # along with the result of `pkg_repo_entry_from_archive`.
+        cache_data_prev = subcmd_server._generate_cache_load(filepath_cache) if incremental else {}
+        cache_data: Dict[str, Dict[str, Any]] = {}
+
+        # Ordered archive filenames (in the order they're found) & the result for each archive.
+        archive_filenames: List[str] = []
+        archive_results: Dict[str, Union[Tuple[Dict[str, Any], int, str], str]] = {}
+
         for entry in os.scandir(repo_dir):
             if not entry.name.endswith(PKG_EXT):
                 continue
@@ -1615,12 +2292,68 @@ class subcmd_server:
                 continue
 
             filename = entry.name
+            archive_filenames.append(filename)
+
+            entry_stat = entry.stat()
+            cache_item = {
+                "size": entry_stat.st_size,
+                "mtime": entry_stat.st_mtime_ns,
+            }
+            cache_data[filename] = cache_item
+
+            if (cache_item_prev := cache_data_prev.get(filename)) is None:
+                continue
+            if (cache_item_prev.get("size"), cache_item_prev.get("mtime")) != (cache_item["size"], cache_item["mtime"]):
+                continue
+            result = cache_item_prev.get("result")
+            if isinstance(result, str):
+                archive_results[filename] = result
+            elif isinstance(result, list) and len(result) == 3:
+                archive_results[filename] = (result[0], result[1], result[2])
+        del cache_data_prev
+
+        # Validate & hash archives which aren't cached, using multiple processes when there is enough work.
+        archive_filenames_recompute = [filename for filename in archive_filenames if filename not in archive_results]
+        archive_filepaths_recompute = [os.path.join(repo_dir, filename) for filename in archive_filenames_recompute]
+        if jobs <= 0:
+            jobs = os.cpu_count() or 1
+        jobs = min(jobs, len(archive_filepaths_recompute))
+        if jobs > 1:
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                results_recompute = list(executor.map(
+                    pkg_repo_entry_from_archive,
+                    archive_filepaths_recompute,
+                    # Balance the overhead of passing data between processes
+                    # against the chance of some processes being left idle.
+                    chunksize=max(1, len(archive_filepaths_recompute) // (jobs * 4)),
+                ))
+        else:
+            results_recompute = [pkg_repo_entry_from_archive(filepath) for filepath in archive_filepaths_recompute]
+
+        for filename, result in zip(archive_filenames_recompute, results_recompute, strict=True):
+            archive_results[filename] = result
+        del archive_filepaths_recompute, results_recompute
+
+        repo_data_idname_unique: Set[str] = set()
+        repo_data: List[Dict[str, Any]] = []
+        # Write package meta-data into each directory.
+        repo_gen_dict: Dict[str, Any] = {
+            "version": "1",
+            "blocklist": [],
+            "data": repo_data,
+        }
+        for filename in archive_filenames:
             filepath = os.path.join(repo_dir, filename)
-            manifest = pkg_manifest_from_archive_and_validate(filepath, strict=False)
-            if isinstance(manifest, str):
-                message_warn(msg_fn, "archive validation failed {!r}, error: {:s}".format(filepath, manifest))
+            result = archive_results[filename]
+            cache_data[filename]["result"] = result
+
+            if isinstance(result, str):
+                message_warn(msg_fn, "archive validation failed {!r}, error: {:s}".format(filepath, result))
                 continue
-            manifest_dict = manifest._asdict()
+
+            # Copy as the cache must not contain the values added below.
+            manifest_dict = result[0].copy()
 
             repo_data_idname_unique_len = len(repo_data_idname_unique)
             repo_data_idname_unique.add(manifest_dict["id"])
@@ -1628,11 +2361,6 @@ class subcmd_server:
                 message_warn(msg_fn, "archive found with duplicate id {!r}, {!r}".format(manifest_dict["id"], filepath))
                 continue
 
-            # Call all optional keys so the JSON never contains `null` items.
-            for key, value in list(manifest_dict.items()):
-                if value is None:
-                    del manifest_dict[key]
-
             # These are added, ensure they don't exist.
             has_key_error = False
             for key in ("archive_url", "archive_size", "archive_hash"):
@@ -1653,15 +2381,40 @@ class subcmd_server:
             (
                 manifest_dict["archive_size"],
                 manifest_dict["archive_hash"],
-            ) = sha256_from_file(filepath, hash_prefix=True)
+            ) = result[1], result[2]
 
             repo_data.append(manifest_dict)
 
         filepath_repo_json = os.path.join(repo_dir, PKG_REPO_LIST_FILENAME)
+        if delta:
+            filepath_repo_delta = os.path.join(repo_dir, PKG_REPO_DELTA_FILENAME)
+            repo_delta_dict = subcmd_server._generate_delta(
+                repo_gen_dict,
+                filepath_repo_json=filepath_repo_json,
+                filepath_repo_delta=filepath_repo_delta,
+            )
+            # Write the delta last, so clients never see a delta for a revision which doesn't yet exist.
+            json_to_filepath_atomic(filepath_repo_json, repo_gen_dict, indent=2)
+            json_to_filepath_atomic(filepath_repo_delta, repo_delta_dict, indent=2)
+        else:
+            # Remove the delta first, so clients never apply a delta which doesn't lead to the new JSON.
+            filepath_repo_delta = os.path.join(repo_dir, PKG_REPO_DELTA_FILENAME)
+            if os.path.exists(filepath_repo_delta):
+                os.unlink(filepath_repo_delta)
+            json_to_filepath_atomic(filepath_repo_json, repo_gen_dict, indent=2)
+
+        if incremental:
+            try:
+                json_to_filepath_atomic(filepath_cache, {"version": "1", "data": cache_data})
+            except BaseException as ex:
+                message_warn(msg_fn, "failed to write cache {!r}, error: {:s}".format(filepath_cache, str(ex)))
 
-        with open(filepath_repo_json, "w", encoding="utf-8") as fh:
-            json.dump(repo_gen_dict, fh, indent=2)
         message_status(msg_fn, "found {:d} packages.".format(len(repo_data)))
+        if incremental:
+            message_status(msg_fn, "cached {:d}, recomputed {:d}.".format(
+                len(archive_filenames) - len(archive_filenames_recompute),
+                len(archive_filenames_recompute),
+            ))
 
         return True
 
@@ -1678,6 +2431,8 @@ class subcmd_client:
             online_user_agent: str,
             timeout_in_seconds: float,
     ) -> bool:
+        import urllib.error
+
         is_repo_filesystem = repo_is_filesystem(remote_url=remote_url)
         if is_repo_filesystem:
             if not os.path.isdir(remote_url):
@@ -1760,6 +2515,89 @@ class subcmd_client:
         )
         return success
 
+    @staticmethod
+    def _sync_multi_thread(
+            *,
+            repo_index: int,
+            remote_url: str,
+            local_dir: str,
+            online_user_agent: str,
+            timeout_in_seconds: float,
+            extension_override: str,
+            msg_queue: "queue.Queue[Tuple[int, str, PrimTypeOrSeq]]",
+    ) -> None:
+        # Messages are queued for the main thread to write, an empty type is used to report completion.
+        def msg_fn_queue(ty: str, data: PrimTypeOrSeq) -> bool:
+            msg_queue.put((repo_index, ty, data))
+            return REQUEST_EXIT
+
+        try:
+            success = repo_sync_from_remote(
+                msg_fn=msg_fn_queue,
+                remote_url=remote_url,
+                local_dir=local_dir,
+                online_user_agent=online_user_agent,
+                timeout_in_seconds=timeout_in_seconds,
+                extension_override=extension_override,
+            )
+        except BaseException as ex:
+            message_error(msg_fn_queue, "Sync failed: {:s}".format(str(ex)))
+            success = False
+        msg_queue.put((repo_index, "", int(success)))
+
+    @staticmethod
+    def sync_multi(
+            msg_fn: MessageFn,
+            *,
+            repos: Sequence[Tuple[str, str]],
+            online_user_agent: str,
+            timeout_in_seconds: float,
+            force_exit_ok: bool,
+            extension_override: str,
+    ) -> bool:
+        # Sync multiple repositories at once, avoiding the overhead of a process for each repository.
+        # Messages for each repository follow a "REPO" message with it's index,
+        # a "DONE" message is written when each repository has finished.
+        import queue
+        from concurrent.futures import ThreadPoolExecutor
+
+        if force_exit_ok:
+            force_exit_ok_enable()
+
+        msg_queue: "queue.Queue[Tuple[int, str, PrimTypeOrSeq]]" = queue.Queue()
+
+        success = True
+        with ThreadPoolExecutor(max_workers=min(SYNC_JOBS_MAX, len(repos))) as executor:
+            for repo_index, (remote_url, local_dir) in enumerate(repos):
+                executor.submit(
+                    subcmd_client._sync_multi_thread,
+                    repo_index=repo_index,
+                    remote_url=remote_url,
+                    local_dir=local_dir,
+                    online_user_agent=online_user_agent,
+                    timeout_in_seconds=timeout_in_seconds,
+                    extension_override=extension_override,
+                    msg_queue=msg_queue,
+                )
+
+            # Relay messages from the sync threads until all have finished.
+            repo_index_prev = -1
+            pending = len(repos)
+            while pending:
+                repo_index, ty, data = msg_queue.get()
+                if repo_index != repo_index_prev:
+                    message_repo(msg_fn, repo_index)
+                    repo_index_prev = repo_index
+                if ty == "":
+                    pending -= 1
+                    if not data:
+                        success = False
+                    message_done(msg_fn)
+                    continue
+                msg_fn(ty, data)
+
+        return success
+
     @staticmethod
     def _install_package_from_file_impl(
             msg_fn: MessageFn,
@@ -1770,6 +2608,8 @@ class subcmd_client:
     ) -> bool:
         # Implement installing a package to a repository.
         # Used for installing from local cache as well as installing a local package from a file.
+        import shutil
+        import zipfile
 
         # Remove `filepath_local_pkg_temp` if this block exits.
         directories_to_clean: List[str] = []
@@ -1893,6 +2733,154 @@ class subcmd_client:
 
         return True
 
+    @staticmethod
+    def _install_package_download_thread(
+            *,
+            manifest_archive: PkgManifest_Archive,
+            filepath_remote_archive: str,
+            is_pkg_filesystem: bool,
+            filepath_local_cache_archive: str,
+            online_user_agent: str,
+            timeout_in_seconds: float,
+            progress_queue: "queue.Queue[Tuple[str, int, Optional[Tuple[str, str]]]]",
+            cancel_event: "threading.Event",
+    ) -> None:
+        import hashlib
+        import urllib.error
+
+        # Download a single archive, hashing the data as it's read.
+        # Messages are not written from here, instead the progress & result are passed to the main thread
+        # (which owns `msg_fn`) as: `(pkg_idname, size_downloaded, result)`.
+        # Where the result is None while downloading, `("", "")` on success or a `(message_type, text)` error.
+        pkg_idname = manifest_archive.manifest.id
+        archive_size_expected = manifest_archive.archive_size
+        archive_hash_expected = manifest_archive.archive_hash
+
+        filename_archive_size_test = 0
+        sha256 = hashlib.new('sha256')
+        error: Tuple[str, str] = ("", "")
+
+        try:
+            with open(filepath_local_cache_archive, "wb") as fh_cache:
+                for block in url_retrieve_to_data_iter_or_filesystem(
+                        filepath_remote_archive,
+                        is_filesystem=is_pkg_filesystem,
+                        headers=url_request_headers_create(accept_json=False, user_agent=online_user_agent),
+                        chunk_size=CHUNK_SIZE_DEFAULT,
+                        timeout_in_seconds=timeout_in_seconds,
+                ):
+                    progress_queue.put((pkg_idname, filename_archive_size_test, None))
+                    if cancel_event.is_set():
+                        break
+                    fh_cache.write(block)
+                    sha256.update(block)
+                    filename_archive_size_test += len(block)
+
+        except FileNotFoundError as ex:
+            error = ('ERROR', "install: file-not-found ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive))
+        except TimeoutError as ex:
+            error = ('ERROR', "install: timeout ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive))
+        except urllib.error.URLError as ex:
+            error = ('ERROR', "install: URL error ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive))
+        except BaseException as ex:
+            error = ('ERROR', "install: unexpected error ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive))
+
+        # Validate:
+        if not (error[0] or cancel_event.is_set()):
+            filename_archive_hash_test = "sha256:" + sha256.hexdigest()
+            if filename_archive_size_test != archive_size_expected:
+                error = ('WARN', "Archive size mismatch \"{:s}\", expected {:d}, was {:d}".format(
+                    pkg_idname,
+                    archive_size_expected,
+                    filename_archive_size_test,
+                ))
+            elif filename_archive_hash_test != archive_hash_expected:
+                error = ('WARN', "Archive checksum mismatch \"{:s}\", expected {:s}, was {:s}".format(
+                    pkg_idname,
+                    archive_hash_expected,
+                    filename_archive_hash_test,
+                ))
+
+        progress_queue.put((pkg_idname, filename_archive_size_test, error))
+
+    @staticmethod
+    def _install_packages_download(
+            msg_fn: MessageFn,
+            *,
+            packages_to_download: Sequence[Tuple[PkgManifest_Archive, str, bool, str]],
+            online_user_agent: str,
+            timeout_in_seconds: float,
+    ) -> bool:
+        # Download multiple archives at once, as installing many small packages
+        # is typically limited by the latency of each request.
+        import queue
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        progress_queue: "queue.Queue[Tuple[str, int, Optional[Tuple[str, str]]]]" = queue.Queue()
+        cancel_event = threading.Event()
+
+        archive_size_expected_map = {
+            manifest_archive.manifest.id: manifest_archive.archive_size
+            for manifest_archive, _, _, _ in packages_to_download
+        }
+
+        request_exit = False
+        has_error = False
+        with ThreadPoolExecutor(max_workers=min(INSTALL_DOWNLOAD_JOBS_MAX, len(packages_to_download))) as executor:
+            futures = [
+                executor.submit(
+                    subcmd_client._install_package_download_thread,
+                    manifest_archive=manifest_archive,
+                    filepath_remote_archive=filepath_remote_archive,
+                    is_pkg_filesystem=is_pkg_filesystem,
+                    filepath_local_cache_archive=filepath_local_cache_archive,
+                    online_user_agent=online_user_agent,
+                    timeout_in_seconds=timeout_in_seconds,
+                    progress_queue=progress_queue,
+                    cancel_event=cancel_event,
+                )
+                for (
+                        manifest_archive,
+                        filepath_remote_archive,
+                        is_pkg_filesystem,
+                        filepath_local_cache_archive,
+                ) in packages_to_download
+            ]
+
+            # Relay messages from the download threads until all have finished.
+            pending = len(packages_to_download)
+            while pending:
+                pkg_idname, size_downloaded, error = progress_queue.get()
+                if error is None:
+                    if request_exit or has_error:
+                        continue
+                    request_exit |= message_progress(
+                        msg_fn,
+                        "Downloading \"{:s}\"".format(pkg_idname),
+                        size_downloaded,
+                        archive_size_expected_map[pkg_idname],
+                        'BYTE',
+                    )
+                else:
+                    pending -= 1
+                    if error[0] and not (request_exit or has_error):
+                        # Only report the first error, others are likely to be caused by canceling.
+                        if error[0] == 'ERROR':
+                            message_error(msg_fn, error[1])
+                        else:
+                            message_warn(msg_fn, error[1])
+                        has_error = True
+
+                if (request_exit or has_error) and not cancel_event.is_set():
+                    cancel_event.set()
+                    # Downloads which haven't started never report a result, don't wait for them.
+                    pending -= sum(future.cancel() for future in futures)
+
+        if request_exit or has_error:
+            return False
+        return True
+
     @staticmethod
     def install_packages(
             msg_fn: MessageFn,
@@ -1904,6 +2892,8 @@ class subcmd_client:
             online_user_agent: str,
             timeout_in_seconds: float,
     ) -> bool:
+        import urllib.parse
+
         # Extract...
         is_repo_filesystem = repo_is_filesystem(remote_url=remote_url)
         pkg_repo_data = repo_pkginfo_from_local_with_idname_as_key(local_dir=local_dir)
@@ -1946,11 +2936,11 @@ class subcmd_client:
             return False
         del has_error
 
-        request_exit = False
-
         # Ensure all cache is cleared (when `local_cache` is disabled) no matter the cause of exiting.
         files_to_clean: List[str] = []
         with CleanupPathsContext(files=files_to_clean, directories=()):
+            # Downloads which are not found in the cache: `(manifest_archive, remote_path, is_filesystem, local_path)`.
+            packages_to_download: List[Tuple[PkgManifest_Archive, str, bool, str]] = []
             for manifest_archive in packages_info:
                 pkg_idname = manifest_archive.manifest.id
                 # Archive name.
@@ -1998,83 +2988,24 @@ class subcmd_client:
                         os.unlink(filepath_local_cache_archive)
 
                 if not found:
-                    # Create `filepath_local_cache_archive`.
-                    filename_archive_size_test = 0
-                    sha256 = hashlib.new('sha256')
-
-                    # NOTE(@ideasman42): There is more logic in the try/except block than I'd like.
-                    # Refactoring could be done to avoid that but it ends up making logic difficult to follow.
-                    try:
-                        with open(filepath_local_cache_archive, "wb") as fh_cache:
-                            for block in url_retrieve_to_data_iter_or_filesystem(
-                                    filepath_remote_archive,
-                                    is_filesystem=is_pkg_filesystem,
-                                    headers=url_request_headers_create(accept_json=False, user_agent=online_user_agent),
-                                    chunk_size=CHUNK_SIZE_DEFAULT,
-                                    timeout_in_seconds=timeout_in_seconds,
-                            ):
-                                request_exit |= message_progress(
-                                    msg_fn,
-                                    "Downloading \"{:s}\"".format(pkg_idname),
-                                    filename_archive_size_test,
-                                    archive_size_expected,
-                                    'BYTE',
-                                )
-                                if request_exit:
-                                    break
-                                fh_cache.write(block)
-                                sha256.update(block)
-                                filename_archive_size_test += len(block)
-
-                    except FileNotFoundError as ex:
-                        message_error(
-                            msg_fn,
-                            "install: file-not-found ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive),
-                        )
-                        return False
-                    except TimeoutError as ex:
-                        message_error(
-                            msg_fn,
-                            "install: timeout ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive),
-                        )
-                        return False
-                    except urllib.error.URLError as ex:
-                        message_error(
-                            msg_fn,
-                            "install: URL error ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive),
-                        )
-                        return False
-                    except BaseException as ex:
-                        message_error(
-                            msg_fn,
-                            "install: unexpected error ({:s}) reading {!r}!".format(str(ex), filepath_remote_archive),
-                        )
-                        return False
-
-                    if request_exit:
-                        return False
-
-                    # Validate:
-                    if filename_archive_size_test != archive_size_expected:
-                        message_warn(msg_fn, "Archive size mismatch \"{:s}\", expected {:d}, was {:d}".format(
-                            pkg_idname,
-                            archive_size_expected,
-                            filename_archive_size_test,
-                        ))
-                        return False
-                    filename_archive_hash_test = "sha256:" + sha256.hexdigest()
-                    if filename_archive_hash_test != archive_hash_expected:
-                        message_warn(msg_fn, "Archive checksum mismatch \"{:s}\", expected {:s}, was {:s}".format(
-                            pkg_idname,
-                            archive_hash_expected,
-                            filename_archive_hash_test,
-                        ))
-                        return False
-                    del filename_archive_size_test
-                    del filename_archive_hash_test
+                    packages_to_download.append((
+                        manifest_archive,
+                        filepath_remote_archive,
+                        is_pkg_filesystem,
+                        filepath_local_cache_archive,
+                    ))
                 del found
                 del filepath_local_cache_archive
 
+            if packages_to_download:
+                if not subcmd_client._install_packages_download(
+                        msg_fn,
+                        packages_to_download=packages_to_download,
+                        online_user_agent=online_user_agent,
+                        timeout_in_seconds=timeout_in_seconds,
+                ):
+                    return False
+
             # All packages have been downloaded, install them.
             for manifest_archive in packages_info:
                 filepath_local_cache_archive = os.path.join(local_cache_dir, manifest_archive.manifest.id + PKG_EXT)
@@ -2097,6 +3028,8 @@ class subcmd_client:
             local_dir: str,
             packages: Sequence[str],
     ) -> bool:
+        import shutil
+
         if not os.path.isdir(local_dir):
             message_error(msg_fn, "Missing local \"{:s}\"".format(local_dir))
             return False
@@ -2162,7 +3095,15 @@ class subcmd_author:
             pkg_source_dir: str,
             pkg_output_dir: str,
             pkg_output_filepath: str,
+            jobs: int,
     ) -> bool:
+        import zipfile
+        from collections import deque
+        from concurrent.futures import (
+            Future,
+            ThreadPoolExecutor,
+        )
+
         if not os.path.isdir(pkg_source_dir):
             message_error(msg_fn, "Missing local \"{:s}\"".format(pkg_source_dir))
             return False
@@ -2210,6 +3151,9 @@ class subcmd_author:
         if request_exit:
             return False
 
+        if jobs <= 0:
+            jobs = os.cpu_count() or 1
+
         with CleanupPathsContext(files=(outfile_temp,), directories=()):
             try:
                 zip_fh_context = zipfile.ZipFile(outfile_temp, 'w', zipfile.ZIP_LZMA)
@@ -2217,7 +3161,44 @@ class subcmd_author:
                 message_status(msg_fn, "Error creating archive \"{:s}\"".format(str(ex)))
                 return False
 
-            with contextlib.closing(zip_fh_context) as zip_fh:
+            with (
+                    contextlib.closing(zip_fh_context) as zip_fh,
+                    ThreadPoolExecutor(max_workers=jobs) as executor,
+            ):
+                # Files are compressed in worker threads (compression doesn't hold the GIL),
+                # then written in the order they're found so the archive doesn't depend on the number of jobs.
+                # Files which aren't compressed are written directly, in order.
+                # Limit the files compressed ahead of writing, to limit memory use.
+                # When the `zipfile` internals this depends on aren't available, compress while writing.
+                use_compress_threads = zipfile_compress_member_is_supported(zip_fh)
+                compress_pending: "deque[Tuple[str, str, int, Optional[Future[Tuple[zipfile.ZipInfo, IO[bytes]]]]]]" = (
+                    deque()
+                )
+                compress_pending_max = jobs * 2
+
+                def compress_pending_write_one() -> bool:
+                    filepath_abs, filepath_rel, compress_type, future = compress_pending.popleft()
+                    try:
+                        if future is None:
+                            # Handy for testing that sub-directories:
+                            # zip_fh.write(filepath_abs, manifest.id + "/" + filepath_rel)
+                            zip_fh.write(filepath_abs, filepath_rel, compress_type=compress_type)
+                        else:
+                            zinfo, data_compressed = future.result()
+                            with data_compressed:
+                                zipfile_write_compressed_member(zip_fh, zinfo, data_compressed)
+                    except BaseException as ex:
+                        message_status(msg_fn, "Error adding to archive \"{:s}\"".format(str(ex)))
+                        return False
+                    return True
+
+                def compress_pending_cancel() -> None:
+                    # Close compressed data which won't be written (waiting for files being compressed).
+                    for _, _, _, future in compress_pending:
+                        if future is not None and not future.cancel() and future.exception() is None:
+                            future.result()[1].close()
+                    compress_pending.clear()
+
                 for filepath_abs, filepath_rel in scandir_recursive(
                         pkg_source_dir,
                         # Be more advanced in the future, for now ignore dot-files (`.git`) .. etc.
@@ -2226,13 +3207,23 @@ class subcmd_author:
                     if filepath_rel in filenames_root_exclude:
                         continue
 
-                    # Handy for testing that sub-directories:
-                    # zip_fh.write(filepath_abs, manifest.id + "/" + filepath_rel)
-                    compress_type = zipfile.ZIP_STORED if filepath_skip_compress(filepath_abs) else None
-                    try:
-                        zip_fh.write(filepath_abs, filepath_rel, compress_type=compress_type)
-                    except BaseException as ex:
-                        message_status(msg_fn, "Error adding to archive \"{:s}\"".format(str(ex)))
+                    compress_type = zipfile.ZIP_STORED if filepath_skip_compress(filepath_abs) else zipfile.ZIP_LZMA
+                    compress_pending.append((
+                        filepath_abs,
+                        filepath_rel,
+                        compress_type,
+                        executor.submit(zipfile_compress_member, filepath_abs, filepath_rel, compress_type)
+                        if (use_compress_threads and compress_type != zipfile.ZIP_STORED) else None,
+                    ))
+
+                    if len(compress_pending) > compress_pending_max:
+                        if not compress_pending_write_one():
+                            compress_pending_cancel()
+                            return False
+
+                while compress_pending:
+                    if not compress_pending_write_one():
+                        compress_pending_cancel()
                         return False
 
                 request_exit |= message_status(msg_fn, "complete")
@@ -2302,6 +3293,8 @@ class subcmd_author:
         # If it's ever causes too much code-duplication we can always
         # extract the archive into a temporary directory and run validation there.
 
+        import zipfile
+
         try:
             zip_fh_context = zipfile.ZipFile(pkg_source_archive, mode="r")
         except BaseException as ex:
@@ -2322,6 +3315,13 @@ class subcmd_author:
 
             # NOTE: this is arguably *not* manifest validation, the check could be refactored out.
             # Currently we always want to check both and it's useful to do that while the informatio
+            ok = True
+            for error_msg in zipfile_member_errors(zip_fh):
+                message_status(msg_fn, error_msg)
+                ok = False
+            if not ok:
+                return False
+
             expected_files = []
             if manifest.type == "add-on":
                 if archive_subdir:
@@ -2441,6 +3441,7 @@ def unregister():
                     pkg_source_dir=pkg_src_dir,
                     pkg_output_dir=repo_dir,
                     pkg_output_filepath=".",
+                    jobs=1,
                 ):
                     # Error running command.
                     return False
@@ -2449,6 +3450,9 @@ def unregister():
         if not subcmd_server.generate(
             msg_fn_no_done,
             repo_dir=repo_dir,
+            incremental=False,
+            jobs=1,
+            delta=False,
         ):
             # Error running command.
             return False
@@ -2503,6 +3507,9 @@ def argparse_create_server_generate(
     )
 
     generic_arg_repo_dir(subparse)
+    generic_arg_incremental(subparse)
+    generic_arg_jobs(subparse)
+    generic_arg_delta(subparse)
     if args_internal:
         generic_arg_output_type(subparse)
 
@@ -2510,6 +3517,9 @@ def argparse_create_server_generate(
         func=lambda args: subcmd_server.generate(
             msg_fn_from_args(args),
             repo_dir=args.repo_dir,
+            incremental=args.incremental,
+            jobs=args.jobs,
+            delta=args.delta,
         ),
     )
 
@@ -2553,8 +3563,8 @@ def argparse_create_client_sync(subparsers: "argparse._SubParsersAction[argparse
         formatter_class=argparse.RawTextHelpFormatter,
     )
 
-    generic_arg_remote_url(subparse)
-    generic_arg_local_dir(subparse)
+    generic_arg_remote_url(subparse, allow_multiple=True)
+    generic_arg_local_dir(subparse, allow_multiple=True)
     generic_arg_online_user_agent(subparse)
 
     generic_arg_output_type(subparse)
@@ -2562,16 +3572,32 @@ def argparse_create_client_sync(subparsers: "argparse._SubParsersAction[argparse
     generic_arg_ignore_broken_pipe(subparse)
     generic_arg_extension_override(subparse)
 
-    subparse.set_defaults(
-        func=lambda args: subcmd_client.sync(
-            msg_fn_from_args(args),
-            remote_url=args.remote_url,
-            local_dir=args.local_dir,
+    def subcmd_client_sync(args: argparse.Namespace) -> bool:
+        msg_fn = msg_fn_from_args(args)
+        if len(args.remote_url) != len(args.local_dir):
+            message_error(msg_fn, "Expected the same number of \"--remote-url\" & \"--local-dir\" arguments")
+            return False
+        if len(args.remote_url) == 1:
+            return subcmd_client.sync(
+                msg_fn,
+                remote_url=args.remote_url[0],
+                local_dir=args.local_dir[0],
+                online_user_agent=args.online_user_agent,
+                timeout_in_seconds=args.timeout,
+                force_exit_ok=args.force_exit_ok,
+                extension_override=args.extension_override,
+            )
+        return subcmd_client.sync_multi(
+            msg_fn,
+            repos=tuple(zip(args.remote_url, args.local_dir)),
             online_user_agent=args.online_user_agent,
             timeout_in_seconds=args.timeout,
             force_exit_ok=args.force_exit_ok,
             extension_override=args.extension_override,
-        ),
+        )
+
+    subparse.set_defaults(
+        func=subcmd_client_sync,
     )
 
 
@@ -2664,6 +3690,7 @@ def argparse_create_author_build(
     generic_arg_package_source_dir(subparse)
     generic_arg_package_output_dir(subparse)
     generic_arg_package_output_filepath(subparse)
+    generic_arg_jobs(subparse)
 
     if args_internal:
         generic_arg_output_type(subparse)
@@ -2674,6 +3701,7 @@ def argparse_create_author_build(
             pkg_source_dir=args.source_dir,
             pkg_output_dir=args.output_dir,
             pkg_output_filepath=args.output_filepath,
+            jobs=args.jobs,
         ),
     )
 
@@ -2780,7 +3808,12 @@ def argparse_create(
         args_internal: bool = True,
         args_extra_subcommands_fn: Optional[ArgsSubparseFn] = None,
         prog: Optional[str] = None,
+        subcommand: str = "",
 ) -> argparse.ArgumentParser:
+    """
+    When ``subcommand`` is set, only that sub-command is created (when it's known),
+    avoiding the overhead of creating sub-commands which aren't used.
+    """
 
     parser = argparse.ArgumentParser(
         prog=prog or "blender_ext",
@@ -2794,28 +3827,45 @@ def argparse_create(
         help="",
     )
 
-    argparse_create_server_generate(subparsers, args_internal)
+    # Each item is: `(subcommand, is_internal, create_fn)`.
+    subcommand_create_fns: Tuple[Tuple[str, bool, Callable[[], None]], ...] = (
+        ("server-generate", False, lambda: argparse_create_server_generate(subparsers, args_internal)),
 
-    if args_internal:
         # Queries.
-        argparse_create_client_list(subparsers)
+        ("list", True, lambda: argparse_create_client_list(subparsers)),
 
         # Manipulating Actions.
-        argparse_create_client_sync(subparsers)
-        argparse_create_client_install_files(subparsers)
-        argparse_create_client_install(subparsers)
-        argparse_create_client_uninstall(subparsers)
+        ("sync", True, lambda: argparse_create_client_sync(subparsers)),
+        ("install-files", True, lambda: argparse_create_client_install_files(subparsers)),
+        ("install", True, lambda: argparse_create_client_install(subparsers)),
+        ("uninstall", True, lambda: argparse_create_client_uninstall(subparsers)),
 
         # Dummy commands.
-        argparse_create_dummy_repo(subparsers)
-        argparse_create_dummy_progress(subparsers)
+        ("dummy-repo", True, lambda: argparse_create_dummy_repo(subparsers)),
+        ("dummy-progress", True, lambda: argparse_create_dummy_progress(subparsers)),
 
-    # Authoring Commands.
-    argparse_create_author_build(subparsers, args_internal)
-    argparse_create_author_validate(subparsers, args_internal)
+        # Authoring Commands.
+        ("build", False, lambda: argparse_create_author_build(subparsers, args_internal)),
+        ("validate", False, lambda: argparse_create_author_validate(subparsers, args_internal)),
+    )
+
+    if subcommand and (subcommand not in {
+            subcommand_iter for subcommand_iter, is_internal, _ in subcommand_create_fns
+            if args_internal or not is_internal
+    }):
+        # Unknown (possibly an extra sub-command), create all.
+        subcommand = ""
+
+    for subcommand_iter, is_internal, create_fn in subcommand_create_fns:
+        if is_internal and not args_internal:
+            continue
+        if subcommand and (subcommand != subcommand_iter):
+            continue
+        create_fn()
 
     if args_extra_subcommands_fn is not None:
-        args_extra_subcommands_fn(subparsers)
+        if not subcommand:
+            args_extra_subcommands_fn(subparsers)
 
     return parser
 
@@ -2896,10 +3946,15 @@ def main(
         sys.stdout.write("{:s}\n".format(VERSION))
         return 0
 
+    # Only create the parser for the sub-command being run (when one is passed in),
+    # as this script runs for every command, creating all parsers adds unnecessary overhead.
+    subcommand = next((arg for arg in (sys.argv[1:] if argv is None else argv) if not arg.startswith("-")), "")
+
     parser = argparse_create(
         args_internal=args_internal,
         args_extra_subcommands_fn=args_extra_subcommands_fn,
         prog=prog,
+        subcommand=subcommand,
     )
     args = parser.parse_args(argv)
     # Call sub-parser callback.
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2024 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Benchmark the throughput of ``blender_ext.py build`` & ``validate`` using a synthetic extension.
+
+The extension contains a mix of compressible data (scripts & text),
+data which doesn't compress well (textures) & archives which are stored without compression (``*.whl``).
+
+Command to run this benchmark:
+   make benchmark_cli_build
+
+Use a smaller extension or compare the number of jobs used when building:
+   python ./tests/benchmark_cli_build.py --size=256 --jobs=1,4
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import (
+    List,
+)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+CMD = (
+    sys.executable,
+    os.path.normpath(os.path.join(BASE_DIR, "..", "cli", "blender_ext.py")),
+)
+
+PKG_MANIFEST_FILENAME_TOML = "blender_manifest.toml"
+
+# Each item is: `(directory, extension, size_of_each_file, fraction_of_total_size, is_compressible)`.
+SYNTHETIC_FILES = (
+    ("scripts", ".py", 64 << 10, 0.05, True),
+    ("docs", ".txt", 1 << 20, 0.15, True),
+    ("textures", ".png", 8 << 20, 0.40, False),
+    ("wheels", ".whl", 32 << 20, 0.40, False),
+)
+
+
+def synthetic_extension_create(directory: str, size_total: int) -> None:
+    rng = random.Random(0)
+    # Text which compresses in a similar way to source code & documentation.
+    words = [bytes(rng.choices(b"abcdefghijklmnopqrstuvwxyz_", k=rng.randint(2, 12))) for _ in range(2000)]
+
+    with open(os.path.join(directory, PKG_MANIFEST_FILENAME_TOML), "w", encoding="utf-8") as fh:
+        fh.write(
+            "schema_version = \"1.0.0\"\n"
+            "id = \"synthetic\"\n"
+            "name = \"Synthetic\"\n"
+            "tagline = \"A synthetic extension for benchmarking\"\n"
+            "version = \"1.0.0\"\n"
+            "type = \"add-on\"\n"
+            "maintainer = \"Developer\"\n"
+            "license = [\"SPDX:GPL-2.0-or-later\"]\n"
+            "blender_version_min = \"4.2.0\"\n"
+        )
+    with open(os.path.join(directory, "__init__.py"), "w", encoding="utf-8") as fh:
+        fh.write("# Synthetic extension.\n")
+
+    for dirname, ext, size_file, fraction, is_compressible in SYNTHETIC_FILES:
+        os.makedirs(os.path.join(directory, dirname))
+        size_remaining = int(size_total * fraction)
+        index = 0
+        while size_remaining > 0:
+            size = min(size_file, size_remaining)
+            if is_compressible:
+                data = b" ".join(rng.choices(words, k=(size // 7) + 1))[:size]
+            else:
+                data = rng.randbytes(size)
+            with open(os.path.join(directory, dirname, "{:04d}{:s}".format(index, ext)), "wb") as fh:
+                fh.write(data)
+            size_remaining -= size
+            index += 1
+
+
+def command_time(args: List[str]) -> float:
+    time_beg = time.perf_counter()
+    subprocess.run([*CMD, *args], stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - time_beg
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024, help="The size of the extension in megabytes.")
+    parser.add_argument(
+        "--jobs", default="0",
+        help="Comma separated number of jobs to build with, zero to use the number of CPU cores.",
+    )
+    args = parser.parse_args()
+
+    size_total = args.size << 20
+    size_total_mb = size_total / (1 << 20)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_dir = os.path.join(temp_dir, "source")
+        os.makedirs(source_dir)
+        synthetic_extension_create(source_dir, size_total)
+
+        sys.stdout.write("Extension: {:.0f} MB, CPU cores: {:d}\n".format(size_total_mb, os.cpu_count() or 1))
+        for jobs in [int(jobs) for jobs in args.jobs.split(",")]:
+            outfile = os.path.join(temp_dir, "synthetic.zip")
+            time_build = command_time([
+                "build",
+                "--source-dir", source_dir,
+                "--output-filepath", outfile,
+                "--jobs", str(jobs),
+            ])
+            time_validate = command_time(["validate", outfile])
+            sys.stdout.write(
+                "jobs={:d}: build {:.2f}s ({:.1f} MB/s), validate {:.2f}s ({:.1f} MB/s), archive {:.0f} MB\n".format(
+                    jobs,
+                    time_build, size_total_mb / time_build,
+                    time_validate, size_total_mb / time_validate,
+                    os.path.getsize(outfile) / (1 << 20),
+                )
+            )
+            os.unlink(outfile)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: 2024 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Benchmark the start-up time of each ``blender_ext.py`` sub-command.
+
+As the command line is run for every command (sync, install ... etc), any extra time spent importing modules
+or creating argument parsers is paid by each command.
+
+Sub-commands which can run quickly on a tiny repository are run with minimal arguments
+(``list`` & ``sync`` with a local repository, ``build`` & ``validate`` with a tiny package ... etc),
+this includes Python's start-up, importing the module, creating the argument parser
+& the modules imported when the command runs.
+Others (which install packages or only exist for testing) run ``blender_ext.py <sub-command> --help``.
+
+NOTE: when ``PYTHONDONTWRITEBYTECODE`` is set, run ``python -m compileall ./cli`` first,
+otherwise the time to compile ``blender_ext.py`` is included.
+
+Command to run this benchmark:
+   make benchmark_cli_startup
+
+Record results, then compare them after making changes:
+   python ./tests/benchmark_cli_startup.py --output=startup.json
+   python ./tests/benchmark_cli_startup.py --compare=startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# See the variable `BLENDER_EXT_CMD` in `bl_extension_utils.py`,
+# run as a module so the byte-code cache is used (as Blender does).
+CMD = (
+    sys.executable,
+    "-c",
+    "import runpy, sys; sys.path.insert(0, {!r}); runpy.run_module({!r}, run_name=\"__main__\", alter_sys=True)".format(
+        os.path.normpath(os.path.join(BASE_DIR, "..", "cli")),
+        "blender_ext",
+    ),
+)
+
+SUBCOMMANDS = (
+    "server-generate",
+    "list",
+    "sync",
+    "install-files",
+    "install",
+    "uninstall",
+    "dummy-repo",
+    "dummy-progress",
+    "build",
+    "validate",
+)
+
+PKG_EXT = ".zip"
+PKG_MANIFEST_FILENAME_TOML = "blender_manifest.toml"
+# See `REPO_LOCAL_PRIVATE_DIR` in `blender_ext.py`.
+PKG_REPO_LOCAL_PRIVATE_DIR = ".blender_ext"
+
+# The interpreter start-up, used as a baseline.
+BASELINE_ID = "python"
+
+
+def tiny_repo_create(directory: str) -> None:
+    """
+    Create a package source in ``source``, a repository containing it in ``repo``
+    & an empty directory for installed packages in ``local``.
+    """
+    source_dir = os.path.join(directory, "source")
+    repo_dir = os.path.join(directory, "repo")
+    for path in (source_dir, repo_dir, os.path.join(directory, "local")):
+        os.makedirs(path)
+
+    with open(os.path.join(source_dir, PKG_MANIFEST_FILENAME_TOML), "w", encoding="utf-8") as fh:
+        fh.write(
+            "schema_version = \"1.0.0\"\n"
+            "id = \"tiny\"\n"
+            "name = \"Tiny\"\n"
+            "tagline = \"A tiny extension for benchmarking\"\n"
+            "version = \"1.0.0\"\n"
+            "type = \"add-on\"\n"
+            "maintainer = \"Developer\"\n"
+            "license = [\"SPDX:GPL-2.0-or-later\"]\n"
+            "blender_version_min = \"4.2.0\"\n"
+        )
+    with open(os.path.join(source_dir, "__init__.py"), "w", encoding="utf-8") as fh:
+        fh.write("# Tiny extension.\n")
+
+    for args in (
+            ("build", "--source-dir", source_dir, "--output-filepath", os.path.join(repo_dir, "tiny" + PKG_EXT)),
+            ("server-generate", "--repo-dir", repo_dir),
+    ):
+        subprocess.run((*CMD, *args), stdout=subprocess.DEVNULL, check=True)
+
+
+def subcommand_args(subcommand: str, directory: str) -> Sequence[str]:
+    """
+    Return the arguments to run the sub-command with, using the files from ``tiny_repo_create``.
+    """
+    source_dir = os.path.join(directory, "source")
+    repo_dir = os.path.join(directory, "repo")
+    local_dir = os.path.join(directory, "local")
+
+    if subcommand == "server-generate":
+        return ("--repo-dir", repo_dir)
+    if subcommand == "list":
+        return ("--remote-url", repo_dir, "--local-dir", "")
+    if subcommand == "sync":
+        return ("--remote-url", repo_dir, "--local-dir", local_dir)
+    if subcommand == "build":
+        return ("--source-dir", source_dir, "--output-filepath", os.path.join(directory, "build" + PKG_EXT))
+    if subcommand == "validate":
+        return (os.path.join(repo_dir, "tiny" + PKG_EXT),)
+    # Installing changes the state between runs, the remaining commands are for testing.
+    return ("--help",)
+
+
+def subcommand_setup(subcommand: str, directory: str) -> Optional[Callable[[], None]]:
+    """
+    Return a function to run before each run of the sub-command (not timed).
+    """
+    if subcommand == "sync":
+        # Without this, only the first run downloads the repository data.
+        local_private_dir = os.path.join(directory, "local", PKG_REPO_LOCAL_PRIVATE_DIR)
+        return lambda: shutil.rmtree(local_private_dir, ignore_errors=True)
+    return None
+
+
+def time_command(args: Sequence[str], runs: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    times = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        time_beg = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - time_beg)
+    return times
+
+
+def benchmark(runs: int) -> Dict[str, float]:
+    # Use the median as it's less sensitive to outliers caused by other processes.
+    result = {
+        BASELINE_ID: statistics.median(time_command((sys.executable, "-c", "pass"), runs)),
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tiny_repo_create(temp_dir)
+        for subcommand in SUBCOMMANDS:
+            result[subcommand] = statistics.median(time_command(
+                (*CMD, subcommand, *subcommand_args(subcommand, temp_dir)),
+                runs,
+                setup=subcommand_setup(subcommand, temp_dir),
+            ))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="The number of times to run each command.")
+    parser.add_argument("--output", default="", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", default="", help="Compare results with a JSON file written by \"--output\".")
+    parser.add_argument(
+        "--threshold", type=float, default=20.0,
+        help="Fail when the start-up overhead is slower than \"--compare\" by more than this percentage.",
+    )
+    args = parser.parse_args()
+
+    result = benchmark(args.runs)
+
+    result_compare: Dict[str, float] = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            result_compare = json.load(fh)
+
+    # The time spent by `blender_ext.py` (excluding the interpreter start-up).
+    baseline = result[BASELINE_ID]
+    baseline_compare = result_compare.get(BASELINE_ID, 0.0)
+
+    has_regression = False
+    sys.stdout.write("{:<16s} {:>10s} {:>10s}".format("sub-command", "total (ms)", "own (ms)"))
+    sys.stdout.write(" {:>10s}\n".format("change") if result_compare else "\n")
+    for key, value in result.items():
+        sys.stdout.write("{:<16s} {:>10.2f}".format(key, value * 1000.0))
+        if key == BASELINE_ID:
+            sys.stdout.write(" {:>10s}".format(""))
+        else:
+            sys.stdout.write(" {:>10.2f}".format((value - baseline) * 1000.0))
+            if (value_compare := result_compare.get(key)) is not None:
+                overhead = value - baseline
+                overhead_compare = value_compare - baseline_compare
+                change = ((overhead - overhead_compare) / overhead_compare) * 100.0 if overhead_compare > 0.0 else 0.0
+                sys.stdout.write(" {:>+9.1f}%".format(change))
+                if change > args.threshold:
+                    sys.stdout.write(" (regression)")
+                    has_regression = True
+        sys.stdout.write("\n")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+    return 1 if has_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,7 @@ from typing import (
     Any,
     Sequence,
     Dict,
+    List,
     NamedTuple,
     Optional,
     Set,
@@ -308,6 +309,32 @@ class TestCLI_WithRepo(unittest.TestCase):
         output = command_output(["server-generate", "--repo-dir", self.dirpath])
         self.assertEqual(output, "found 3 packages.\n")
 
+    def test_server_generate_incremental(self) -> None:
+        filepath_repo_json = os.path.join(self.dirpath, "bl_ext_repo.json")
+        filepath_cache = os.path.join(self.dirpath, ".bl_ext_repo_cache.json")
+        if os.path.exists(filepath_cache):
+            os.unlink(filepath_cache)
+
+        self.test_server_generate()
+        with open(filepath_repo_json, "rb") as fh:
+            repo_json_expected = fh.read()
+
+        output = command_output(["server-generate", "--repo-dir", self.dirpath, "--incremental"])
+        self.assertEqual(output, "found 3 packages.\ncached 0, recomputed 3.\n")
+        output = command_output(["server-generate", "--repo-dir", self.dirpath, "--incremental", "--jobs=1"])
+        self.assertEqual(output, "found 3 packages.\ncached 3, recomputed 0.\n")
+
+        # Results from the cache must match a full run.
+        with open(filepath_repo_json, "rb") as fh:
+            self.assertEqual(fh.read(), repo_json_expected)
+
+        # Changing an archive must only recompute that archive.
+        os.utime(os.path.join(self.dirpath, "foo_bar" + PKG_EXT), ns=(0, 0))
+        output = command_output(["server-generate", "--repo-dir", self.dirpath, "--incremental"])
+        self.assertEqual(output, "found 3 packages.\ncached 2, recomputed 1.\n")
+
+        os.unlink(filepath_cache)
+
     def test_client_list(self) -> None:
         # TODO: only run once.
         self.test_server_generate()
@@ -411,6 +438,240 @@ class TestCLI_WithRepo(unittest.TestCase):
             )
             self.assertFalse(os.path.isdir(os.path.join(temp_dir_local, "another_package")))
 
+    def test_client_sync_unchanged(self) -> None:
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local:
+            # TODO: only run once.
+            self.test_server_generate()
+
+            args = [
+                "sync",
+                "--remote-url", self.dirpath_url,
+                "--local-dir", temp_dir_local,
+            ]
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync complete: ' + self.dirpath_url))
+
+            filepath_local_json = os.path.join(temp_dir_local, ".blender_ext", "bl_ext_repo.json")
+            mtime_ns = os.stat(filepath_local_json).st_mtime_ns
+
+            # The remote data is unchanged, the local JSON must not be rewritten.
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(
+                output_json, [
+                    ('STATUS', 'Sync repo: ' + self.dirpath_url),
+                    ('STATUS', 'Sync downloading remote data'),
+                    ('STATUS', 'Sync unchanged: ' + self.dirpath_url),
+                ]
+            )
+            self.assertEqual(os.stat(filepath_local_json).st_mtime_ns, mtime_ns)
+
+            # A modified local JSON must not be trusted.
+            with open(filepath_local_json, "a", encoding="utf-8") as fh:
+                fh.write("\n")
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync complete: ' + self.dirpath_url))
+
+    def test_client_sync_delta(self) -> None:
+        # Use a sub-directory as packages are added & removed.
+        dirpath = os.path.join(self.dirpath, "delta")
+        if os.path.isdir(dirpath):
+            shutil.rmtree(dirpath)
+        os.makedirs(dirpath)
+        if USE_HTTP:
+            dirpath_url = self.dirpath_url.rpartition("/")[0] + "/delta/bl_ext_repo.json"
+        else:
+            dirpath_url = dirpath
+
+        def repo_data_from_json(filepath: str) -> Dict[str, Any]:
+            with open(filepath, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return {item["id"]: item for item in data["data"]}
+
+        my_generate_repo(
+            dirpath,
+            templates=(
+                PkgTemplate(idname="foo_bar", name="Foo Bar", version="1.0.5"),
+                PkgTemplate(idname="another_package", name="Another Package", version="1.5.2"),
+            ),
+        )
+        command_output(["server-generate", "--repo-dir", dirpath, "--delta"])
+
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local:
+            args = [
+                "sync",
+                "--remote-url", dirpath_url,
+                "--local-dir", temp_dir_local,
+            ]
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync complete: ' + dirpath_url))
+
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync unchanged: ' + dirpath_url))
+
+            # Update, add & remove packages.
+            os.unlink(os.path.join(dirpath, "another_package" + PKG_EXT))
+            my_generate_repo(
+                dirpath,
+                templates=(
+                    PkgTemplate(idname="foo_bar", name="Foo Bar", version="1.0.6"),
+                    PkgTemplate(idname="test_package", name="Test Package", version="1.5.2"),
+                ),
+            )
+            command_output(["server-generate", "--repo-dir", dirpath, "--delta"])
+
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(
+                output_json, [
+                    ('STATUS', 'Sync repo: ' + dirpath_url),
+                    ('STATUS', 'Sync downloading remote data'),
+                    ('STATUS', 'Sync applying changes (2 updated, 1 removed)'),
+                    ('STATUS', 'Sync complete: ' + dirpath_url),
+                ]
+            )
+            self.assertEqual(
+                repo_data_from_json(os.path.join(temp_dir_local, ".blender_ext", "bl_ext_repo.json")),
+                repo_data_from_json(os.path.join(dirpath, "bl_ext_repo.json")),
+            )
+
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync unchanged: ' + dirpath_url))
+
+        shutil.rmtree(dirpath)
+
+    def test_client_sync_delta_then_full(self) -> None:
+        # Generating without deltas must not leave a delta which makes clients skip the new JSON.
+        dirpath = os.path.join(self.dirpath, "delta_then_full")
+        if os.path.isdir(dirpath):
+            shutil.rmtree(dirpath)
+        os.makedirs(dirpath)
+        if USE_HTTP:
+            dirpath_url = self.dirpath_url.rpartition("/")[0] + "/delta_then_full/bl_ext_repo.json"
+        else:
+            dirpath_url = dirpath
+
+        filepath_delta = os.path.join(dirpath, "bl_ext_repo_delta.json")
+
+        def repo_ids_from_json(filepath: str) -> Set[str]:
+            with open(filepath, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return {item["id"] for item in data["data"]}
+
+        my_generate_repo(
+            dirpath,
+            templates=(
+                PkgTemplate(idname="foo_bar", name="Foo Bar", version="1.0.5"),
+            ),
+        )
+        command_output(["server-generate", "--repo-dir", dirpath, "--delta"])
+        with open(filepath_delta, "rb") as fh_delta:
+            delta_data_prev = fh_delta.read()
+
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local:
+            args = [
+                "sync",
+                "--remote-url", dirpath_url,
+                "--local-dir", temp_dir_local,
+            ]
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync complete: ' + dirpath_url))
+
+            my_generate_repo(
+                dirpath,
+                templates=(
+                    PkgTemplate(idname="test_package", name="Test Package", version="1.5.2"),
+                ),
+            )
+            command_output(["server-generate", "--repo-dir", dirpath])
+            self.assertFalse(os.path.exists(filepath_delta))
+            # The `Last-Modified` HTTP header has a resolution of seconds, ensure it changes.
+            filepath_json = os.path.join(dirpath, "bl_ext_repo.json")
+            mtime = os.stat(filepath_json).st_mtime + 2.0
+            os.utime(filepath_json, (mtime, mtime))
+
+            # Restore the outdated delta (as left by older versions),
+            # the client must still detect the JSON changed.
+            with open(filepath_delta, "wb") as fh_delta_stale:
+                fh_delta_stale.write(delta_data_prev)
+
+            output_json = command_output_from_json_0(args, exclude_types={"PROGRESS"})
+            self.assertEqual(output_json[-1], ('STATUS', 'Sync complete: ' + dirpath_url))
+            self.assertEqual(
+                repo_ids_from_json(os.path.join(temp_dir_local, ".blender_ext", "bl_ext_repo.json")),
+                {"foo_bar", "test_package"},
+            )
+
+        shutil.rmtree(dirpath)
+
+    def test_client_sync_multiple(self) -> None:
+        with (
+                tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local_a,
+                tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local_b,
+        ):
+            # TODO: only run once.
+            self.test_server_generate()
+
+            output_json = command_output_from_json_0([
+                "sync",
+                "--remote-url", self.dirpath_url,
+                "--local-dir", temp_dir_local_a,
+                "--remote-url", self.dirpath_url,
+                "--local-dir", temp_dir_local_b,
+            ], exclude_types={"PROGRESS"})
+
+            # Split messages by the repository they're for.
+            output_json_per_repo: List[List[Tuple[str, Any]]] = [[], []]
+            repo_index = -1
+            for ty, msg in output_json:
+                if ty == 'REPO':
+                    repo_index = msg
+                    continue
+                output_json_per_repo[repo_index].append((ty, msg))
+
+            for temp_dir_local, output_json_repo in zip((temp_dir_local_a, temp_dir_local_b), output_json_per_repo):
+                self.assertEqual(
+                    output_json_repo, [
+                        ('STATUS', 'Sync repo: ' + self.dirpath_url),
+                        ('STATUS', 'Sync downloading remote data'),
+                        ('STATUS', 'Sync complete: ' + self.dirpath_url),
+                        ('DONE', ""),
+                    ]
+                )
+                self.assertTrue(os.path.exists(os.path.join(temp_dir_local, ".blender_ext", "bl_ext_repo.json")))
+
+    def test_client_install_multiple(self) -> None:
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR_LOCAL) as temp_dir_local:
+            # TODO: only run once.
+            self.test_server_generate()
+
+            command_output_from_json_0([
+                "sync",
+                "--remote-url", self.dirpath_url,
+                "--local-dir", temp_dir_local,
+            ], exclude_types={"PROGRESS"})
+
+            # Archives are downloaded concurrently, installing is always performed in order.
+            output_json = command_output_from_json_0(
+                [
+                    "install", "test_package,foo_bar,another_package",
+                    "--remote-url", self.dirpath_url,
+                    "--local-dir", temp_dir_local,
+                ],
+            )
+            self.assertEqual(
+                command_output_filter_exclude(output_json, exclude_types={"PROGRESS"}), [
+                    ("STATUS", "Installed \"another_package\""),
+                    ("STATUS", "Installed \"foo_bar\""),
+                    ("STATUS", "Installed \"test_package\""),
+                ]
+            )
+            # Progress must be reported for every package.
+            self.assertEqual(
+                {data[0] for _, data in command_output_filter_include(output_json, include_types={"PROGRESS"})},
+                {"Downloading \"another_package\"", "Downloading \"foo_bar\"", "Downloading \"test_package\""},
+            )
+            for pkg_idname in ("another_package", "foo_bar", "test_package"):
+                self.assertTrue(os.path.isdir(os.path.join(temp_dir_local, pkg_idname)))
+
 
 if __name__ == "__main__":
     if USE_HTTP:
@@ -32,6 +32,7 @@ if "bpy" in locals():
     import importlib
 
     importlib.reload(geom)
+    importlib.reload(lexer)
     importlib.reload(model)
     importlib.reload(vecfile)
     importlib.reload(import_vecfile)
@@ -43,6 +44,7 @@ if "bpy" in locals():
 else:
     from . import (
         geom,
+        lexer,
         model,
         vecfile,
         import_vecfile,
@@ -129,6 +131,10 @@ class VectorImporter(bpy.types.Operator, ImportHelper):
     cap_back : BoolProperty(name="Cap back",
       description="Cap the back if extruding",
       default=False)
+    page : IntProperty(name="Page",
+      description="Page to import from multi-page PDF files",
+      default=1,
+      min=1)
     true_scale : BoolProperty(name="True Scale",
       description="Use true scale, with 1 meter = 1 blender unit",
       default=False)
@@ -154,6 +160,7 @@ class VectorImporter(bpy.types.Operator, ImportHelper):
         box.prop(self, "bevel_amount")
         box.prop(self, "bevel_pitch")
         box.prop(self, "cap_back")
+        box.prop(self, "page")
         if self.num_verts > 0:
             layout.label(text="Ve:" + str(self.num_verts) + \
               " | Fa:" + str(self.num_faces))
@@ -175,6 +182,7 @@ class VectorImporter(bpy.types.Operator, ImportHelper):
         options.bevel_amount = self.bevel_amount
         options.bevel_pitch = self.bevel_pitch
         options.cap_back = self.cap_back
+        options.page = self.page - 1
         options.convert_options.subdiv_kind = self.subdiv_kind
         options.convert_options.smoothness = self.smoothness
         options.convert_options.filled_only = self.filled_only
@@ -185,7 +193,6 @@ class VectorImporter(bpy.types.Operator, ImportHelper):
             self.report({'ERROR'},
                 "Problem reading file " + self.filepath + ": " + msg)
             return {'FINISHED'}
-        verts = mdl.points.pos
         if self.true_scale:
             # assume model units are 90 dpi, if svg file
             # else 72 dpi
@@ -195,7 +202,8 @@ class VectorImporter(bpy.types.Operator, ImportHelper):
                 print("svg s=", s)
             else:
                 s = 0.0254 / 72.0
-            verts = [(s * v[0], s * v[1], s * v[2]) for v in verts]
+            mdl.points.Transform(s)
+        verts = mdl.points.pos
         faces = [f for f in mdl.faces if 3 <= len(f) <= 4]
         mesh = bpy.data.meshes.new(objname)
         mesh.from_pydata(verts, [], faces)
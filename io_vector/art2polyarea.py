@@ -147,17 +147,24 @@ def CombineSimplePolyAreas(subpolyareas):
     n = len(subpolyareas)
     areas = [geom.SignedArea(pa.poly, pa.points) for pa in subpolyareas]
     lens = list(map(lambda x: len(x.poly), subpolyareas))
+    boxes = [_PolyBox(pa) for pa in subpolyareas]
+    # only paths with overlapping bounding boxes can have vertices
+    # inside or on each other; other pairs classify as (0, 0)
     cls = dict()
-    for i in range(n):
-        for j in range(n):
-            cls[(i, j)] = _ClassifyPathPairs(subpolyareas[i], subpolyareas[j])
-    # calculate set cont where (i,j) is in cont if
-    # subpolyareas[i] contains subpolyareas[j]
-    cont = set()
-    for i in range(n):
-        for j in range(n):
-            if i != j and _Contains(i, j, areas, lens, cls):
-                cont.add((i, j))
+    for (i, j) in _OverlappingBoxPairs(boxes):
+        cls[(i, j)] = _ClassifyPathPairs(subpolyareas[i], subpolyareas[j],
+            boxes[i])
+        cls[(j, i)] = _ClassifyPathPairs(subpolyareas[j], subpolyareas[i],
+            boxes[j])
+    # calculate cont where j is in cont[i] if
+    # subpolyareas[i] contains subpolyareas[j],
+    # and contby where i is in contby[j] in that case
+    cont = [set() for i in range(n)]
+    contby = [set() for i in range(n)]
+    for (i, j) in cls:
+        if _Contains(i, j, areas, lens, cls):
+            cont[i].add(j)
+            contby[j].add(i)
     # now make real PolyAreas, with holes assigned
     polyareas = []
     assigned = set()
@@ -166,10 +173,10 @@ def CombineSimplePolyAreas(subpolyareas):
         for i in range(n):
             if i in assigned:
                 continue
-            if _IsBoundary(i, n, cont, assigned):
+            if _IsBoundary(i, contby, assigned):
                 # have a new boundary area, i
                 assigned.add(i)
-                holes = _GetHoles(i, n, cont, assigned)
+                holes = _GetHoles(i, cont, contby, assigned)
                 pa = subpolyareas[i]
                 for j in holes:
                     pa.AddHole(subpolyareas[j])
@@ -236,9 +243,9 @@ def _SubpathToPolyArea(subpath, options, points, color=(0.0, 0.0, 0.0)):
         # degenerate face, return an empty PolyArea
         return ans
     previndex = -1
+    newindices = ans.points.AddPoints(face)
     for i in range(0, len(face)):
-        point = face[i]
-        newindex = ans.points.AddPoint(point)
+        newindex = newindices[i]
         if newindex == previndex or \
             i == len(face) - 1 and newindex == ans.poly[0]:
             continue
@@ -620,20 +627,24 @@ def _Angle(u, v):
     return theta
 
 
-def _ClassifyPathPairs(a, b):
+def _ClassifyPathPairs(a, b, abox):
     """Classify vertices of path b with respect to path a.
 
     Args:
       a: geom.PolyArea - the test outer face (ignoring holes)
       b: geom.PolyArea - the test inner face (ignoring holes)
+      abox: (float, float, float, float) - _PolyBox(a)
     Returns:
       (int, int) - first is #verts of b inside a, second is #verts of b on a
     """
 
+    (xmin, ymin, xmax, ymax) = abox
     num_in = 0
     num_on = 0
     for v in b.poly:
         vp = b.points.pos[v]
+        if vp[0] < xmin or vp[0] > xmax or vp[1] < ymin or vp[1] > ymax:
+            continue  # outside a's bounding box, so outside a
         k = geom.PointInside(vp, a.poly, a.points)
         if k > 0:
             num_in += 1
@@ -642,6 +653,46 @@ def _ClassifyPathPairs(a, b):
     return (num_in, num_on)
 
 
+def _PolyBox(pa):
+    """Return bounding box of the poly of pa (ignoring holes).
+
+    Args:
+      pa: geom.PolyArea - with a non-empty poly
+    Returns:
+      (float, float, float, float) - (xmin, ymin, xmax, ymax)
+    """
+
+    pos = pa.points.pos
+    xs = [pos[v][0] for v in pa.poly]
+    ys = [pos[v][1] for v in pa.poly]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _OverlappingBoxPairs(boxes):
+    """Return the pairs of boxes that overlap (or touch).
+
+    Sweeps over the boxes in order of their left side, keeping
+    the boxes that the sweep line still crosses.
+
+    Args:
+      boxes: list of (float, float, float, float) - (xmin, ymin, xmax, ymax)
+    Returns:
+      list of (int, int) - (i, j) with i < j, for overlapping boxes i and j
+    """
+
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0])
+    pairs = []
+    active = []
+    for j in order:
+        (xmin, ymin, xmax, ymax) = boxes[j]
+        active = [i for i in active if boxes[i][2] >= xmin]
+        for i in active:
+            if boxes[i][1] <= ymax and ymin <= boxes[i][3]:
+                pairs.append((min(i, j), max(i, j)))
+        active.append(j)
+    return pairs
+
+
 def _Contains(i, j, areas, lens, cls):
     """Return True if path i contains majority of vertices of path j.
 
@@ -651,46 +702,44 @@ def _Contains(i, j, areas, lens, cls):
       areas: list of floats - areas of all the paths
       lens: list of ints - lenths of each of the paths
       cls: dict - maps pairs to result of _ClassifyPathPairs
+          (missing pairs classify as (0, 0))
     Returns:
       bool - True if path i contains at least 55% of j's vertices
     """
 
     if i == j:
         return False
-    (jinsidei, joni) = cls[(i, j)]
+    (jinsidei, joni) = cls.get((i, j), (0, 0))
     if jinsidei == 0 or joni == lens[j] or \
        float(jinsidei) / float(lens[j]) < 0.55:
         return False
     else:
-        (insidej, _) = cls[(j, i)]
+        (insidej, _) = cls.get((j, i), (0, 0))
         if float(insidej) / float(lens[i]) > 0.55:
             return areas[i] > areas[j]  # tie breaker
         else:
             return True
 
 
-def _IsBoundary(i, n, cont, assigned):
+def _IsBoundary(i, contby, assigned):
     """Is path i a boundary, given current assignment?
 
     Args:
       i: int - index of a path to test for boundary possiblity
-      n: int - total number of paths
-      cont: dict - maps path pairs (i,j) to _Contains(i,j,...) result
+      contby: list of set of int - contby[i] has the paths containing path i
       assigned: set  of int - which paths are already assigned
     Returns:
       bool - True if there is no unassigned j, j!=i, such that
              path j contains path i
     """
 
-    for j in range(0, n):
-        if j == i or j in assigned:
-            continue
-        if (j, i) in cont:
+    for j in contby[i]:
+        if j not in assigned:
             return False
     return True
 
 
-def _GetHoles(i, n, cont, assigned):
+def _GetHoles(i, cont, contby, assigned):
     """Find holes for path i: i.e., unassigned paths directly inside it.
 
     Directly inside means there is not some other unassigned path k
@@ -699,8 +748,8 @@ def _GetHoles(i, n, cont, assigned):
 
     Args:
       i: int - index of a boundary path
-      n: int - total number of paths
-      cont: dict - maps path pairs (i,j) to _Contains(i,j,...) result
+      cont: list of set of int - cont[i] has the paths contained in path i
+      contby: list of set of int - contby[i] has the paths containing path i
       assigned: set  of int - which paths are already assigned
     Returns:
       list of int - indices of paths that are islands
@@ -709,20 +758,19 @@ def _GetHoles(i, n, cont, assigned):
     """
 
     isls = []
-    for j in range(0, n):
+    for j in sorted(cont[i]):
         if j in assigned:
             continue   # catches i==j too, since i is assigned by now
-        if (i, j) in cont:
-            directly = True
-            for k in range(0, n):
-                if k == j or k in assigned:
-                    continue
-                if (i, k) in cont and (k, j) in cont:
-                    directly = False
-                    break
-            if directly:
-                isls.append(j)
-                assigned.add(j)
+        directly = True
+        for k in contby[j]:
+            if k == j or k in assigned:
+                continue
+            if k in cont[i]:
+                directly = False
+                break
+        if directly:
+            isls.append(j)
+            assigned.add(j)
     return isls
 
 
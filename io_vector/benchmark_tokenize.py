@@ -0,0 +1,385 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Benchmark of tokenizing large inputs, comparing the regular expression
+# tokenizers in io_vector.lexer with the character by character ones they
+# replaced (kept below as Old*).
+#
+# The inputs are synthetic: PDF/AI page contents and SVG path data for a
+# map-like drawing, with many polylines and curves.
+#
+# This isn't part of the add-on, run it from Blender so io_vector can be imported:
+#   blender --background --factory-startup --python io_vector/benchmark_tokenize.py -- --megabytes 1,4
+
+import sys, os
+import argparse
+import gc
+import random
+import re
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io_vector.geom
+import io_vector.svg
+import io_vector.vecfile
+from io_vector.vecfile import TNAME, TLITNAME, TSTRING, TNUM
+from io_vector.svg import (_ParseCoord, _ParseCoordPair, _SkipWS,
+    _SkipCommaSpace, _LineSeg, _Bezier3Seg, _ArcSeg, _re_float)
+
+
+def Coord(rng):
+    return "%.3f" % (1000.0 * rng.random())
+
+
+def PSContents(size, rng):
+    lines = ["%%EndSetup"]
+    n = 0
+    while n < size:
+        k = len(lines)
+        lines.append("%% shape %d" % len(lines))
+        lines.append("%s %s %s rg /GS0 gs" % (Coord(rng), Coord(rng),
+            Coord(rng)))
+        lines.append("%s %s m" % (Coord(rng), Coord(rng)))
+        for i in range(rng.randint(5, 50)):
+            if rng.random() < 0.3:
+                lines.append(" ".join([Coord(rng) for j in range(6)]) + " c")
+            else:
+                lines.append("%s %s l" % (Coord(rng), Coord(rng)))
+        lines.append("h f")
+        lines.append("[(label)] TJ <0a1b2c> Tj")
+        n += sum(len(line) + 1 for line in lines[k:])
+    return "\n".join(lines)
+
+
+def PathData(size, rng):
+    parts = []
+    n = 0
+    while n < size:
+        k = len(parts)
+        parts.append("M%s %s" % (Coord(rng), Coord(rng)))
+        for i in range(rng.randint(5, 50)):
+            r = rng.random()
+            if r < 0.4:
+                parts.append("l%s,%s %s,%s" % tuple(Coord(rng)
+                    for j in range(4)))
+            elif r < 0.7:
+                parts.append("C" + " ".join(Coord(rng) for j in range(6)))
+            elif r < 0.8:
+                parts.append("H%s V%s" % (Coord(rng), Coord(rng)))
+            elif r < 0.9:
+                parts.append("s%s,%s,%s,%s" % tuple(Coord(rng)
+                    for j in range(4)))
+            else:
+                parts.append("A%s %s 0 0 1 %s %s" % tuple(Coord(rng)
+                    for j in range(4)))
+        parts.append("z")
+        n += sum(len(part) + 1 for part in parts[k:])
+    return " ".join(parts)
+
+
+# Tokenizers as they were before io_vector.lexer
+
+_re_psname = re.compile(r"[^ \t\r\n()<>[\]{}/%]+")
+_re_psfloat = re.compile(r"(\+|-)?(([0-9]+\.[0-9]*)|(\.[0-9]+))")
+_re_psint = re.compile(r"(\+|-)?[0-9]+")
+_re_psstring = re.compile(r"\((\\.|.)*?\)")
+_re_pshexstring = re.compile(r"<.*>")
+
+
+def OldTokenizeAIEPS(s):
+    i = s.find("%%EndSetup")
+    if i == -1:
+        i = 0
+    else:
+        i += 10
+    ans = []
+    while i < len(s):
+        c = s[i]
+        if c.isspace():
+            i += 1
+        elif c == "%":
+            i = s.find("\n", i)
+            if i < 0:
+                i = len(s)
+                break
+            i += 1
+        elif c == "/":
+            m = _re_psname.match(s, i + 1)
+            if m:
+                ans.append((TLITNAME, m.group()))
+                i = m.end()
+            else:
+                i += 1
+        elif c == "(":
+            m = _re_psstring.match(s, i)
+            if m:
+                ans.append((TSTRING, s[m.start() + 1:m.end() - 1]))
+                i = m.end()
+            else:
+                i = len(s)
+        elif c == "<":
+            m = _re_pshexstring.match(s, i)
+            if m:
+                ans.append((TSTRING, s[m.start() + 1:m.end() - 1]))
+                i = m.end()
+            else:
+                i = len(s)  # unterminated hex string
+        elif c == "[" or c == "]" or c == "{" or c == "}":
+            ans.append((TNAME, c))
+            i += 1
+        elif c == "-" or c.isdigit():
+            m = _re_psfloat.match(s, i)
+            if m:
+                v = float(m.group())
+                ans.append((TNUM, v))
+                i = m.end()
+            else:
+                m = _re_psint.match(s, i)
+                if m:
+                    v = int(m.group())
+                    ans.append((TNUM, v))
+                    i = m.end()
+                else:
+                    i += 1
+        else:
+            m = _re_psname.match(s, i)
+            if m:
+                ans.append((TNAME, m.group()))
+                i = m.end()
+            else:
+                i += 1
+    return ans
+
+
+def OldParsePathData(s, gs):
+    subpaths = []
+    i = 0
+    initpt = (0.0, 0.0)
+    while i < len(s):
+        (i, subpath, initpt) = OldParseSubpath(s, i, initpt, gs)
+        if subpath:
+            if not subpath.Empty():
+                subpaths.append(subpath)
+        else:
+            break
+    return subpaths
+
+
+def OldParseSubpath(s, i, initpt, gs):
+    subpath = io_vector.geom.Subpath()
+    i = _SkipWS(s, i)
+    n = len(s)
+    if i >= n:
+        return (i, None, initpt)
+    if s[i] == 'M':
+        move_cmd = 'M'
+    elif s[i] == 'm':
+        move_cmd = 'm'
+    else:
+        return (i, None, initpt)
+    (i, cur) = _ParseCoordPair(s, _SkipWS(s, i + 1))
+    if not cur:
+        return (i, None, initpt)
+    prev_cmd = 'L'  # implicit cmd if coords follow directly
+    if move_cmd == 'm':
+        cur = io_vector.geom.VecAdd(initpt, cur)
+        prev_cmd = 'l'
+    while True:
+        implicit_cmd = False
+        if i < n:
+            cmd = s[i]
+            if OldPeekCoord(s, i):
+                cmd = prev_cmd
+                implicit_cmd = True
+        else:
+            cmd = None
+        if cmd == 'z' or cmd == 'Z' or cmd == None:
+            if cmd:
+                i = _SkipWS(s, i + 1)
+                subpath.closed = True
+            return (i, subpath, cur)
+        if not implicit_cmd:
+            i = _SkipWS(s, i + 1)
+        if cmd == 'l' or cmd == 'L':
+            (i, p1) = _ParseCoordPair(s, i)
+            if not p1:
+                break
+            if cmd == 'l':
+                p1 = io_vector.geom.VecAdd(cur, p1)
+            subpath.AddSegment(_LineSeg(cur, p1, gs))
+            cur = p1
+        elif cmd == 'c' or cmd == 'C':
+            (i, p1, p2, p3) = OldParseThreeCoordPairs(s, i)
+            if not p1:
+                break
+            if cmd == 'c':
+                p1 = io_vector.geom.VecAdd(cur, p1)
+                p2 = io_vector.geom.VecAdd(cur, p2)
+                p3 = io_vector.geom.VecAdd(cur, p3)
+            subpath.AddSegment(_Bezier3Seg(cur, p3, p1, p2, gs))
+            cur = p3
+        elif cmd == 'a' or cmd == 'A':
+            (i, p1, rad, rot, la, ccw) = OldParseArc(s, i)
+            if not p1:
+                break
+            if cmd == 'a':
+                p1 = io_vector.geom.VecAdd(cur, p1)
+            subpath.AddSegment(_ArcSeg(cur, p1, rad, rot, la, ccw, gs))
+            cur = p1
+        elif cmd == 'h' or cmd == 'H':
+            (i, x) = _ParseCoord(s, i)
+            if x is None:
+                break
+            if cmd == 'h':
+                x += cur[0]
+            subpath.AddSegment(_LineSeg(cur, (x, cur[1]), gs))
+            cur = (x, cur[1])
+        elif cmd == 'v' or cmd == 'V':
+            (i, y) = _ParseCoord(s, i)
+            if y is None:
+                break
+            if cmd == 'v':
+                y += cur[1]
+            subpath.AddSegment(_LineSeg(cur, (cur[0], y), gs))
+            cur = (cur[0], y)
+        elif cmd == 's' or cmd == 'S':
+            (i, p2, p3) = OldParseTwoCoordPairs(s, i)
+            if not p2:
+                break
+            if cmd == 's':
+                p2 = io_vector.geom.VecAdd(cur, p2)
+                p3 = io_vector.geom.VecAdd(cur, p3)
+            if len(subpath.segments) > 0 and subpath.segments[-1][0] == 'B':
+                p4 = subpath.segments[-1][4]
+            else:
+                p4 = cur
+            p1 = io_vector.geom.VecAdd(cur, io_vector.geom.VecSub(cur, p4))
+            subpath.AddSegment(_Bezier3Seg(cur, p3, p1, p2, gs))
+            cur = p3
+        else:
+            break
+        i = _SkipCommaSpace(s, i)
+        prev_cmd = cmd
+    return (i, None, cur)
+
+
+def OldPeekCoord(s, i):
+    i = _SkipCommaSpace(s, i)
+    m = _re_float.match(s, i)
+    return True if m else False
+
+
+def OldParseTwoCoordPairs(s, i):
+    (j, pair1) = _ParseCoordPair(s, i)
+    if pair1:
+        j = _SkipCommaSpace(s, j)
+        (j, pair2) = _ParseCoordPair(s, j)
+        if pair2:
+            return (j, pair1, pair2)
+    return (i, None, None)
+
+
+def OldParseThreeCoordPairs(s, i):
+    (j, pair1) = _ParseCoordPair(s, i)
+    if pair1:
+        j = _SkipCommaSpace(s, j)
+        (j, pair2) = _ParseCoordPair(s, j)
+        if pair2:
+            j = _SkipCommaSpace(s, j)
+            (j, pair3) = _ParseCoordPair(s, j)
+            if pair3:
+                return (j, pair1, pair2, pair3)
+    return (i, None, None, None)
+
+
+def OldParseArc(s, i):
+    (j, rad) = _ParseCoordPair(s, i)
+    if rad:
+        j = _SkipCommaSpace(s, j)
+        (j, rot) = _ParseCoord(s, j)
+        if rot is not None:
+            j = _SkipCommaSpace(s, j)
+            (j, f) = _ParseCoord(s, j)
+            if f is not None:
+                laf = (f != 0.0)
+                j = _SkipCommaSpace(s, j)
+                (j, f) = _ParseCoord(s, j)
+                if f is not None:
+                    ccw = (f != 0.0)
+                    j = _SkipCommaSpace(s, j)
+                    (j, pt) = _ParseCoordPair(s, j)
+                    if pt:
+                        return (j, pt, rad, rot, laf, ccw)
+    return (i, None, None, None, None, None)
+
+
+def Time(f, repeat):
+    # like timeit, keep garbage collection out of the measurement
+    best = None
+    gc.disable()
+    try:
+        for i in range(repeat):
+            time_start = time.perf_counter()
+            ans = f()
+            t = time.perf_counter() - time_start
+            if best is None or t < best:
+                best = t
+    finally:
+        gc.enable()
+    return ans, best
+
+
+def Benchmark(kind, size, repeat):
+    rng = random.Random(size)
+    if kind == "ps":
+        s = PSContents(size, rng)
+        old = lambda: OldTokenizeAIEPS(s)
+        new = lambda: io_vector.vecfile.TokenizeAIEPS(s)
+        same = lambda a, b: a == b
+    else:
+        s = PathData(size, rng)
+        gs = io_vector.svg._SState()
+        old = lambda: OldParsePathData(s, gs)
+        new = lambda: io_vector.svg._ParsePathData(s, gs)
+        same = lambda a, b: [(sp.segments, sp.closed) for sp in a] == \
+            [(sp.segments, sp.closed) for sp in b]
+
+    ans_old, time_old = Time(old, repeat)
+    ans_new, time_new = Time(new, repeat)
+
+    return len(s), len(ans_new), same(ans_old, ans_new), time_old, time_new
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description = "Benchmark of tokenizing large inputs")
+    parser.add_argument("--megabytes", default = "1,4", help = "Comma separated approximate sizes of the inputs")
+    parser.add_argument("--kinds", default = "ps,svg", help = "Comma separated kinds of input: ps (PDF/AI contents) or svg (path data)")
+    parser.add_argument("--repeat", type = int, default = 3, help = "Report the best time of this many runs")
+    args = parser.parse_args(argv)
+
+    print("%5s %10s %10s %5s %10s %10s %8s" % ("kind", "bytes", "results", "same", "old (s)", "new (s)", "speedup"))
+    for kind in args.kinds.split(","):
+        for mb in [float(value) for value in args.megabytes.split(",")]:
+            size, results, same, time_old, time_new = Benchmark(kind, int(mb * 1000000), args.repeat)
+            print("%5s %10i %10i %5s %10.3f %10.3f %8.1f" % (kind, size, results, same, time_old, time_new, time_old / time_new))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Benchmark of triangulation of large faces, over synthetic shapes.
+#
+# The shapes are like the outlines of imported art: a wobbly outline
+# (as a map), a star with long spikes, a staircase (many collinear and
+# axis aligned edges) and a disc with many small holes (as text).
+#
+# This isn't part of the add-on, run it from Blender so io_vector can be imported:
+#   blender --background --factory-startup --python io_vector/benchmark_triquad.py -- --vertices 1000,5000
+
+import sys, os
+import argparse
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io_vector.geom
+import io_vector.triquad
+
+
+def Polar(radii):
+    n = len(radii)
+    return [(r * math.cos(2.0 * math.pi * i / n),
+        r * math.sin(2.0 * math.pi * i / n)) for (i, r) in enumerate(radii)]
+
+
+def Wobbly(n, rng):
+    return (Polar([100.0 * (1.0 + 0.2 * rng.random()) for i in range(n)]), [])
+
+
+def Star(n, rng):
+    return (Polar([100.0 if i % 2 else 40.0 + 30.0 * rng.random()
+        for i in range(n)]), [])
+
+
+def Stairs(n, rng):
+    k = n // 2
+    face = [(0.0, 0.0)]
+    for i in range(k):
+        face.extend([(i + 1.0, float(i)), (i + 1.0, i + 1.0)])
+    face.append((0.0, float(k)))
+    return (face, [])
+
+
+def Holes(n, rng):
+    # each hole has 4 vertices, the outline has about as many as
+    # the holes along a diameter
+    m = max(int(math.sqrt(n / math.pi)) // 2, 1)
+    face = Polar([2.0 * m] * (8 * m))
+    holes = []
+    for ix in range(-m + 1, m):
+        for iy in range(-m + 1, m):
+            if ix * ix + iy * iy < m * m:
+                x = 1.5 * ix + 0.3 * rng.random()
+                y = 1.5 * iy + 0.3 * rng.random()
+                holes.append([(x, y), (x, y + 0.5), (x + 0.5, y + 0.5),
+                    (x + 0.5, y)])
+    return (face, holes)
+
+
+SHAPES = (("wobbly", Wobbly), ("star", Star), ("stairs", Stairs),
+    ("holes", Holes))
+
+
+def Benchmark(shape, n):
+    (face, holes) = shape(n, random.Random(n))
+    points = io_vector.geom.Points()
+    face = [points.AddPoint(p) for p in face]
+    holes = [[points.AddPoint(p) for p in hole] for hole in holes]
+
+    time_start = time.perf_counter()
+    tris = io_vector.triquad.TriangulateFaceWithHoles(face, holes, points)
+    time_tri = time.perf_counter() - time_start
+
+    return len(points.pos), len(holes), len(tris), time_tri
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description = "Benchmark of triangulation of large faces")
+    parser.add_argument("--vertices", default = "1000,5000", help = "Comma separated approximate number of vertices of each shape")
+    parser.add_argument("--shapes", default = ",".join([name for (name, _) in SHAPES]), help = "Comma separated shapes to triangulate")
+    args = parser.parse_args(argv)
+
+    shapes = dict(SHAPES)
+    print("%8s %10s %8s %10s %12s" % ("shape", "vertices", "holes", "triangles", "time (s)"))
+    for name in args.shapes.split(","):
+        for n in [int(value) for value in args.vertices.split(",")]:
+            vertices, holes, triangles, time_tri = Benchmark(shapes[name], n)
+            print("%8s %10i %8i %10i %12.3f" % (name, vertices, holes, triangles, time_tri))
+
+if __name__ == "__main__":
+    main()
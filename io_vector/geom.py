@@ -23,6 +23,8 @@ Also, vector file representation (Art).
 __author__ = "howard.trickey@gmail.com"
 
 import math
+import struct
+import numpy
 
 # distances less than about DISTTOL will be considered
 # essentially zero
@@ -39,11 +41,18 @@ class Points(object):
     In order to efficiently find duplicates, we quantize the points
     to triples of ints and map from quantized triples to vertex
     index.
+    The quantized triples are packed into bytes, which take less
+    memory as dict keys than tuples of ints, and can be made for
+    many points at once with numpy.
+    The coordinates are kept as a list of tuples, since the
+    triangulation and offset code index them one at a time;
+    the batch operations (AddPoints, AddZCoord, Transform)
+    work on numpy arrays of a block of points at a time.
 
     Attributes:
       pos: list of tuple of float - coordinates indexed by
           vertex number
-      invmap: dict of (int, int, int) to int - quantized coordinates
+      invmap: dict of bytes to int - packed quantized coordinates
           to vertex number map
     """
 
@@ -65,6 +74,18 @@ class Points(object):
 
         return tuple([int(round(v * INVDISTTOL)) for v in p])
 
+    @staticmethod
+    def Key(p):
+        """Return the key of p in invmap: its packed quantized coordinates.
+
+        Args:
+          p: tuple of float
+        Returns:
+          bytes - Quantize(p) as native int64s
+        """
+
+        return _KeyStruct(len(p)).pack(*Points.Quantize(p))
+
     def AddPoint(self, p):
         """Add point p to the Points set and return vertex number.
 
@@ -77,7 +98,7 @@ class Points(object):
           int - the vertex number of added (or existing) point
         """
 
-        qp = Points.Quantize(p)
+        qp = Points.Key(p)
         if qp in self.invmap:
             return self.invmap[qp]
         else:
@@ -86,21 +107,38 @@ class Points(object):
             return len(self.pos) - 1
 
     def AddPoints(self, points):
-        """Add another set of points to this set.
+        """Add another set of points, or a list of points, to this set.
 
         We need to return a mapping from indices
         in the argument points space into indices
         in this point space.
+        The result is the same as calling AddPoint on each point
+        in turn.
 
         Args:
-          points: Points - to union into this set
+          points: Points or list of tuple of float - to union into this set
+              (the tuples must all have the same dimension)
         Returns:
           list of int: maps added indices to new ones
         """
 
-        vmap = [0] * len(points.pos)
-        for i in range(len(points.pos)):
-            vmap[i] = self.AddPoint(points.pos[i])
+        if isinstance(points, Points):
+            points = points.pos
+        n = len(points)
+        if n < _MINBATCH:
+            return [self.AddPoint(p) for p in points]
+        vmap = [0] * n
+        invmap = self.invmap
+        pos = self.pos
+        for start in range(0, n, _BLOCK):
+            end = min(start + _BLOCK, n)
+            keys = _Keys(numpy.array(points[start:end], dtype=float))
+            for (i, qp) in enumerate(keys, start):
+                v = invmap.get(qp)
+                if v is None:
+                    v = invmap[qp] = len(pos)
+                    pos.append(points[i])
+                vmap[i] = v
         return vmap
 
     def AddZCoord(self, z):
@@ -115,12 +153,41 @@ class Points(object):
         """
 
         assert(len(self.pos) == 0 or len(self.pos[0]) == 2)
-        newinvmap = dict()
-        for i, (x, y) in enumerate(self.pos):
-            newp = (x, y, z)
-            self.pos[i] = newp
-            newinvmap[self.Quantize(newp)] = i
-        self.invmap = newinvmap
+        self._Update(lambda a: numpy.column_stack(
+            (a, numpy.full(len(a), z, dtype=float))))
+
+    def Transform(self, scale, translate=None):
+        """Change this in place to have each point p be scale*(p+translate).
+
+        Args:
+          scale: float - scale factor
+          translate: tuple of float - like a point, or None for no translation
+        """
+
+        if translate is None:
+            self._Update(lambda a: scale * a)
+        else:
+            t = numpy.array(translate, dtype=float)
+            self._Update(lambda a: scale * (a + t))
+
+    def _Update(self, f):
+        """Replace the points p by f(p), and rebuild invmap.
+
+        Works on arrays of a block of points at a time,
+        so that there is never a second copy of all the points.
+
+        Args:
+          f: function - maps n x dim array of points to n x dim' array
+        """
+
+        pos = self.pos
+        invmap = self.invmap
+        invmap.clear()
+        for start in range(0, len(pos), _BLOCK):
+            end = min(start + _BLOCK, len(pos))
+            a = f(numpy.array(pos[start:end], dtype=float))
+            pos[start:end] = map(tuple, a.tolist())
+            invmap.update(zip(_Keys(a), range(start, end)))
 
     def AddToZCoord(self, i, delta):
         """Change the z-coordinate of point with index i to add delta.
@@ -136,6 +203,39 @@ class Points(object):
         self.pos[i] = (x, y, z + delta)
 
 
+# number of points in each block of Points.AddPoints and Points._Update
+_BLOCK = 1 << 16
+
+# fewer points than this are added by Points.AddPoints one at a time
+_MINBATCH = 32
+
+_keystructs = dict()
+
+
+def _KeyStruct(dim):
+    """Return the struct.Struct packing dim int64s in native byte order,
+    as numpy does."""
+
+    ks = _keystructs.get(dim)
+    if ks is None:
+        ks = _keystructs[dim] = struct.Struct("=%dq" % dim)
+    return ks
+
+
+def _Keys(a):
+    """Like Points.Key, for an n x dim array of points.
+
+    Args:
+      a: numpy array of float
+    Returns:
+      list of bytes
+    """
+
+    # numpy.round rounds halves to even, like round
+    q = numpy.round(a * INVDISTTOL).astype(numpy.int64)
+    return q.view("V%d" % (8 * q.shape[1])).ravel().tolist()
+
+
 class PolyArea(object):
     """Contains a Polygonal Area (polygon with possible holes).
 
@@ -170,8 +270,11 @@ class PolyArea(object):
           holepa: PolyArea
         """
 
-        vmap = self.points.AddPoints(holepa.points)
-        holepoly = [vmap[i] for i in holepa.poly]
+        if holepa.points is self.points:
+            holepoly = holepa.poly[:]
+        else:
+            vmap = self.points.AddPoints(holepa.points)
+            holepoly = [vmap[i] for i in holepa.poly]
         holepoly.reverse()
         self.holes.append(holepoly)
 
@@ -229,10 +332,8 @@ class PolyAreas(object):
         translate = [-0.5 * (maxv[i] + minv[i]) for i in range(2)]
         dim = len(self.points.pos[0])
         if dim == 3:
-            translate.append([0.0])
-        for v in range(len(self.points.pos)):
-            self.points.pos[v] = tuple([scale * (self.points.pos[v][i] + \
-                translate[i]) for i in range(dim)])
+            translate.append(0.0)
+        self.points.Transform(scale, translate)
 
     def bounds(self):
         """Find bounding box of polyareas in xy.
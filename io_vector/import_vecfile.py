@@ -44,6 +44,8 @@ class ImportOptions(object):
       bevel_amount: float - if > 0, inset polygons by this amount
       bevel_pitch: float - if > 0, angle in radians of bevel
       cap_back: bool - should we cap the back, if extruding?
+      page: int - index of page to import from multi-page (PDF) files,
+        starting at 0
     """
 
     def __init__(self):
@@ -54,6 +56,7 @@ class ImportOptions(object):
         self.bevel_amount = 0.0
         self.bevel_pitch = 45.0 * math.pi / 180.0
         self.cap_back = False
+        self.page = 0
 
 
 def ReadVecFileToModel(fname, options):
@@ -67,7 +70,7 @@ def ReadVecFileToModel(fname, options):
         The string will be errors and warnings.
     """
 
-    art = vecfile.ParseVecFile(fname)
+    art = vecfile.ParseVecFile(fname, options.page)
     if art is None:
         return (None, "Problem reading file or unhandled type")
     return ArtToModel(art, options)
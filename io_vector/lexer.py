@@ -0,0 +1,163 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""Tokenizers shared by the vector file readers.
+
+Each tokenizer is a generator driven by a single compiled regular
+expression, so that scanning the text is done by the re module
+rather than character by character in Python.
+"""
+
+__author__ = "howard.trickey@gmail.com"
+
+import re
+
+WARN = True   # print Warnings about strange things?
+
+# Token types
+
+TNAME = 0
+TLITNAME = 1
+TSTRING = 2
+TNUM = 3
+
+# One PostScript token, after any white space and comments: a number,
+# name, literal name, string, or hex string; else a single character,
+# which is a delimiter or the start of something that is an error.
+# No token can include a newline.
+_re_pstoken = re.compile(r"""
+    \s*(?:%[^\n]*(?:\n|\Z)\s*)*
+    (
+      -?[0-9]+\.[0-9]*|-\.[0-9]+|-?[0-9]+
+    | [^ \t\r\n()<>\[\]{}/%-][^ \t\r\n()<>\[\]{}/%]*
+    | /[^ \t\r\n()<>\[\]{}/%]+
+    | \((?:\\.|.)*?\)
+    | <.*>
+    | [^\s%]
+    | \Z
+    )""", re.VERBOSE)
+
+_PSNUMSTART = frozenset("0123456789-")
+_PSSPECIALSTART = frozenset(["", "/", "(", "<", "[", "]", "{", "}", ")", ">"])
+
+# Amount of text to tokenize at a time
+_CHUNK = 1 << 16
+
+# Numbers in SVG attributes
+_re_number = re.compile(r"(?:\+|-)?(?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+)")
+
+# A comma with no number before or after it
+_re_emptyfield = re.compile(r"^\s*,|,\s*,|,\s*$")
+
+# One SVG path command letter and the text of its arguments
+_re_pathcommand = re.compile(r"\s*([A-Za-z]?)([^A-Za-z]*)")
+
+
+def PSTokens(s, i=0):
+    """Generate the tokens of PostScript-like string s, from s[i] on.
+
+    The string is tokenized a chunk of lines at a time.
+
+    Args:
+      s: string to tokenize
+      i: int - index in s to start tokenizing
+    Yields:
+      (Txxx, val) where Txxx is a token type constant
+    """
+
+    n = len(s)
+    while i < n:
+        j = s.find("\n", i + _CHUNK)
+        if j == -1:
+            j = n
+        for tok in _re_pstoken.findall(s, i, j):
+            c = tok[:1]
+            if c in _PSNUMSTART:
+                if "." in tok:
+                    yield (TNUM, float(tok))
+                elif tok != "-":
+                    yield (TNUM, int(tok))
+                elif WARN:
+                    print("number parse problem")
+            elif c not in _PSSPECIALSTART:
+                yield (TNAME, tok)
+            elif c == "/":
+                if len(tok) > 1:
+                    yield (TLITNAME, tok[1:])
+                elif WARN:
+                    print("empty name")
+            elif c == "(" or c == "<":
+                if len(tok) == 1:
+                    if WARN:
+                        print("unterminated string")
+                    return
+                yield (TSTRING, tok[1:-1])
+            elif c == ")" or c == ">":
+                if WARN:
+                    print("tokenize error at", tok)
+            elif c:
+                yield (TNAME, tok)
+        i = j
+
+
+def PathCommands(s):
+    """Generate the commands of SVG path data (a 'd' attribute).
+
+    Args:
+      s: string - the path data
+    Yields:
+      (string, list of float) - a command letter and all the numbers
+        that follow it, up to the next command letter.
+        The letter is '' for numbers that come before any command.
+        If anything but numbers, white space and commas between
+        numbers follows a command, the list is None, and nothing more is generated.
+    """
+
+    for m in _re_pathcommand.finditer(s):
+        (cmd, args) = m.groups()
+        if not cmd and not args:
+            return
+        nums = Numbers(args)
+        yield (cmd, nums)
+        if nums is None:
+            return
+
+
+def Numbers(s):
+    """Return the numbers in s, which may be separated by white space
+    or a comma with optional white space around it.
+
+    Args:
+      s: string
+    Returns:
+      list of float, or None if there is anything else in s
+      (including a comma not between two numbers)
+    """
+
+    if "," in s and _re_emptyfield.search(s):
+        return None
+    # float() also allows '_' between digits
+    if "_" not in s:
+        try:
+            return [float(x) for x in s.replace(",", " ").split()]
+        except ValueError:
+            pass
+    # numbers can also be run together, as in "1-2" or "1.5.5"
+    if _re_number.sub("", s).replace(",", " ").strip():
+        return None
+    return list(map(float, _re_number.findall(s)))
@@ -46,6 +46,14 @@ class Spoke(object):
       face: int - index of face containing this Spoke, in Offset
       index: int - index of this Spoke in its face
       destindex: int - index of Spoke dest in its face
+      outer: Spoke or None - the spoke of the containing Offset that
+          this one continues (same direction and neighbors), if any
+      edgecands: list of Spoke or None - if not None, the only spokes
+          whose advancing edges can give this spoke its next edge event
+      nearcands: list of Spoke - the spokes in edgecands whose advancing
+          edges continue ones in the outer spoke's nearedges
+      nearedges: list of Spoke or None - the spokes whose advancing
+          edges gave this spoke its earliest edge events
     """
 
     def __init__(self, v, prev, next, face, index, points):
@@ -71,6 +79,10 @@ class Spoke(object):
         self.face = face
         self.index = index
         self.destindex = -1
+        self.outer = None
+        self.edgecands = None
+        self.nearcands = []
+        self.nearedges = None
         vmap = points.pos
         vp = vmap[v]
         prevp = vmap[prev]
@@ -403,26 +415,159 @@ class Offset(object):
         # Now find edge events, if this is a reflex vertex
         if spoke.is_reflex:
             prev_spoke = facespokes[(spoke.index - 1) % n]
-            for f in self.facespokes:
-                for other in f:
-                    if other == spoke or other == prev_spoke:
-                        continue
-                    ev = spoke.EdgeEvent(other, self)
-                    if ev:
-                        if ev.time < bestt - TOL:
-                            beste = []
-                            bestv = []
-                            bestt = ev.time
-                        if abs(ev.time - bestt) < TOL:
-                            beste.append(ev)
+            evs = None
+            if spoke.edgecands is not None:
+                evs = self._EdgeEvents(spoke, prev_spoke, spoke.edgecands)
+                # an edge that was hit in the outer Offset may be missed
+                # now if it was hit (nearly) at one of its ends;
+                # then other edges could be hit first, so check all
+                hit = set([ev.other for ev in evs])
+                for other in spoke.nearcands:
+                    if other not in hit:
+                        evs = None
+                        break
+            if evs is None:
+                evs = self._EdgeEvents(spoke, prev_spoke,
+                    [other for f in self.facespokes for other in f])
+            # remember which edges were (nearly) first to be hit,
+            # so that inner Offsets need only check those again
+            # (see InheritEdgeEvents)
+            if evs:
+                mint = min([ev.time for ev in evs])
+                spoke.nearedges = [ev.other for ev in evs \
+                    if ev.time <= mint + 2.0 * TOL]
+            else:
+                spoke.nearedges = []
+            for ev in evs:
+                if ev.time < bestt - TOL:
+                    beste = []
+                    bestv = []
+                    bestt = ev.time
+                if abs(ev.time - bestt) < TOL:
+                    beste.append(ev)
         return (bestt, bestv, beste)
 
+    def _EdgeEvents(self, spoke, prev_spoke, others):
+        """Return the edge events of spoke with the advancing edges
+        starting at the spokes in others (except spoke and prev_spoke)."""
+
+        evs = []
+        for other in others:
+            if other == spoke or other == prev_spoke:
+                continue
+            ev = spoke.EdgeEvent(other, self)
+            if ev:
+                evs.append(ev)
+        return evs
+
+    def InheritEdgeEvents(self, outer):
+        """Use the edge events found for outer to limit the ones to check.
+
+        This Offset was made from the faces at the spoke ends of outer
+        (its containing Offset).
+        A spoke whose vertex and neighbor vertices are the ends of
+        successive spokes of outer continues that outer spoke:
+        it has the same direction and speed.
+        An advancing edge between two such spokes, that were successive
+        in outer too, continues the edge of outer.
+        The edge events between continuing spokes and edges happen at
+        the same places as before, so if the edges that gave a reflex
+        spoke its earliest edge events in outer are all continued,
+        the earliest edge events for the spoke can only be with those
+        or with the advancing edges that are new in this Offset.
+
+        Args:
+          outer: Offset - the Offset this one is inside of
+        Side Effect:
+          Sets the outer, edgecands and nearcands attributes of the spokes
+        """
+
+        # index spokes of outer by the ends of them and their neighbors
+        # (None if ambiguous)
+        byends = dict()
+        nextouter = dict()
+        for f in outer.facespokes:
+            n = len(f)
+            for i, s in enumerate(f):
+                key = (f[(i - 1) % n].dest, s.dest, f[(i + 1) % n].dest)
+                byends[key] = None if key in byends else s
+                nextouter[s] = f[(i + 1) % n]
+        inner = dict()
+        for f in self.facespokes:
+            n = len(f)
+            for i, s in enumerate(f):
+                if s.speed >= 1e7:
+                    # degenerate angle, the direction is arbitrary
+                    continue
+                key = (f[(i - 1) % n].origin, s.origin, f[(i + 1) % n].origin)
+                s.outer = byends.get(key)
+                if s.outer is not None:
+                    inner[s.outer] = None if s.outer in inner else s
+        # the spokes at the start of new advancing edges
+        newedges = []
+        for f in self.facespokes:
+            n = len(f)
+            for i, s in enumerate(f):
+                snext = f[(i + 1) % n]
+                if s.outer is None or snext.outer is None or \
+                        nextouter[s.outer] != snext.outer or \
+                        inner[s.outer] is None or \
+                        inner[snext.outer] is None:
+                    newedges.append(s)
+        isnew = set(newedges)
+        for f in self.facespokes:
+            n = len(f)
+            for s in f:
+                if not s.is_reflex or s.outer is None or \
+                        s.outer.nearedges is None:
+                    continue
+                # the edges ending at the previous spoke and starting
+                # at the next one can be hit at the ends they share
+                # with those spokes, where small changes decide if
+                # they are hit at all, so always check them
+                cands = set(newedges)
+                cands.add(f[(s.index - 2) % n])
+                cands.add(f[(s.index + 1) % n])
+                near = []
+                for o in s.outer.nearedges:
+                    other = inner.get(o)
+                    if other is None or other in isnew:
+                        # that edge changed, so need to check all edges
+                        cands = None
+                        break
+                    near.append(other)
+                if cands is not None:
+                    cands.update(near)
+                    # check in the same order as a scan of all spokes would
+                    s.edgecands = sorted(cands,
+                        key=lambda other: (other.face, other.index))
+                    s.nearcands = near
+
     def Build(self, target=2e100):
         """Build the complete Offset structure or up until target time.
 
         Find the next event(s), makes the appropriate inner Offsets
-        that are inside this one, and calls Build on those Offsets to continue
-        the process until only a single point is left or time reaches target.
+        that are inside this one, and continues with those Offsets
+        until only a single point is left or time reaches target.
+        There is a level of inner Offsets for every event, so they
+        are built (depth first) from a stack instead of recursively.
+        """
+
+        stack = [(self, target)]
+        while stack:
+            (off, offtarget) = stack.pop()
+            nexttarget = off._BuildStep(offtarget)
+            if nexttarget > TOL:
+                for o in reversed(off.inneroffsets):
+                    o.InheritEdgeEvents(off)
+                    stack.append((o, nexttarget))
+
+    def _BuildStep(self, target):
+        """Find the next event(s) and make the inner Offsets for them.
+
+        Returns:
+          float - the target time for the inner Offsets, or 0.0 if
+              no inner Offsets were made
         """
 
         bestt = 1e100
@@ -439,10 +584,10 @@ class Offset(object):
         if bestt == 1e100:
             # could happen if polygon is oriented wrong
             # or in other special cases
-            return
+            return 0.0
         if abs(bestt) < TOL:
             # seems to be in a loop, so quit
-            return
+            return 0.0
         self.endtime = bestt
         (ve, ee) = bestevs
         newfaces = []
@@ -460,7 +605,7 @@ class Offset(object):
             # First make the new faces (handles all vertex events)
             newfaces = self.MakeNewFaces(self.endtime)
             # Only do one edge event (handle other simultaneous edge
-            # events in subsequent recursive Build calls)
+            # events in the inner Offsets)
             if newfaces:
                 splitjoin = self.SplitJoinFaces(newfaces, ee[0])
         nexttarget = target - self.endtime
@@ -516,9 +661,8 @@ class Offset(object):
             self.inneroffsets = [Offset(pa, newt, self.vspeed)]
             if pa2:
                 self.inneroffsets.append(Offset(pa2, newt, self.vspeed))
-            if nexttarget > TOL:
-                for o in self.inneroffsets:
-                    o.Build(nexttarget)
+            return nexttarget
+        return 0.0
 
     def FaceAtSpokeEnds(self, f, t):
         """Return a new face that is at the spoke ends of face f at time t.
@@ -713,10 +857,15 @@ class Offset(object):
         return max_amount
 
     def _MaxTime(self):
-        if self.inneroffsets:
-            return max([o._MaxTime() for o in self.inneroffsets])
-        else:
-            return self.timesofar + self.endtime
+        ans = 0.0
+        ostack = [self]
+        while ostack:
+            o = ostack.pop()
+            if o.inneroffsets:
+                ostack.extend(o.inneroffsets)
+            else:
+                ans = max(ans, o.timesofar + o.endtime)
+        return ans
 
 
 def _AddInnerAreas(off, polyareas):
@@ -732,13 +881,16 @@ def _AddInnerAreas(off, polyareas):
       added to polyareas.
     """
 
-    if off.inneroffsets:
-        for o in off.inneroffsets:
-            _AddInnerAreas(o, polyareas)
-    else:
+    # depth first, without recursion (there can be very many levels)
+    ostack = [off]
+    while ostack:
+        o = ostack.pop()
+        if o.inneroffsets:
+            ostack.extend(reversed(o.inneroffsets))
+            continue
         newpa = geom.PolyArea(polyareas.points)
-        for i, f in enumerate(off.facespokes):
-            newface = off.FaceAtSpokeEnds(f, off.endtime)
+        for i, f in enumerate(o.facespokes):
+            newface = o.FaceAtSpokeEnds(f, o.endtime)
             area = abs(geom.SignedArea(newface, polyareas.points))
             if area < AREATOL:
                 if i == 0:
@@ -747,7 +899,7 @@ def _AddInnerAreas(off, polyareas):
                     continue
             if i == 0:
                 newpa.poly = newface
-                newpa.data = off.polyarea.data
+                newpa.data = o.polyarea.data
             else:
                 newpa.holes.append(newface)
         if newpa.poly:
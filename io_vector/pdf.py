@@ -21,6 +21,8 @@
 
 __author__ = "howard.trickey@gmail.com"
 
+import codecs
+import mmap
 import re
 import sys
 try:
@@ -424,14 +426,116 @@ def GetPDFDict(s, i):
 XUNCOMPRESSED = 1
 XCOMPRESSED = 2
 
+
+class PDFCrossrefs(object):
+    """Cross references of a PDF file, read lazily.
+
+    Acts like a read-only dict mapping (obj_number, gen_number) to a
+    crossref triple, but only the subsection headers of the xref tables
+    are parsed up front: an entry is read from the file (or from the
+    decoded xref stream) the first time it is looked up.
+    Also caches the objects resolved through it, and the parsed
+    object streams, so that each is parsed at most once.
+
+    Attributes:
+      s: bytes or mmap - contents of PDF file
+      sections: list of (idstart, nentries, buf, i, widths) - xref
+        subsections, newest first; entries for objects idstart ..
+        idstart + nentries - 1 are at offset i of buf, 20 bytes each
+        if widths is None (xref table), else widths gives the byte
+        lengths of the three fields of an xref stream entry
+      entries: dict - the entries that have been read so far
+      objects: dict - maps (obj_number, gen_number) to resolved object
+      objstms: dict - maps object stream number to (contents, first,
+        offsets) for object streams already decoded, or None if
+        the stream couldn't be decoded
+    """
+
+    def __init__(self, s):
+        self.s = s
+        self.sections = []
+        self.entries = {}
+        self.objects = {}
+        self.objstms = {}
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        ans = self.get(key)
+        if ans is None:
+            raise KeyError(key)
+        return ans
+
+    def __bool__(self):
+        return len(self.sections) > 0
+
+    __nonzero__ = __bool__
+
+    def get(self, key, default=None):
+        """Return crossref triple for key, or default if there is none."""
+
+        if key in self.entries:
+            return self.entries[key]
+        objnum = key[0]
+        for section in self.sections:
+            (idstart, nentries, _, _, _) = section
+            if idstart <= objnum < idstart + nentries:
+                entry = self._ReadEntry(objnum, section)
+                if entry is not None and entry[0] == key:
+                    self.entries[key] = entry[1]
+                    return entry[1]
+        return default
+
+    def _ReadEntry(self, objnum, section):
+        """Read the entry for objnum from section.
+
+        Returns:
+          ((obj_number, gen_number), crossref triple), or None
+          if the object is free
+        """
+
+        (idstart, _, buf, i, widths) = section
+        if widths is None:
+            i += 20 * (objnum - idstart)
+            if buf[i + 17:i + 18] != b'n':
+                return None
+            gen = int(buf[i + 11:i + 16])
+            return ((objnum, gen), (XUNCOMPRESSED, int(buf[i:i + 10]), gen))
+        (n1, n2, n3) = widths
+        k = i + (n1 + n2 + n3) * (objnum - idstart)
+        if k + n1 + n2 + n3 > len(buf):
+            return None
+        if n1 == 0:
+            f1 = 1
+        else:
+            (f1, k) = GetPDFMultiByteInt(buf, k, n1)
+        (f2, k) = GetPDFMultiByteInt(buf, k, n2)
+        if n3 == 0:
+            f3 = 0
+        else:
+            (f3, k) = GetPDFMultiByteInt(buf, k, n3)
+        if f1 == 1:
+            return ((objnum, f3), (XUNCOMPRESSED, f2, f3))
+        elif f1 == 2:
+            return ((objnum, 0), (XCOMPRESSED, f2, f3))
+        elif f1 != 0:
+            if WARN:
+                print('unexpected type in XRef:', f1)
+        return None
+
+
 def GetPDFTrailerAndCrossrefs(s):
     """Find and return the (last) PDF trailer dictionary and cross reference
     dict.
 
+    Follows the chain of Prev links back through incremental updates,
+    but only reads the xref subsection headers (see PDFCrossrefs).
+
     Args:
-      s: PDF file (as bytes)
+      s: PDF file (as bytes or mmap)
     Returns:
-      (trailer dict, crossref dict)
+      (trailer dict, PDFCrossrefs)
     """
 
     startxrefi = s.rfind(b'startxref')
@@ -449,116 +553,104 @@ def GetPDFTrailerAndCrossrefs(s):
         if WARN:
             print('cannot find crossref index')
         return (None, None)
-    crossrefs = {}
-    d = None
+    crossrefs = PDFCrossrefs(s)
     last_trailerdict = None
-    if s[crossrefi:crossrefi+4] != b'xref':
-        # Could be Crossref stream
-        (obj, j) = GetPDFObject(s, crossrefi)
-        if PDFObjHasType(obj, OINDIRECTDEF):
-            strobj = obj[1][2]
-            if PDFObjHasType(strobj, OSTREAM):
-                strxrefs = GetPDFStreamContents(strobj, s, {}, False)
-                if strxrefs is None:
-                    if WARN:
-                        print('cannot decode crossref stream')
-                    return (None, {})
-                d = strobj[1][0]
-                w = GetTypedValFromDictEntry(d, 'W', OARRAY, s, {})
-                ty = GetTypedValFromDictEntry(d, 'Type', ONAME, s, {})
-                sz = GetTypedValFromDictEntry(d, 'Size', ONUM, s, {})
-                index = GetTypedValFromDictEntry(d, 'Index', OARRAY, s, {})
-                prev = GetTypedValFromDictEntry(d, 'Prev', ONUM, s, {})
-                if ty != 'XRef' or sz is None or w is None:
-                    if WARN:
-                        print('something wrong with XRef stream dictionary')
-                    return (None, {})
-                n1 = w[0][1]
-                n2 = w[1][1]
-                n3 = w[2][1]
-                ntot = n1 + n2 + n3
-                firstobjnum = 0
-                numobjs = sz
-                if index is not None:
-                    firstobjnum = index[0][1]
-                    numobjs = index[1][1]
-                k = 0
-                objnum = firstobjnum
-                while k + ntot <= len(strxrefs):
-                    if n1 == 0:
-                        f1 = 1
-                    else:
-                        (f1, k) = GetPDFMultiByteInt(strxrefs, k, n1)
-                    (f2, k) = GetPDFMultiByteInt(strxrefs, k, n2)
-                    if n3 == 0:
-                        f3 = 0
-                    else:
-                        (f3, k) = GetPDFMultiByteInt(strxrefs, k, n3)
-                    if f1 == 1:
-                        crossrefs[(objnum, f3)] = (XUNCOMPRESSED, f2, f3)
-                    elif f1 == 2:
-                        crossrefs[(objnum, 0)] = (XCOMPRESSED, f2, f3)
-                    elif f1 != 0:
-                        if WARN:
-                            print('unexpected type in XRef:', f1)
-                        return (None, {})
-                    objnum += 1
-            else:
-                if WARN:
-                    print("no xref and object there is not stream")
-                print (obj)
+    seen = set()
+    while 0 < crossrefi < len(s) and crossrefi not in seen:
+        seen.add(crossrefi)
+        if s[crossrefi:crossrefi + 4] == b'xref':
+            trailerdict = _GetPDFXrefTable(s, crossrefi, crossrefs)
         else:
-            if WARN:
-                print("no xref and not indirect def")
-            print(obj)
-        return (d, crossrefs)
-    while crossrefi > 0:
-        i = crossrefi
-        if s[i:i + 4] != b'xref':
-            if WARN:
-                print('cannot find xref')
+            trailerdict = _GetPDFXrefStream(s, crossrefi, crossrefs)
+        if trailerdict is None:
             break
-        m = _re_pseol.match(s, i + 4)
-        if m:
-            i = m.end()
-        while i < startxrefi:
-            # Get start of subsection
-            (v, i) = GetPDFTwoInts(s, i)
-            if v is None:
-                break
-            (idstart, nentries) = v
-            m = _re_pswhitespaceandcomments.match(s, i)
-            if m:
-                i = m.end()
-            for k in range(idstart, idstart + nentries):
-                byteoffset = int(s[i:i + 10])
-                gen = int(s[i + 11:i + 16])
-                inuse = (ordat(s, i + 17) == ord('n'))
-                if inuse:
-                    crossrefs[(k, gen)] = (XUNCOMPRESSED, byteoffset, gen)
-                i += 20
-        # Should be at 'trailer' now
-        (w, i) = GetPDFKeyword(s, i)
-        if w != b'trailer':
-            if WARN:
-                print('cannot find trailer')
-            break
-        (trailero, i) = GetPDFObject(s, i)
-        if trailero is None or trailero[0] != ODICT:
-            if WARN:
-                print('cannot find trailer dict')
-                break
-        trailerdict = trailero[1]
         if last_trailerdict is None:
             last_trailerdict = trailerdict
-        if 'Prev' in trailerdict:
-            crossrefi = GetTypedValFromDictEntry(trailerdict, 'Prev', ONUM, s, crossrefs)
-            if crossrefi is None:
-                crossrefi = -1
-        else:
+        crossrefi = GetTypedValFromDictEntry(trailerdict, 'Prev', ONUM, s,
+            crossrefs)
+        if crossrefi is None:
             crossrefi = -1
     return (last_trailerdict, crossrefs)
 
+
+def _GetPDFXrefTable(s, i, crossrefs):
+    """Add the subsections of the xref table at s[i] to crossrefs.
+
+    Returns:
+      dict - the trailer dictionary following the table, or None
+    """
+
+    m = _re_pseol.match(s, i + 4)
+    if m:
+        i = m.end()
+    while i < len(s):
+        # Get start of subsection
+        (v, i) = GetPDFTwoInts(s, i)
+        if v is None:
+            break
+        (idstart, nentries) = v
+        m = _re_pswhitespaceandcomments.match(s, i)
+        if m:
+            i = m.end()
+        crossrefs.sections.append((idstart, nentries, s, i, None))
+        i += 20 * nentries
+    # Should be at 'trailer' now
+    (w, i) = GetPDFKeyword(s, i)
+    if w != b'trailer':
+        if WARN:
+            print('cannot find trailer')
+        return None
+    (trailero, i) = GetPDFObject(s, i)
+    if not PDFObjHasType(trailero, ODICT):
+        if WARN:
+            print('cannot find trailer dict')
+        return None
+    return trailero[1]
+
+
+def _GetPDFXrefStream(s, i, crossrefs):
+    """Add the subsections of the xref stream at s[i] to crossrefs.
+
+    Returns:
+      dict - the xref stream's dictionary (which plays the role of
+        the trailer dictionary), or None
+    """
+
+    (obj, _) = GetPDFObject(s, i)
+    if not PDFObjHasType(obj, OINDIRECTDEF):
+        if WARN:
+            print("no xref and not indirect def")
+        return None
+    strobj = obj[1][2]
+    if not PDFObjHasType(strobj, OSTREAM):
+        if WARN:
+            print("no xref and object there is not stream")
+        return None
+    strxrefs = GetPDFStreamContents(strobj, s, crossrefs, False)
+    if strxrefs is None:
+        if WARN:
+            print('cannot decode crossref stream')
+        return None
+    d = strobj[1][0]
+    w = GetTypedValFromDictEntry(d, 'W', OARRAY, s, crossrefs)
+    ty = GetTypedValFromDictEntry(d, 'Type', ONAME, s, crossrefs)
+    sz = GetTypedValFromDictEntry(d, 'Size', ONUM, s, crossrefs)
+    index = GetTypedValFromDictEntry(d, 'Index', OARRAY, s, crossrefs)
+    if ty != 'XRef' or sz is None or w is None or len(w) != 3:
+        if WARN:
+            print('something wrong with XRef stream dictionary')
+        return None
+    widths = (w[0][1], w[1][1], w[2][1])
+    if index is None:
+        index = [(ONUM, 0), (ONUM, sz)]
+    k = 0
+    for j in range(0, len(index) - 1, 2):
+        (firstobjnum, numobjs) = (index[j][1], index[j + 1][1])
+        crossrefs.sections.append((firstobjnum, numobjs, strxrefs, k, widths))
+        k += sum(widths) * numobjs
+    return d
+
+
 def GetPDFMultiByteInt(s, i, fieldlen):
     """Get a multibyte int from a string of bytes
 
@@ -572,9 +664,10 @@ def GetPDFMultiByteInt(s, i, fieldlen):
 
     ans = 0
     for k in range(i, i + fieldlen):
-        ans = ans * 256 + ord(s[k])
+        ans = ans * 256 + ordat(s, k)
     return (ans, i + fieldlen)
 
+
 def ReadPDFPageOneContents(filename):
     """Read a PDF file and return Content string for its first page.
 
@@ -584,33 +677,72 @@ def ReadPDFPageOneContents(filename):
       string: Content string for first page
     """
 
+    return ReadPDFPageContents(filename, 0)
+
+
+def ReadPDFPageContents(filename, pagenum):
+    """Read a PDF file and return Content string for one of its pages.
+
+    The file is memory-mapped rather than read, so only the parts
+    needed to reach the page are brought into memory.
+
+    Args:
+      filename: name of file
+      pagenum: int - index of page wanted, starting at 0
+    Returns:
+      string: Content string for the page
+    """
+
     try:
         f = open(filename, "rb")  # binary since some parts may be compressed
     except IOError:
         if WARN:
             print("Can't open file", filename)
         return ''
-    contents = f.read()
-    f.close()
-    return GetPDFPageOneContents(contents)
+    try:
+        s = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError):
+        # empty file, or one that can't be mapped
+        if WARN:
+            print("Can't map file", filename)
+        f.close()
+        return ''
+    try:
+        return GetPDFPageContents(s, pagenum)
+    finally:
+        s.close()
+        f.close()
 
 
 def GetPDFPageOneContents(s):
     """Find and return first page in PDF file, given as string.
 
+    Args:
+      s: bytes holding contents of a PDF file
+    Returns:
+      string: the decoded (possibly decompressed) contents of the first page
+    """
+
+    return GetPDFPageContents(s, 0)
+
+
+def GetPDFPageContents(s, pagenum):
+    """Find and return a page in PDF file, given as string or mmap.
+
     First get the last trailer's dictionary, which should contain
-    the Root object, and also the crossref dictionary which gives
+    the Root object, and also the crossrefs which give
     byte offsets for all indirect objects.
     Then from Root object, find Pages object (a page tree), and
-    follow leftmost Kid until get to a leaf Page object, which
+    find the wanted leaf Page object in it, which
     in turn has the desired Contents object, which is a stream
     or an array of streams. Decompress (if necessary) the
     stream(s) and return their concatenation.
 
     Args:
-      s: bytes holding contents of a PDF file
+      s: bytes or mmap holding contents of a PDF file
+      pagenum: int - index of page wanted, starting at 0
     Returns:
-      string: the decoded (possibly decompressed) contents of the first page
+      string: the decoded (possibly decompressed) contents of the page
     """
 
     (trailerdict, crossrefs) = GetPDFTrailerAndCrossrefs(s)
@@ -626,78 +758,110 @@ def GetPDFPageOneContents(s):
     if root is None:
         if WARN:
             print('cannot find root dictionary')
-            return ''
+        return ''
     pagesdict = GetTypedValFromDictEntry(root, 'Pages', ODICT, s, crossrefs)
     if pagesdict is None:
         if WARN:
             print('cannot find Pages dictionary')
         return ''
-    pnode = pagesdict
-    while pnode:
+    pnode = GetPDFPage(pagesdict, pagenum, s, crossrefs)
+    if pnode is None:
+        if WARN:
+            print('cannot find Page', pagenum + 1)
+        return ''
+    contentsobj = GetPDFObjFromDictEntry(pnode, 'Contents', s, crossrefs)
+    if contentsobj is None:
+        # it is legal for there to be no contents object:
+        # means empty page
+        if WARN:
+            print('Page', pagenum + 1, 'is empty')
+        return ''
+    if contentsobj[0] == OSTREAM:
+        return GetPDFStreamContents(contentsobj, s, crossrefs)
+    elif contentsobj[0] == OARRAY:
+        pieces = []
+        for c in contentsobj[1]:
+            if not PDFObjHasType(c, OINDIRECTREF):
+                if WARN:
+                    print('Contents obj child not an indirect ref')
+                return ''
+            o = GetPDFObjFromIndirectRef(c, s, crossrefs)
+            if not PDFObjHasType(o, OSTREAM):
+                if WARN:
+                    print('Contents obj child not a stream')
+                return ''
+            pieces.append(GetPDFStreamContents(o, s, crossrefs))
+        return '\n'.join(pieces)
+    else:
+        if WARN:
+            print('Contents object has unexpected type',
+                contentsobj[0])
+        return ''
+
+
+def GetPDFPage(pagesdict, pagenum, s, crossrefs):
+    """Find a leaf Page object in a page tree.
+
+    Walks the tree in page order, using the Count of intermediate
+    Pages nodes to skip whole subtrees that come before the wanted
+    page, and resolving Kids only as they are reached.
+
+    Args:
+      pagesdict: dict - the root Pages node of the page tree
+      pagenum: int - index of page wanted, starting at 0
+      s: bytes or mmap - contents of PDF file
+      crossrefs: PDFCrossrefs - for the PDF file
+    Returns:
+      dict - the Page object, or None if there is no such page
+    """
+
+    if pagenum < 0:
+        return None
+    todo = [(ODICT, pagesdict)]
+    while todo:
+        pnodeobj = todo.pop()
+        if PDFObjHasType(pnodeobj, OINDIRECTREF):
+            pnodeobj = GetPDFObjFromIndirectRef(pnodeobj, s, crossrefs)
+        if not PDFObjHasType(pnodeobj, ODICT):
+            if WARN:
+                print('Kids element has unexpected type')
+            return None
+        pnode = pnodeobj[1]
         pnodetype = PDFDictType(pnode)
         if pnodetype == 'Pages':
+            count = GetTypedValFromDictEntry(pnode, 'Count', ONUM, s,
+                crossrefs)
+            if count is not None and count <= pagenum:
+                pagenum -= count
+                continue
             kidsarray = GetTypedValFromDictEntry(pnode, 'Kids', OARRAY, s,
                 crossrefs)
             if not kidsarray:
                 if WARN:
                     print('cannot find Kids in Pages')
-                return ''
-            if len(kidsarray) == 0:
-                if WARN:
-                    print('Kids array has no Page')
-                return ''
-            pnodeobj = GetPDFObjFromIndirectRef(kidsarray[0], s, crossrefs)
-            if PDFObjHasType(pnodeobj, ODICT):
-                pnode = pnodeobj[1]
-            else:
-                if WARN:
-                    print('Kids element has unexpected type')
-                    return ''
+                continue
+            todo.extend(reversed(kidsarray))
         elif pnodetype == 'Page':
-            contentsobj = GetPDFObjFromDictEntry(pnode, 'Contents', s,
-                crossrefs)
-            if contentsobj is None:
-                # it is legal for there to be no contents object:
-                # means empty page
-                if WARN:
-                    print('First Page is empty')
-                return ''
-            if contentsobj[0] == OSTREAM:
-                return GetPDFStreamContents(contentsobj, s, crossrefs)
-            elif contentsobj[0] == OARRAY:
-                pieces = []
-                for c in contentsobj[1]:
-                    if not PDFObjHasType(c, OINDIRECTREF):
-                        if WARN:
-                            print('Contents obj child not an indirect ref')
-                        return ''
-                    o = GetPDFObjFromIndirectRef(c, s, crossrefs)
-                    if not PDFObjHasType(o, OSTREAM):
-                        if WARN:
-                            print('Contents obj child not a stream')
-                        return ''
-                    pieces.append(GetPDFStreamContents(o, s, crossrefs))
-                return '\n'.join(pieces)
-            else:
-                if WARN:
-                    print('Contents object has unexpected type',
-                        contentsobj[0])
-                return ''
+            if pagenum == 0:
+                return pnode
+            pagenum -= 1
         else:
             if WARN:
                 print('Page tree node has unexpected type', pnodetype)
-            return ''
-    # shouldn't get here
-    return ''
+            return None
+    return None
 
 
 def GetPDFObjFromIndirectRef(obj, s, crossrefs):
     """Return the Object that is referred to by an indirect reference.
 
+    Objects are parsed only the first time they are referred to;
+    after that they come from the object cache in crossrefs.
+
     Args:
       obj: (int, value) - should be (OINDIRECTREF, (obj_number, gen_number))
-      s: string - contents of PDF file
-      crossrefs: dict - maps (obj_number, gen_number) to crossref triple
+      s: bytes or mmap - contents of PDF file
+      crossrefs: PDFCrossrefs - maps (obj_number, gen_number) to crossref triple
     Returns:
       (objectid, value) - the referred value (inside containing OINDIRECTDEF)
                           or None if there is any problem
@@ -706,58 +870,81 @@ def GetPDFObjFromIndirectRef(obj, s, crossrefs):
     if not PDFObjHasType(obj, OINDIRECTREF):
         return None
     key = obj[1]
-    if key not in crossrefs:
+    if key in crossrefs.objects:
+        return crossrefs.objects[key]
+    xref = crossrefs.get(key)
+    if xref is None:
         return None
-    (f1, f2, f3) = crossrefs[key]
+    (f1, f2, f3) = xref
+    o = None
     if f1 == XUNCOMPRESSED:
-        if f2 < 0 or f2 >= len(s):
-            return None
-        (o, _) = GetPDFObject(s, f2)
+        if 0 <= f2 < len(s):
+            (o, _) = GetPDFObject(s, f2)
+            if PDFObjHasType(o, OINDIRECTDEF):
+                o = o[1][2]
+            else:
+                o = None
     elif f1 == XCOMPRESSED:
         o = GetPDFCompressedObject(s, f2, f3, crossrefs)
-        return o
     else:
         if WARN:
             print("Bad xref type")
-        return None
-    if PDFObjHasType(o, OINDIRECTDEF):
-        return o[1][2]
-    else:
-        return None
+    crossrefs.objects[key] = o
+    return o
 
 
 def GetPDFCompressedObject(s, strnum, oindex, crossrefs):
     """Get one complete object from compressed stream.
 
+    The object stream is decoded and its offset table parsed only
+    once; the result is kept in crossrefs.objstms.
+
     Args:
-      s : bytes holding contents of a PDF file
+      s : bytes or mmap holding contents of a PDF file
       strnum: object number of object stream where object is
       oindex: index of object within the stream
-      crossrefs: dict - maps (obj_number, gen_number) to crossref triple
+      crossrefs: PDFCrossrefs - maps (obj_number, gen_number) to crossref triple
     Returns:
       (objectid, value) - or None, if no such object
     """
 
+    if strnum not in crossrefs.objstms:
+        crossrefs.objstms[strnum] = _GetPDFObjectStream(s, strnum, crossrefs)
+    objstm = crossrefs.objstms[strnum]
+    if objstm is None:
+        return None
+    (streamcont, first, offsets) = objstm
+    if not 0 <= oindex < len(offsets):
+        return None
+    (obj, _) = GetPDFObject(streamcont, first + offsets[oindex])
+    return obj
+
+
+def _GetPDFObjectStream(s, strnum, crossrefs):
+    """Decode object stream number strnum.
+
+    Returns:
+      (bytes, int, list of int) - the decoded stream, the offset of
+        its first object, and the offsets of its objects relative to
+        that; or None if there is a problem
+    """
+
     strkey = (strnum, 0)
-    if strkey not in crossrefs:
+    xref = crossrefs.get(strkey)
+    if xref is None:
         if WARN:
             print("could not find object", strnum, "in crossrefs")
         return None
-    (g1, g2, g3) = crossrefs[strkey]
+    (g1, g2, g3) = xref
     if g1 != XUNCOMPRESSED:
         if WARN:
             print("stream object is not uncompressed", g1, g2, g3)
         return None
-    if g2 < 0 or g2 >= len(s):
-        return None
-    (ostream, _) = GetPDFObject(s, g2)
-    if PDFObjHasType(ostream, OINDIRECTDEF):
-        ostream = ostream[1][2]
+    ostream = GetPDFObjFromIndirectRef((OINDIRECTREF, strkey), s, crossrefs)
     if not PDFObjHasType(ostream, OSTREAM):
         if WARN:
             print("stream object does not have type stream")
         return None
-    streamcont = GetPDFStreamContents(ostream, s, crossrefs, False)
     d = ostream[1][0]
     ty = GetTypedValFromDictEntry(d, "Type", ONAME, s, crossrefs)
     if ty != "ObjStm":
@@ -770,21 +957,19 @@ def GetPDFCompressedObject(s, strnum, oindex, crossrefs):
         if WARN:
             print("required n or first not in object stream")
         return None
+    streamcont = GetPDFStreamContents(ostream, s, crossrefs, False)
+    if streamcont is None:
+        return None
     i = 0
-    ans = None
+    offsets = []
     for count in range(n):
         (intpair, i) = GetPDFTwoInts(streamcont, i)
         if not intpair:
             if WARN:
                 print("stream object did not find int pair at count", count)
-            return None
-        (id, off) = intpair
-        obj = GetPDFObject(streamcont, first + off)
-        if count == oindex:
-            if obj:
-                ans = obj[0]
             break
-    return ans
+        offsets.append(intpair[1])
+    return (streamcont, first, offsets)
 
 
 def GetPDFObjFromDictEntry(d, entryname, s, crossrefs):
@@ -833,12 +1018,11 @@ def PDFDictType(d):
 def GetPDFStreamContents(contentsobj, s, crossrefs, dodecode=True):
     """Return the contents of a stream object, applying any needed filters.
 
-    For now, only handle FlateDecode filter, and with no DecodeParms.
-
     Args:
       contentsobj: (OSTREAM, (dict, istart, iend))
-      s: bytes - PDF file contents
-      crossrefs: dict - maps (obj_number, gen_number) to byte offset in s
+      s: bytes or mmap - PDF file contents
+      crossrefs: PDFCrossrefs - maps (obj_number, gen_number) to
+        crossref triple
       dodecode: bool - should we decode too?
     Returns:
       string - the contents (if dodecode, decoded using latin1 decoder)
@@ -846,14 +1030,46 @@ def GetPDFStreamContents(contentsobj, s, crossrefs, dodecode=True):
 
     if not PDFObjHasType(contentsobj, OSTREAM):
         return None
+    pieces = list(GetPDFStreamPieces(contentsobj, s, crossrefs, dodecode))
+    if not pieces:
+        return ''
+    return pieces[0][:0].join(pieces)
+
+
+def GetPDFStreamPieces(contentsobj, s, crossrefs, dodecode=True):
+    """Generate the contents of a stream object, in pieces, applying
+    any needed filters.
+
+    The stream is read from s and decoded a chunk at a time, so
+    neither the whole encoded stream nor any intermediate stage
+    of decoding is held in memory at once.
+    For now, only handle FlateDecode filter, with optional PNG predictor.
+
+    Args:
+      contentsobj: (OSTREAM, (dict, istart, iend))
+      s: bytes or mmap - PDF file contents
+      crossrefs: PDFCrossrefs - maps (obj_number, gen_number) to
+        crossref triple
+      dodecode: bool - should we decode too?
+    Yields:
+      string - successive pieces of the contents (if dodecode,
+        decoded using latin1 decoder)
+    """
+
+    if not PDFObjHasType(contentsobj, OSTREAM):
+        return
     (d, istart, _) = contentsobj[1]
     length = GetTypedValFromDictEntry(d, 'Length', ONUM, s, crossrefs)
     if length is None:
-        return ''
-    ans = s[istart:istart + length]
+        return
+    pieces = _StreamChunks(s, istart, length)
     filterobj = GetPDFObjFromDictEntry(d, 'Filter', s, crossrefs)
     if filterobj is None:
-        return ans.decode()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for piece in pieces:
+            yield decoder.decode(piece)
+        yield decoder.decode(b'', True)
+        return
     filters = []
     if PDFObjHasType(filterobj, ONAME):
         filters = [filterobj[1]]
@@ -881,35 +1097,77 @@ def GetPDFStreamContents(contentsobj, s, crossrefs, dodecode=True):
                         if columns is None:
                             columns = 1
                         needPngPredictor = True
-            ans = zlib.decompress(ans)
+            pieces = _FlateDecodeChunks(pieces)
             if needPngPredictor:
-                ansbytes = []
-                col1 = columns + 1
-                k = 0
-                currow = [0] * columns
-                while k + col1 <= len(ans):
-                    if ans[k] != 2:
-                        if WARN:
-                            print('unhandled PNG predictor type: ', ans[k])
-                    k += 1
-                    for j in range(0, columns):
-                        currow[j] = (currow[j] + ans[k + j]) & 0xFF
-                        ansbytes.append(chr(currow[j]))
-                    k += columns
-                if k != len(ans):
-                    if WARN:
-                        print("FlateDecode with prediction didn't consume all bytes")
-                ans = ''.join(ansbytes)
-            if dodecode:
-                ans = ans.decode(encoding='latin1', errors='ignore')
+                pieces = _PNGPredictorChunks(pieces, columns)
         else:
             if WARN:
                 print('unhandled stream filter', fname)
-            return ''
-    return ans
+            return
+    for piece in pieces:
+        if dodecode:
+            piece = piece.decode(encoding='latin1', errors='ignore')
+        yield piece
+
+
+_STREAMCHUNK = 1 << 16
+
+
+def _StreamChunks(s, istart, length):
+    """Generate s[istart:istart + length] in chunks."""
+
+    iend = min(istart + length, len(s))
+    for i in range(istart, iend, _STREAMCHUNK):
+        yield s[i:min(i + _STREAMCHUNK, iend)]
+
+
+def _FlateDecodeChunks(pieces):
+    """Generate the zlib decompression of a sequence of byte chunks."""
+
+    decompressor = zlib.decompressobj()
+    for piece in pieces:
+        ans = decompressor.decompress(piece)
+        if ans:
+            yield ans
+        if decompressor.eof:
+            return
+    ans = decompressor.flush()
+    if ans:
+        yield ans
+
+
+def _PNGPredictorChunks(pieces, columns):
+    """Undo PNG 'Up' prediction on a sequence of byte chunks,
+    with rows of the given number of columns."""
+
+    col1 = columns + 1
+    currow = bytearray(columns)
+    buf = b''
+    for piece in pieces:
+        buf += piece
+        k = 0
+        ans = bytearray()
+        while k + col1 <= len(buf):
+            if ordat(buf, k) != 2:
+                if WARN:
+                    print('unhandled PNG predictor type: ', ordat(buf, k))
+            k += 1
+            for j in range(0, columns):
+                currow[j] = (currow[j] + ordat(buf, k + j)) & 0xFF
+            ans += currow
+            k += columns
+        buf = buf[k:]
+        if ans:
+            yield bytes(ans)
+    if buf:
+        if WARN:
+            print("FlateDecode with prediction didn't consume all bytes")
 
 
 if __name__ == "__main__":
     if len(sys.argv) == 2:
         page1contents = ReadPDFPageOneContents(sys.argv[1])
         sys.stdout.write(page1contents)
+    elif len(sys.argv) == 3:
+        pagecontents = ReadPDFPageContents(sys.argv[1], int(sys.argv[2]) - 1)
+        sys.stdout.write(pagecontents)
@@ -24,6 +24,7 @@ __author__ = "howard.trickey@gmail.com"
 import re
 import xml.dom.minidom
 from . import geom
+from . import lexer
 
 TOL = 1e-5
 
@@ -168,83 +169,98 @@ def _ProcessPath(node, art, gs):
 
     if not node.hasAttribute('d'):
         return
-    s = node.getAttribute('d')
-    i = 0
     path = geom.Path()
     _SetPathAttributes(path, node, gs)
-    initpt = (0.0, 0.0)
-    subpath = None
-    while i < len(s):
-        (i, subpath, initpt) = _ParseSubpath(s, i, initpt, gs)
-        if subpath:
-            if not subpath.Empty():
-                path.AddSubpath(subpath)
-        else:
-            break
+    for subpath in _ParsePathData(node.getAttribute('d'), gs):
+        path.AddSubpath(subpath)
     if path.subpaths:
         art.paths.append(path)
 
 
-def _ParseSubpath(s, i, initpt, gs):
-    """Parse a moveto-drawto-command-group starting at s[i] and return Subpath.
+# number of coordinates taken by each drawto command
+_PathArgCount = {'L': 2, 'C': 6, 'A': 7, 'H': 1, 'V': 1, 'S': 4}
+
+
+def _ParsePathData(s, gs):
+    """Parse path data into Subpaths.
+
+    Each subpath is a moveto-drawto-command-group.
+    Parsing stops at the first error, and the subpath in
+    which it happens is dropped.
 
     Args:
       s: string - should be the 'd' attribute of a 'path' element
-      i: int - index in s to start parsing
-      initpt: (float, float) - coordinates of initial point
       gs: _SState - used to transform coordinates
     Returns:
-      (int, geom.Subpath, (float, float)) -
-          (index after subpath and subsequent whitespace,
-          the Subpath itself or Non if there was an error, final point)
+      list of geom.Subpath - the non-empty subpaths
     """
 
-    subpath = geom.Subpath()
-    i = _SkipWS(s, i)
-    n = len(s)
-    if i >= n:
-        return (i, None, initpt)
-    if s[i] == 'M':
-        move_cmd = 'M'
-    elif s[i] == 'm':
-        move_cmd = 'm'
-    else:
-        return (i, None, initpt)
-    (i, cur) = _ParseCoordPair(s, _SkipWS(s, i + 1))
-    if not cur:
-        return (i, None, initpt)
-    prev_cmd = 'L'  # implicit cmd if coords follow directly
-    if move_cmd == 'm':
-        cur = geom.VecAdd(initpt, cur)
-        prev_cmd = 'l'
-    while True:
-        implicit_cmd = False
-        if i < n:
-            cmd = s[i]
-            if _PeekCoord(s, i):
-                cmd = prev_cmd
-                implicit_cmd = True
-        else:
-            cmd = None
-        if cmd == 'z' or cmd == 'Z' or cmd == None:
-            if cmd:
-                i = _SkipWS(s, i + 1)
-                subpath.closed = True
-            return (i, subpath, cur)
-        if not implicit_cmd:
-            i = _SkipWS(s, i + 1)
-        if cmd == 'l' or cmd == 'L':
-            (i, p1) = _ParseCoordPair(s, i)
-            if not p1:
+    subpaths = []
+    subpath = None
+    cur = (0.0, 0.0)
+    for (cmd, args) in lexer.PathCommands(s):
+        if args is None:
+            return subpaths
+        if subpath is None:
+            if (cmd != 'M' and cmd != 'm') or len(args) < 2:
+                break
+            if cmd == 'm':
+                cur = geom.VecAdd(cur, (args[0], args[1]))
+                cmd = 'l'  # implicit cmd if coords follow directly
+            else:
+                cur = (args[0], args[1])
+                cmd = 'L'
+            subpath = geom.Subpath()
+            args = args[2:]
+            if not args:
+                continue
+        elif cmd == 'z' or cmd == 'Z':
+            subpath.closed = True
+            if not subpath.Empty():
+                subpaths.append(subpath)
+            subpath = None
+            if args:
                 break
+            continue
+        cur = _AddPathSegments(subpath, cmd, args, cur, gs)
+        if cur is None:
+            return subpaths
+    if subpath is not None and not subpath.Empty():
+        subpaths.append(subpath)
+    return subpaths
+
+
+def _AddPathSegments(subpath, cmd, args, cur, gs):
+    """Add the segments drawn by one drawto command to subpath.
+
+    The command is repeated as long as there are args left for it.
+
+    Args:
+      subpath: geom.Subpath - the subpath to add to
+      cmd: string - the command letter
+      args: list of float - the numbers following cmd
+      cur: (float, float) - the current point
+      gs: _SState - used to transform coordinates
+    Returns:
+      (float, float) - the final point, or None if cmd is not handled
+        or args don't fit it
+    """
+
+    n = _PathArgCount.get(cmd.upper())
+    if not n or not args or len(args) % n != 0:
+        # TODO: quadratic beziers, 'q', and 't'
+        return None
+    for k in range(0, len(args), n):
+        if cmd == 'l' or cmd == 'L':
+            p1 = (args[k], args[k + 1])
             if cmd == 'l':
                 p1 = geom.VecAdd(cur, p1)
             subpath.AddSegment(_LineSeg(cur, p1, gs))
             cur = p1
         elif cmd == 'c' or cmd == 'C':
-            (i, p1, p2, p3) = _ParseThreeCoordPairs(s, i)
-            if not p1:
-                break
+            p1 = (args[k], args[k + 1])
+            p2 = (args[k + 2], args[k + 3])
+            p3 = (args[k + 4], args[k + 5])
             if cmd == 'c':
                 p1 = geom.VecAdd(cur, p1)
                 p2 = geom.VecAdd(cur, p2)
@@ -252,33 +268,30 @@ def _ParseSubpath(s, i, initpt, gs):
             subpath.AddSegment(_Bezier3Seg(cur, p3, p1, p2, gs))
             cur = p3
         elif cmd == 'a' or cmd == 'A':
-            (i, p1, rad, rot, la, ccw) = _ParseArc(s, i)
-            if not p1:
-                break
+            rad = (args[k], args[k + 1])
+            rot = args[k + 2]
+            la = (args[k + 3] != 0.0)
+            ccw = (args[k + 4] != 0.0)
+            p1 = (args[k + 5], args[k + 6])
             if cmd == 'a':
                 p1 = geom.VecAdd(cur, p1)
             subpath.AddSegment(_ArcSeg(cur, p1, rad, rot, la, ccw, gs))
             cur = p1
         elif cmd == 'h' or cmd == 'H':
-            (i, x) = _ParseCoord(s, i)
-            if x is None:
-                break
+            x = args[k]
             if cmd == 'h':
                 x += cur[0]
             subpath.AddSegment(_LineSeg(cur, (x, cur[1]), gs))
             cur = (x, cur[1])
         elif cmd == 'v' or cmd == 'V':
-            (i, y) = _ParseCoord(s, i)
-            if y is None:
-                break
+            y = args[k]
             if cmd == 'v':
                 y += cur[1]
             subpath.AddSegment(_LineSeg(cur, (cur[0], y), gs))
             cur = (cur[0], y)
         elif cmd == 's' or cmd == 'S':
-            (i, p2, p3) = _ParseTwoCoordPairs(s, i)
-            if not p2:
-                break
+            p2 = (args[k], args[k + 1])
+            p3 = (args[k + 2], args[k + 3])
             if cmd == 's':
                 p2 = geom.VecAdd(cur, p2)
                 p3 = geom.VecAdd(cur, p3)
@@ -291,12 +304,7 @@ def _ParseSubpath(s, i, initpt, gs):
             p1 = geom.VecAdd(cur, geom.VecSub(cur, p4))
             subpath.AddSegment(_Bezier3Seg(cur, p3, p1, p2, gs))
             cur = p3
-        else:
-            # TODO: quadratic beziers, 'q', and 't'
-            break
-        i = _SkipCommaSpace(s, i)
-        prev_cmd = cmd
-    return (i, None, cur)
+    return cur
 
 
 def _ProcessRect(node, art, gs):
@@ -673,21 +681,6 @@ def _ParseCoord(s, i):
         return (i, None)
 
 
-def _PeekCoord(s, i):
-    """Return True if s[i] starts a coordinate.
-
-    Args:
-      s: string
-      i: int - place in s to start looking
-    Returns:
-      bool - True if s[i] starts a coordinate, perhaps after comma / space
-    """
-
-    i = _SkipCommaSpace(s, i)
-    m = _re_float.match(s, i)
-    return True if m else False
-
-
 def _ParseCoordPair(s, i):
     """Parse pair of coordinates, with optional comma between.
 
@@ -708,50 +701,6 @@ def _ParseCoordPair(s, i):
     return (i, None)
 
 
-def _ParseTwoCoordPairs(s, i):
-    """Parse two coordinate pairs, optionally separated by commas.
-
-    Args:
-      s: string
-      i: int - where to start parsing
-    Returns:
-      (int, (float, float) or None, (float, float) or None) -
-        int is index after the coordinate and subsequent white space
-    """
-
-    (j, pair1) = _ParseCoordPair(s, i)
-    if pair1:
-        j = _SkipCommaSpace(s, j)
-        (j, pair2) = _ParseCoordPair(s, j)
-        if pair2:
-            return (j, pair1, pair2)
-    return (i, None, None)
-
-
-def _ParseThreeCoordPairs(s, i):
-    """Parse three coordinate pairs, optionally separated by commas.
-
-    Args:
-      s: string
-      i: int - where to start parsing
-    Returns:
-      (int, (float, float) or None, (float, float) or None,
-          (float, float) or None) -
-        int is index after the coordinateand subsequent white space
-    """
-
-    (j, pair1) = _ParseCoordPair(s, i)
-    if pair1:
-        j = _SkipCommaSpace(s, j)
-        (j, pair2) = _ParseCoordPair(s, j)
-        if pair2:
-            j = _SkipCommaSpace(s, j)
-            (j, pair3) = _ParseCoordPair(s, j)
-            if pair3:
-                return (j, pair1, pair2, pair3)
-    return (i, None, None, None)
-
-
 def _ParseCoordPairList(s):
     """Parse a list of coordinate pairs.
 
@@ -815,42 +764,6 @@ def _ParseLength(s, gs, i):
     return (i, v * upi)
 
 
-def _ParseArc(s, i):
-    """Parse an elliptical arc specification.
-
-    Args:
-      s: string
-      i: int - where to start parsing
-    Returns:
-      (int, (float, float) or None, (float, float), float, bool, bool) -
-        int is index after spec and subsequent white space,
-        first (float, float) is end point of arc
-        second (float, float) is (x-radius, y-radius)
-        float is x-axis rotation, in degrees
-        first bool is True if larger arc is to be used
-        second bool is True if arc follows ccw direction
-    """
-
-    (j, rad) = _ParseCoordPair(s, i)
-    if rad:
-        j = _SkipCommaSpace(s, j)
-        (j, rot) = _ParseCoord(s, j)
-        if rot is not None:
-            j = _SkipCommaSpace(s, j)
-            (j, f) = _ParseCoord(s, j)  # should really just look for 0 or 1
-            if f is not None:
-                laf = (f != 0.0)
-                j = _SkipCommaSpace(s, j)
-                (j, f) = _ParseCoord(s, j)
-                if f is not None:
-                    ccw = (f != 0.0)
-                    j = _SkipCommaSpace(s, j)
-                    (j, pt) = _ParseCoordPair(s, j)
-                    if pt:
-                        return (j, pt, rad, rot, laf, ccw)
-    return (i, None, None, None, None, None)
-
-
 def _SkipWS(s, i):
     """Skip optional whitespace at s[i]... and return new i.
 
@@ -168,21 +168,19 @@ def EarChopTriFace(face, points):
     start = _GetLeastIndex(face, points)
     ans = []
     incr = 1
-    n = len(face)
-    while n > 3:
-        i = _FindEar(face, n, start, incr, points)
-        vm1 = face[(i - 1) % n]
-        v0 = face[i]
-        v1 = face[(i + 1) % n]
-        face = _ChopEar(face, i)
-        n = len(face)
+    ring = _EarRing(face, points)
+    while ring.n > 3:
+        i = _FindEar(ring, start, incr)
+        im1 = ring.prev[i]
+        i1 = ring.next[i]
+        ans.append((face[im1], face[i], face[i1]))
+        ring.Chop(i)
         incr = - incr
         if incr == 1:
-            start = i % n
+            start = i1
         else:
-            start = (i - 1) % n
-        ans.append((vm1, v0, v1))
-    ans.append(tuple(face))
+            start = im1
+    ans.append(tuple([face[j] for j in sorted(ring.Indices())]))
     return ans
 
 
@@ -200,7 +198,229 @@ def _GetLeastIndex(face, points):
     return bestindex
 
 
-def _FindEar(face, n, start, incr, points):
+class _EarRing(object):
+    """The remaining vertices of a face being ear-chopped.
+
+    Chopping an ear only changes the Angle kinds of its two neighbors,
+    so those are kept up to date as ears are chopped, instead of being
+    classified again for the whole face.
+    The reflex vertices are kept in a uniform grid, where each one is
+    entered in the cells covered by the bounding box of its two edges,
+    so that an ear check only needs to look at the reflex vertices
+    in the cells around the potential ear.
+
+    Attributes:
+      face: list of int - the face being chopped (indices in points)
+      points: geom.Points - holds coordinates for vertices
+      n: int - number of vertices left
+      prev: list of int - index in face of previous remaining vertex
+      next: list of int - index in face of next remaining vertex
+      angk: list of int - Ang... constant of the Angle at each index
+      reflex: dict of int to (float, float, float, float) - indices with
+          reflex (or 360) Angle, to bounding box (xmin, ymin, xmax, ymax)
+          of their two edges
+      cells: dict of (int, int) to set of int - grid cell to
+          indices of reflex vertices whose edges may touch it
+      big: set of int - indices of reflex vertices whose edges cover
+          too many cells to be entered in the grid
+    """
+
+    def __init__(self, face, points):
+        self.face = face
+        self.points = points
+        n = self.n = len(face)
+        self.prev = [(i - 1) % n for i in range(0, n)]
+        self.next = [(i + 1) % n for i in range(0, n)]
+        self.angk = [_AngleKind(face[(i - 1) % n], face[i],
+            face[(i + 1) % n], points) for i in range(0, n)]
+        self.reflex = dict()
+        self.cells = dict()
+        self.big = set()
+        self.nodecells = dict()
+        xs = [points.pos[v][0] for v in face]
+        ys = [points.pos[v][1] for v in face]
+        (self.minx, self.miny) = (min(xs), min(ys))
+        (w, h) = (max(xs) - self.minx, max(ys) - self.miny)
+        # about one cell per vertex
+        if w > 0.0 and h > 0.0:
+            self.cellsize = sqrt(w * h / n)
+        else:
+            self.cellsize = max(w, h, 1.0) / n
+        side = max(w, h) / self.cellsize
+        self.maxcells = 16 + 4 * int(side)
+        for i in range(0, n):
+            self._Register(i)
+
+    def Indices(self):
+        """Return list of the indices in face of the remaining vertices."""
+
+        ans = []
+        i = 0
+        while self.angk[i] is None:
+            i += 1
+        for _ in range(0, self.n):
+            ans.append(i)
+            i = self.next[i]
+        return ans
+
+    def Chop(self, i):
+        """Remove the vertex at index i, updating its neighbors."""
+
+        self._Unregister(i)
+        im1 = self.prev[i]
+        i1 = self.next[i]
+        self.next[im1] = i1
+        self.prev[i1] = im1
+        self.angk[i] = None
+        self.n -= 1
+        face = self.face
+        for j in (im1, i1):
+            self._Unregister(j)
+            self.angk[j] = _AngleKind(face[self.prev[j]], face[j],
+                face[self.next[j]], self.points)
+            self._Register(j)
+
+    def Reflexes(self, a, b, c):
+        """Return the reflex vertex indices that may be inside triangle
+        abc or have an edge crossing it (a, b, c are indices into points).
+        """
+
+        pos = self.points.pos
+        (pa, pb, pc) = (pos[a], pos[b], pos[c])
+        d = pa[0] * pb[1] - pb[0] * pa[1] - pa[0] * pc[1] + \
+            pc[0] * pa[1] + pb[0] * pc[1] - pc[0] * pb[1]
+        lmin = min(Length2(Sub2(pb, pa)), Length2(Sub2(pc, pb)),
+            Length2(Sub2(pa, pc)))
+        if d <= 0.0 or lmin == 0.0:
+            return self.reflex
+        x0 = min(pa[0], pb[0], pc[0])
+        x1 = max(pa[0], pb[0], pc[0])
+        y0 = min(pa[1], pb[1], pc[1])
+        y1 = max(pa[1], pb[1], pc[1])
+        # the tests are fuzzy (within TOL), so points a bit outside
+        # of the triangle can still count as being in it,
+        # or as overlapping the edges ab and bc
+        margin = 2.0 * TOL * max(x1 - x0, y1 - y0) / d
+        for (vx, vy) in (Sub2(pb, pa), Sub2(pc, pb)):
+            if vx != 0.0:
+                along = abs(vx)
+            else:
+                along = abs(vy)
+            margin = max(margin, 4.0 * TOL / along + 4.0 * TOL / lmin)
+        margin += TOL
+        (x0, y0, x1, y1) = (x0 - margin, y0 - margin, x1 + margin,
+            y1 + margin)
+        (ix0, iy0) = self._Cell(x0, y0)
+        (ix1, iy1) = self._Cell(x1, y1)
+        reflex = self.reflex
+        if iy1 - iy0 >= len(reflex):
+            # nearly degenerate triangle, so the margin is huge
+            return self._Overlapping(reflex, x0, y0, x1, y1)
+        # only look at the cells of each row that the triangle
+        # (grown by margin) can reach, since long thin triangles
+        # are common and their bounding boxes cover a lot of cells
+        rows = []
+        ncells = 0
+        for iy in range(iy0, iy1 + 1):
+            ylo = self.miny + iy * self.cellsize - margin
+            yhi = ylo + self.cellsize + 2.0 * margin
+            (xlo, xhi) = _SlabXRange(((pa, pb), (pb, pc), (pc, pa)),
+                ylo, yhi)
+            if xlo > xhi:
+                continue
+            rx0 = self._Cell(xlo - margin, 0.0)[0]
+            rx1 = self._Cell(xhi + margin, 0.0)[0]
+            rows.append((iy, rx0, rx1))
+            ncells += rx1 - rx0 + 1
+        if ncells > len(reflex):
+            cand = reflex
+        else:
+            cand = set(self.big)
+            cells = self.cells
+            for (iy, rx0, rx1) in rows:
+                for ix in range(rx0, rx1 + 1):
+                    s = cells.get((ix, iy))
+                    if s:
+                        cand.update(s)
+        return self._Overlapping(cand, x0, y0, x1, y1)
+
+    def _Overlapping(self, cand, x0, y0, x1, y1):
+        """Return the indices in cand whose reflex bounding box
+        overlaps the box (x0, y0, x1, y1)."""
+
+        reflex = self.reflex
+        ans = []
+        for j in cand:
+            (bx0, by0, bx1, by1) = reflex[j]
+            if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                ans.append(j)
+        return ans
+
+    def _Cell(self, x, y):
+        return (int(math.floor((x - self.minx) / self.cellsize)),
+            int(math.floor((y - self.miny) / self.cellsize)))
+
+    def _Register(self, i):
+        k = self.angk[i]
+        if not(k == Angreflex or k == Ang360):
+            return
+        pos = self.points.pos
+        face = self.face
+        ps = (pos[face[self.prev[i]]], pos[face[i]], pos[face[self.next[i]]])
+        box = (min([p[0] for p in ps]), min([p[1] for p in ps]),
+            max([p[0] for p in ps]), max([p[1] for p in ps]))
+        self.reflex[i] = box
+        (ix0, iy0) = self._Cell(box[0], box[1])
+        (ix1, iy1) = self._Cell(box[2], box[3])
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > self.maxcells:
+            self.big.add(i)
+            self.nodecells[i] = None
+            return
+        keys = [(ix, iy) for ix in range(ix0, ix1 + 1)
+            for iy in range(iy0, iy1 + 1)]
+        for key in keys:
+            s = self.cells.get(key)
+            if s is None:
+                s = self.cells[key] = set()
+            s.add(i)
+        self.nodecells[i] = keys
+
+    def _Unregister(self, i):
+        if i not in self.reflex:
+            return
+        del self.reflex[i]
+        keys = self.nodecells.pop(i)
+        if keys is None:
+            self.big.remove(i)
+        else:
+            for key in keys:
+                self.cells[key].remove(i)
+
+
+def _SlabXRange(edges, ylo, yhi):
+    """Return (xmin, xmax) of the parts of the edges (pairs of coords)
+    with y between ylo and yhi, or (1e30, -1e30) if there are none."""
+
+    xlo = 1e30
+    xhi = -1e30
+    for (p, q) in edges:
+        if p[1] > q[1]:
+            (p, q) = (q, p)
+        if q[1] < ylo or p[1] > yhi:
+            continue
+        dy = q[1] - p[1]
+        if dy == 0.0:
+            (xa, xb) = (p[0], q[0])
+        else:
+            dx = q[0] - p[0]
+            xa = p[0] + max((ylo - p[1]) / dy, 0.0) * dx
+            xb = p[0] + min((yhi - p[1]) / dy, 1.0) * dx
+        xlo = min(xlo, xa, xb)
+        xhi = max(xhi, xa, xb)
+    return (xlo, xhi)
+
+
+def _FindEar(ring, start, incr):
     """An ear of a polygon consists of three consecutive vertices
     v(-1), v0, v1 such that v(-1) can connect to v1 without intersecting
     the polygon.
@@ -210,18 +430,21 @@ def _FindEar(face, n, start, incr, points):
     Returns index into faces of v0 (will always find one, because
     uses a desperation mode if fails to find one with above rule)."""
 
-    angk = _ClassifyAngles(face, n, points)
+    if incr == 1:
+        step = ring.next
+    else:
+        step = ring.prev
     for mode in range(0, 5):
         i = start
         while True:
-            if _IsEar(face, i, n, angk, points, mode):
+            if _IsEar(ring, i, mode):
                 return i
-            i = (i + incr) % n
+            i = step[i]
             if i == start:
                 break  # try next higher desperation mode
 
 
-def _IsEar(face, i, n, angk, points, mode):
+def _IsEar(ring, i, mode):
     """Return true, false depending on ear status of vertices
     with indices i-1, i, i+1.
     mode is amount of desperation: 0 is Normal mode,
@@ -230,19 +453,24 @@ def _IsEar(face, i, n, angk, points, mode):
     mode 3 allows any convex vertex (should always be one)
     mode 4 allows anything (just to be sure loop terminates!)"""
 
+    face = ring.face
+    angk = ring.angk
+    points = ring.points
     k = angk[i]
-    vm2 = face[(i - 2) % n]
-    vm1 = face[(i - 1) % n]
+    im1 = ring.prev[i]
+    i1 = ring.next[i]
+    vm2 = face[ring.prev[im1]]
+    vm1 = face[im1]
     v0 = face[i]
-    v1 = face[(i + 1) % n]
-    v2 = face[(i + 2) % n]
+    v1 = face[i1]
+    v2 = face[ring.next[i1]]
     if vm1 == v0 or v0 == v1:
         return (mode > 0)
     b = (k == Angconvex or k == Angtangential or k == Ang0)
-    c = _InCone(vm1, v0, v1, v2, angk[(i + 1) % n], points) and \
-        _InCone(v1, vm2, vm1, v0, angk[(i - 1) % n], points)
+    c = _InCone(vm1, v0, v1, v2, angk[i1], points) and \
+        _InCone(v1, vm2, vm1, v0, angk[im1], points)
     if b and c:
-        return _EarCheck(face, n, angk, vm1, v0, v1, points)
+        return _EarCheck(ring, vm1, v0, v1)
     if mode < 2:
         return False
     if mode == 3:
@@ -252,7 +480,7 @@ def _IsEar(face, i, n, angk, points, mode):
     return True
 
 
-def _EarCheck(face, n, angk, vm1, v0, v1, points):
+def _EarCheck(ring, vm1, v0, v1):
     """Return True if the successive vertices vm1, v0, v1
     forms an ear.  We already know that it is not a reflex
     Angle, and that the local cone containment is ok.
@@ -262,36 +490,31 @@ def _EarCheck(face, n, angk, vm1, v0, v1, points):
     inside the triangle vm1-v0-v1.  (Well, there are
     messy cases when other points of the face coincide with
     v0 or touch various lines involved in the ear.)"""
-    for j in range(0, n):
+
+    face = ring.face
+    points = ring.points
+    for j in ring.Reflexes(vm1, v0, v1):
         fv = face[j]
-        k = angk[j]
-        b = (k == Angreflex or k == Ang360) \
-            and not(fv == vm1 or fv == v0 or fv == v1)
-        if b:
-            # Is fv inside closure of triangle (vm1,v0,v1)?
-            c = not(Ccw(v0, vm1, fv, points) \
-                          or Ccw(vm1, v1, fv, points) \
-                          or Ccw(v1, v0, fv, points))
-            fvm1 = face[(j - 1) % n]
-            fv1 = face[(j + 1) % n]
-            # To try to deal with some degenerate cases,
-            # also check to see if either segment attached to fv
-            # intersects either segment of potential ear.
-            d = SegsIntersect(fvm1, fv, vm1, v0, points) or \
-                      SegsIntersect(fvm1, fv, v0, v1, points) or \
-                      SegsIntersect(fv, fv1, vm1, v0, points) or \
-                      SegsIntersect(fv, fv1, v0, v1, points)
-            if c or d:
-                return False
+        if fv == vm1 or fv == v0 or fv == v1:
+            continue
+        # Is fv inside closure of triangle (vm1,v0,v1)?
+        c = not(Ccw(v0, vm1, fv, points) \
+                      or Ccw(vm1, v1, fv, points) \
+                      or Ccw(v1, v0, fv, points))
+        fvm1 = face[ring.prev[j]]
+        fv1 = face[ring.next[j]]
+        # To try to deal with some degenerate cases,
+        # also check to see if either segment attached to fv
+        # intersects either segment of potential ear.
+        d = SegsIntersect(fvm1, fv, vm1, v0, points) or \
+                  SegsIntersect(fvm1, fv, v0, v1, points) or \
+                  SegsIntersect(fv, fv1, vm1, v0, points) or \
+                  SegsIntersect(fv, fv1, v0, v1, points)
+        if c or d:
+            return False
     return True
 
 
-def _ChopEar(face, i):
-    """Return a copy of face (of length n), omitting element i."""
-
-    return face[0:i] + face[i + 1:]
-
-
 def _InCone(vtest, a, b, c, bkind, points):
     """Return true if point with index vtest is in Cone of points with
     indices a, b, c, where Angle ABC has AngleKind Bkind.
@@ -374,16 +597,22 @@ def _FindDiag(face, hv, points):
     Second desperation pass (mode == 2): allow crossing boundary poly"""
 
     besti = - 1
-    bestdist = 1e30
     for mode in range(0, 3):
+        # try the closest vertices first, so the first diagonal
+        # found is the answer
+        cands = []
         for i in range(0, len(face)):
             v = face[i]
             if mode == 0 and points.pos[v] > points.pos[hv]:
                 continue  # in mode 0, only want points left of hv
             dist = _DistSq(v, hv, points)
-            if dist < bestdist:
-                if _IsDiag(i, v, hv, face, points) or mode == 2:
-                    (besti, bestdist) = (i, dist)
+            if dist < 1e30:
+                cands.append((dist, i))
+        cands.sort()
+        for (dist, i) in cands:
+            if mode == 2 or _IsDiag(i, face[i], hv, face, points):
+                besti = i
+                break
         if besti >= 0:
             break  # found one, so don't need other modes
     assert(besti >= 0)
@@ -546,13 +775,6 @@ def _OtherVert(tri, a, b):
     return None
 
 
-def _ClassifyAngles(face, n, points):
-    """Return vector of anglekinds of the Angle around each point in face."""
-
-    return [_AngleKind(face[(i - 1) % n], face[i], face[(i + 1) % n], points) \
-        for i in list(range(0, n))]
-
-
 def _AngleKind(a, b, c, points):
     """Return one of the Ang... constants to classify Angle formed by ABC,
     in a counterclockwise traversal of a face,
@@ -1103,26 +1325,24 @@ def SegsIntersect(ixa, ixb, ixc, ixd, points):
     b = points.pos[ixb]
     c = points.pos[ixc]
     d = points.pos[ixd]
-    u = Sub2(b, a)
-    v = Sub2(d, c)
-    w = Sub2(a, c)
-    pp = Perp2(u, v)
+    # this is called a lot, so Sub2 and Perp2 are done inline
+    (ux, uy) = (b[0] - a[0], b[1] - a[1])
+    (vx, vy) = (d[0] - c[0], d[1] - c[1])
+    (wx, wy) = (a[0] - c[0], a[1] - c[1])
+    pp = ux * vy - uy * vx
     if abs(pp) > TOL:
-        si = Perp2(v, w) / pp
-        ti = Perp2(u, w) / pp
+        si = (vx * wy - vy * wx) / pp
+        ti = (ux * wy - uy * wx) / pp
         return 0.0 < si < 1.0 and 0.0 < ti < 1.0
     else:
         # parallel or overlapping
-        if Dot2(u, u) == 0.0 or Dot2(v, v) == 0.0:
+        if ux * ux + uy * uy == 0.0 or vx * vx + vy * vy == 0.0:
             return False
         else:
-            pp2 = Perp2(w, v)
+            pp2 = wx * vy - wy * vx
             if abs(pp2) > TOL:
                 return False  # parallel, not collinear
-            z = Sub2(b, c)
-            (vx, vy) = v
-            (wx, wy) = w
-            (zx, zy) = z
+            (zx, zy) = (b[0] - c[0], b[1] - c[1])
             if vx == 0.0:
                 (t0, t1) = (wy / vy, zy / vy)
             else:
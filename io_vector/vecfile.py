@@ -26,19 +26,19 @@ and faces specified in a vector file.
 
 __author__ = "howard.trickey@gmail.com"
 
-import re
 from . import geom
+from . import lexer
 from . import pdf
 from . import svg
 
 WARN = True   # print Warnings about strange things?
 
-# Token types
+# Token types (see lexer)
 
-TNAME = 0
-TLITNAME = 1
-TSTRING = 2
-TNUM = 3
+TNAME = lexer.TNAME
+TLITNAME = lexer.TLITNAME
+TSTRING = lexer.TSTRING
+TNUM = lexer.TNUM
 
 
 def ClassifyFile(filename):
@@ -106,13 +106,14 @@ def _FindAdobeIllustrator(f):
     return False
 
 
-def ParseVecFile(filename):
+def ParseVecFile(filename, pagenum=0):
     """Parse a vector art file and return an Art object for it.
 
     Right now, handled file types  are: EPS, Adobe Illustrator, PDF
 
     Args:
       filename: string - name of the file to read and parse
+      pagenum: int - for PDF files, index of page to parse, starting at 0
     Returns:
       geom.Art: object containing paths drawn in the file.
            Return None if there was a major problem reading the file.
@@ -123,7 +124,7 @@ def ParseVecFile(filename):
         print("Couldn't get Art:", minor)
         return None
     if major == "pdf" or (major == "ai" and minor == "pdf"):
-        contents = pdf.ReadPDFPageOneContents(filename)
+        contents = pdf.ReadPDFPageContents(filename, pagenum)
         if contents:
             toks = TokenizeAIEPS(contents)
             return ParsePS(toks, major, minor)
@@ -172,13 +173,6 @@ def TokenizeAIEPSFile(filename):
     f.close()
     return TokenizeAIEPS(contents)
 
-# Regular expressions for PostScript tokens
-_re_psname = re.compile(r"[^ \t\r\n()<>[\]{}/%]+")
-_re_psfloat = re.compile(r"(\+|-)?(([0-9]+\.[0-9]*)|(\.[0-9]+))")
-_re_psint = re.compile(r"(\+|-)?[0-9]+")
-_re_psstring = re.compile(r"\((\\.|.)*?\)")
-_re_pshexstring = re.compile(r"<.*>")
-
 
 def TokenizeAIEPS(s):
     """Tokenize the after-setup part of the an AI (eps kind) string.
@@ -194,73 +188,7 @@ def TokenizeAIEPS(s):
         i = 0
     else:
         i += 10
-    ans = []
-    while i < len(s):
-        c = s[i]
-        if c.isspace():
-            i += 1
-        elif c == "%":
-            i = s.find("\n", i)
-            if i < 0:
-                i = len(s)
-                break
-            i += 1
-        elif c == "/":
-            m = _re_psname.match(s, i + 1)
-            if m:
-                ans.append((TLITNAME, m.group()))
-                i = m.end()
-            else:
-                if WARN:
-                    print("empty name at", i)
-                i += 1
-        elif c == "(":
-            m = _re_psstring.match(s, i)
-            if m:
-                ans.append((TSTRING, s[m.start() + 1:m.end() - 1]))
-                i = m.end()
-            else:
-                if WARN:
-                    print("unterminated string at", i)
-                i = len(s)
-        elif c == "<":
-            m = _re_pshexstring.match(s, i)
-            if m:
-                ans.append((TSTRING, s[m.start() + 1:m.end() - 1]))
-                i = m.end()
-            else:
-                if WARN:
-                    print("unterminated hex string at", i)
-                i = len(s)  # unterminated hex string
-        elif c == "[" or c == "]" or c == "{" or c == "}":
-            ans.append((TNAME, c))
-            i += 1
-        elif c == "-" or c.isdigit():
-            m = _re_psfloat.match(s, i)
-            if m:
-                v = float(m.group())
-                ans.append((TNUM, v))
-                i = m.end()
-            else:
-                m = _re_psint.match(s, i)
-                if m:
-                    v = int(m.group())
-                    ans.append((TNUM, v))
-                    i = m.end()
-                else:
-                    if WARN:
-                        print("number parse problem at", i)
-                    i += 1
-        else:
-            m = _re_psname.match(s, i)
-            if m:
-                ans.append((TNAME, m.group()))
-                i = m.end()
-            else:
-                if WARN:
-                    print("tokenize error at", i, s[i:i + 10], "...")
-                i += 1
-    return ans
+    return list(lexer.PSTokens(s, i))
 
 
 class GState(object):
@@ -17,6 +17,7 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import time
+import math
 
 from netrender.utils import *
 import netrender.model
@@ -29,6 +30,14 @@ class RatingRule:
     def id(self):
         return str(id(self))
 
+    def context(self, jobs):
+        """State shared by all jobs that the rule depends on, cached sort keys are discarded when it changes"""
+        return self.enabled
+
+    def expires(self, job):
+        """Time at which the rule might give a different result for the job, without the job changing"""
+        return math.inf
+
     def rate(self, job):
         return 0
 
@@ -36,9 +45,18 @@ class ExclusionRule:
     def __init__(self):
         self.enabled = True
         self.editable = True
+
     def id(self):
         return str(id(self))
 
+    def context(self, jobs):
+        """State shared by all jobs that the rule depends on, cached sort keys are discarded when it changes"""
+        return self.enabled
+
+    def expires(self, job):
+        """Time at which the rule might give a different result for the job, without the job changing"""
+        return math.inf
+
     def test(self, job):
         return False
 
@@ -46,18 +64,36 @@ class PriorityRule:
     def __init__(self):
         self.enabled = True
         self.editable = True
+
     def id(self):
         return str(id(self))
 
+    def context(self, jobs):
+        """State shared by all jobs that the rule depends on, cached sort keys are discarded when it changes"""
+        return self.enabled
+
+    def expires(self, job):
+        """Time at which the rule might give a different result for the job, without the job changing"""
+        return math.inf
+
     def test(self, job):
         return False
 
 class Balancer:
+    """
+    Sort keys are cached per job and only computed again when:
+    - the job changed (its balance_version is incremented on any change affecting the rules),
+    - the context of a rule changed (state shared by all jobs, such as the number of slaves),
+    - a rule expired for the job (time based rules).
+    """
     def __init__(self):
         self.rules = []
         self.priorities = []
         self.exceptions = []
 
+        self.keys = {} # job -> (version, expires, key)
+        self.context = None
+
     def ruleByID(self, rule_id):
         for rule in self.rules:
             if rule.id() == rule_id:
@@ -102,12 +138,42 @@ class Balancer:
                         0 if self.applyPriorities(job) else 1, # priorities first
                         self.applyRules(job))
 
+    def expires(self, job):
+        return min((rule.expires(job) for rule in self.rules + self.priorities + self.exceptions if rule.enabled), default = math.inf)
+
+    def invalidate(self):
+        """Discard all cached sort keys, for changes the rules can't detect (such as the usage of jobs)"""
+        self.keys = {}
+
     def balance(self, jobs):
         if jobs:
-            # use inline copy to make sure the list is still accessible while sorting
-            jobs[:] = sorted(jobs, key=self.sortKey)
+            context = tuple(rule.context(jobs) for rule in self.rules + self.priorities + self.exceptions)
+            if context != self.context:
+                self.context = context
+                self.keys = {}
+
+            now = time.time()
+            changed = False
+            keys = {}
+
+            for job in jobs:
+                cached = self.keys.get(job)
+                if cached is None or cached[0] != job.balance_version or cached[1] <= now:
+                    key = self.sortKey(job)
+                    changed = changed or cached is None or cached[2] != key
+                    cached = (job.balance_version, self.expires(job), key)
+
+                keys[job] = cached
+
+            # only keep the keys of current jobs
+            self.keys = keys
+
+            if changed:
+                # use inline copy to make sure the list is still accessible while sorting
+                jobs[:] = sorted(jobs, key=lambda job: keys[job][2])
             return jobs[0]
         else:
+            self.keys = {}
             return None
 
 # ==========================
@@ -132,13 +198,36 @@ class RatingUsageByCategory(RatingRule):
     def __init__(self, get_jobs):
         super().__init__()
         self.getJobs = get_jobs
+        self.categories = {} # category -> [total usage, maximum priority]
 
     def __str__(self):
         return "Usage per category"
 
+    def updateCategories(self, jobs):
+        categories = {}
+        for j in jobs:
+            category = categories.get(j.category)
+            if category:
+                category[0] += j.usage
+                category[1] = max(category[1], j.priority)
+            else:
+                categories[j.category] = [j.usage, j.priority]
+
+        self.categories = categories
+
+    def context(self, jobs):
+        if not self.enabled:
+            return False
+
+        # ratings depend on the other jobs of the same category
+        self.updateCategories(jobs)
+        return tuple((category, total_category_usage, maximum_priority) for category, (total_category_usage, maximum_priority) in self.categories.items())
+
     def rate(self, job):
-        total_category_usage = sum([j.usage for j in self.getJobs() if j.category == job.category])
-        maximum_priority = max([j.priority for j in self.getJobs() if j.category == job.category])
+        if job.category not in self.categories:
+            self.updateCategories(self.getJobs())
+
+        total_category_usage, maximum_priority = self.categories[job.category]
 
         # less usage is better
         return total_category_usage / maximum_priority
@@ -167,6 +256,9 @@ class NewJobPriority(PriorityRule):
     def __str__(self):
         return "Priority to new jobs"
 
+    def context(self, jobs):
+        return (self.enabled, self.limit)
+
     def test(self, job):
         return job.countFrames(status = netrender.model.FRAME_DONE) < self.limit
     def serialize(self):
@@ -193,6 +285,17 @@ class MinimumTimeBetweenDispatchPriority(PriorityRule):
     def __str__(self):
         return "Priority to jobs that haven't been dispatched recently"
 
+    def context(self, jobs):
+        return (self.enabled, self.limit)
+
+    def expires(self, job):
+        if job.countFrames(status = netrender.model.FRAME_DISPATCHED) == 0:
+            expires = job.last_dispatched + self.limit * 60
+            if expires > time.time():
+                return expires
+
+        return math.inf
+
     def test(self, job):
         return job.countFrames(status = netrender.model.FRAME_DISPATCHED) == 0 and (time.time() - job.last_dispatched) / 60 > self.limit
 
@@ -243,6 +346,9 @@ class ExcludeSlavesLimit(ExclusionRule):
     def __str__(self):
         return "Exclude jobs that would use too many slaves"
 
+    def context(self, jobs):
+        return (self.enabled, self.limit, self.count_jobs(), self.count_slaves())
+
     def test(self, job):
         return not ( self.count_jobs() == 1 or self.count_slaves() <= 1 or float(job.countSlaves() + 1) / self.count_slaves() <= self.limit )
 
@@ -0,0 +1,141 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Benchmark of job balancing on the master, over synthetic mixes of jobs.
+#
+# Each mix has jobs spread over categories and priorities (some of them paused),
+# slaves are dispatched frames one after the other as the master does,
+# with the usage of jobs updated regularly (as the master does every 2 seconds).
+#
+# This isn't part of the add-on, run it from Blender so netrender can be imported:
+#   blender --background --factory-startup --python netrender/benchmark_balancing.py -- --jobs 10,100,1000
+
+import sys, os
+import argparse
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import netrender.model
+import netrender.master
+
+def createMaster(path, job_count, frame_count, slave_count):
+    rng = random.Random(0)
+
+    httpd = netrender.master.RenderMasterServer(("127.0.0.1", 0), netrender.master.RenderHandler, path)
+    httpd.server_close() # only the job & slave state is used
+
+    # methods of the server expect its lock to be held, it's reentrant
+    with httpd.lock:
+        for i in range(job_count):
+            job = netrender.master.MRenderJob(httpd.nextJobID(), netrender.model.RenderJob())
+            job.name = "job %i" % i
+            job.category = "category %i" % rng.randrange(max(job_count // 10, 1))
+            job.priority = rng.randint(1, 5)
+            job.chunks = rng.randint(1, 4)
+            job.resolution = (1920, 1080, 100)
+
+            for number in range(1, frame_count + 1):
+                job.addFrame(number, "")
+
+            httpd.addJob(job)
+            job.testStart()
+
+            if rng.random() < 0.1:
+                job.pause(False)
+
+        slaves = []
+        for i in range(slave_count):
+            slave_info = netrender.model.RenderSlave()
+            slave_info.name = "slave %i" % i
+            slave_info.address = ("127.0.0.1", i)
+            slaves.append(httpd.getSlave(httpd.addSlave(slave_info)))
+
+    return httpd, slaves
+
+def dispatch(httpd, slave):
+    # the slave finished its previous frames
+    job = slave.job
+    if job:
+        for number in slave.job_frames[:]:
+            frame = job[number]
+            slave.finishedFrame(number)
+            frame.status = netrender.model.FRAME_DONE
+        job.testFinished()
+
+    time_start = time.perf_counter()
+    httpd.balance()
+    time_balance = time.perf_counter() - time_start
+
+    job, frames = httpd.newDispatch(slave)
+
+    if job and frames:
+        for f in frames:
+            f.slave = slave
+            f.status = netrender.model.FRAME_DISPATCHED
+
+        slave.job = job
+        slave.job_frames = [f.number for f in frames]
+    else:
+        slave.job = None
+        slave.job_frames = []
+
+    return time_balance
+
+def benchmark(job_count, frame_count, dispatch_count, usage_interval):
+    with tempfile.TemporaryDirectory() as path:
+        httpd, slaves = createMaster(path, job_count, frame_count, slave_count = max(job_count * 2, 8))
+
+        with httpd.lock:
+            # full balancing, as when the usage of jobs is updated
+            time_full = 0.0
+            for _ in range(10):
+                httpd.balancer.invalidate()
+                time_start = time.perf_counter()
+                httpd.balance()
+                time_full += time.perf_counter() - time_start
+            time_full /= 10
+
+            time_dispatch = 0.0
+            for i in range(dispatch_count):
+                if i % usage_interval == 0:
+                    httpd.updateUsage()
+                time_dispatch += dispatch(httpd, slaves[i % len(slaves)])
+            time_dispatch /= dispatch_count
+
+    return time_full, time_dispatch
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description = "Benchmark of job balancing on the master")
+    parser.add_argument("--jobs", default = "10,100,1000", help = "Comma separated number of jobs of each mix")
+    parser.add_argument("--frames", type = int, default = 50, help = "Number of frames of each job")
+    parser.add_argument("--dispatches", type = int, default = 2000, help = "Number of dispatches to time for each mix")
+    parser.add_argument("--usage-interval", type = int, default = 100, help = "Dispatches between updates of the usage of jobs")
+    args = parser.parse_args(argv)
+
+    print("%8s %16s %20s" % ("jobs", "full (ms)", "per dispatch (ms)"))
+    for job_count in [int(value) for value in args.jobs.split(",")]:
+        time_full, time_dispatch = benchmark(job_count, args.frames, args.dispatches, args.usage_interval)
+        print("%8i %16.3f %20.3f" % (job_count, time_full * 1000, time_dispatch * 1000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Load test of the master, with simulated slaves talking to it over a local socket.
+#
+# The master is served as runMaster does (requests accepted by serve_forever, housekeeping in MasterScheduler)
+# or, with --serve loop, as it used to be: handle_request() in a loop with the housekeeping in between
+# and the default listen backlog of 5.
+# Each slave registers, then asks for frames, "renders" them for --render-time seconds and sends the results.
+# Jobs are baking jobs so results are sent without a file, only dispatching is measured.
+#
+# Scenarios:
+#   load:   jobs are all there from the start, reports connection errors, frames/s and dispatch latency.
+#   cancel: jobs arrive every 1 to 3 seconds, half of them are cancelled 2 seconds after submission.
+#           Slaves hold their requests for a job and for the status of their job on the master (see slave.REQUEST_WAIT),
+#           or, with --poll, poll as they used to (backoff between requests for a job, status asked every 2 seconds).
+#           Reports the median latency of dispatching a new job and of slaves noticing a cancel,
+#           and the number of job and status requests per second.
+#
+# This isn't part of the add-on, run it from Blender so netrender can be imported:
+#   blender --background --factory-startup --python netrender/benchmark_master.py -- --slaves 200
+#   blender --background --factory-startup --python netrender/benchmark_master.py -- --slaves 200 --serve loop
+#   blender --background --factory-startup --python netrender/benchmark_master.py -- --scenario cancel --slaves 50,5
+#   blender --background --factory-startup --python netrender/benchmark_master.py -- --scenario cancel --slaves 50,5 --poll
+
+import sys, os
+import argparse
+import contextlib
+import http, http.client
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import netrender.model
+import netrender.master
+import netrender.slave
+import netrender.utils
+
+class QuietHandler(netrender.master.RenderHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/job":
+            self.server.load_stats.add("requests")
+        super().do_GET()
+
+    def do_HEAD(self):
+        if self.path == "/status":
+            self.server.load_stats.add("requests")
+        super().do_HEAD()
+
+class LoopMasterServer(netrender.master.RenderMasterServer):
+    # the default of socketserver
+    request_queue_size = 5
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connection_errors = 0
+        self.frames = 0
+        self.dispatch_times = []
+        # requests for a job or for the status of a job
+        self.requests = 0
+        # job id -> time
+        self.submit_times = {}
+        self.first_dispatch_times = {}
+        self.cancel_times = {}
+        self.cancel_latencies = []
+
+    def add(self, name, value = 1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def dispatched(self, duration):
+        with self.lock:
+            self.dispatch_times.append(duration)
+
+    def jobDispatched(self, job_id):
+        with self.lock:
+            self.first_dispatch_times.setdefault(job_id, time.time())
+
+    def jobCancelled(self, job_id):
+        with self.lock:
+            self.cancel_latencies.append(time.time() - self.cancel_times[job_id])
+
+    def dispatchLatencies(self):
+        return [self.first_dispatch_times[job_id] - submit_time for job_id, submit_time in self.submit_times.items() if job_id in self.first_dispatch_times]
+
+def addJob(httpd, name, frame_count):
+    job = netrender.master.MRenderJob(httpd.nextJobID(), netrender.model.RenderJob())
+    job.name = name
+    job.subtype = netrender.model.JOB_SUB_BAKING
+    job.priority = 1
+    job.chunks = 1
+    job.resolution = (1920, 1080, 100)
+
+    for number in range(1, frame_count + 1):
+        job.addFrame(number, "")
+
+    httpd.addJob(job)
+    job.testStart()
+
+    return job
+
+def cancelJob(httpd, job, stats):
+    with httpd.lock:
+        if httpd.getJobID(job.id):
+            stats.cancel_times[job.id] = time.time()
+            httpd.removeJob(job)
+
+def submitJobs(httpd, deadline, frame_count, stats):
+    """Submit a job every 1 to 3 seconds, cancel half of them 2 seconds later"""
+    rng = random.Random(0)
+    timers = []
+
+    while True:
+        time.sleep(rng.uniform(1, 3))
+        if time.time() >= deadline - 2:
+            break
+
+        with httpd.lock:
+            job = addJob(httpd, "job %i" % len(timers), frame_count)
+            stats.submit_times[job.id] = time.time()
+
+        if rng.random() < 0.5:
+            timer = threading.Timer(2, cancelJob, (httpd, job, stats))
+            timer.start()
+            timers.append(timer)
+
+    for timer in timers:
+        timer.join()
+
+def serveLoop(httpd, stop_event):
+    # runMaster before serve_forever: housekeeping between requests, after each of them without broadcast
+    # (its start time was only reset when broadcasting)
+    httpd.timeout = 1
+    start_time = time.time() - 2
+
+    while not stop_event.is_set():
+        httpd.handle_request()
+
+        if time.time() - start_time >= 2:
+            with httpd.lock:
+                httpd.timeoutSlaves()
+                httpd.updateUsage()
+
+def startMaster(httpd, serve):
+    """Serve the master from other threads, return a function stopping it"""
+    if serve == "loop":
+        stop_event = threading.Event()
+        server_thread = threading.Thread(target = serveLoop, args = (httpd, stop_event), daemon = True)
+        server_thread.start()
+
+        def stop():
+            stop_event.set()
+            server_thread.join()
+    else:
+        server_thread = threading.Thread(target = httpd.serve_forever, kwargs = {"poll_interval": 0.5}, daemon = True)
+        server_thread.start()
+
+        scheduler = netrender.master.MasterScheduler(httpd, httpd.server_address, False)
+        scheduler.start()
+
+        def stop():
+            httpd.shutdown()
+            server_thread.join()
+            scheduler.stop()
+
+    return stop
+
+class Slave(threading.Thread):
+    def __init__(self, address, index, deadline, render_time, stats):
+        super().__init__(daemon = True)
+        self.address = address
+        self.index = index
+        self.deadline = deadline
+        self.render_time = render_time
+        self.stats = stats
+        self.slave_id = None
+
+    def sendResult(self, job_id, frame_number):
+        headers = {
+                    "slave-id": self.slave_id,
+                    "job-id": job_id,
+                    "job-frame": str(frame_number),
+                    "job-result": str(netrender.model.FRAME_DONE),
+                    "job-time": str(self.render_time)
+                  }
+        try:
+            self.request("PUT", "/render", headers = headers)
+        except (OSError, http.client.HTTPException):
+            self.stats.add("connection_errors")
+            return False
+
+        return True
+
+    def request(self, method, url, headers = {}, body = None):
+        """Send a request on a connection of its own (as the master closes them), return the response status, headers and content"""
+        conn = http.client.HTTPConnection(*self.address, timeout = 60)
+        try:
+            conn.request(method, url, body = body, headers = headers)
+            with conn.getresponse() as response:
+                return response.status, response, response.read()
+        finally:
+            conn.close()
+
+    def register(self):
+        slave_info = netrender.model.RenderSlave()
+        slave_info.name = "slave %i" % self.index
+
+        while time.time() < self.deadline:
+            try:
+                status, response, content = self.request("POST", "/slave", body = bytes(json.dumps(slave_info.serialize()), encoding='utf8'))
+            except (OSError, http.client.HTTPException):
+                self.stats.add("connection_errors")
+                time.sleep(1)
+                continue
+
+            self.slave_id = response.getheader("slave-id")
+            return True
+
+        return False
+
+class LoadSlave(Slave):
+    def run(self):
+        if not self.register():
+            return
+
+        while time.time() < self.deadline:
+            time_start = time.perf_counter()
+            try:
+                status, response, content = self.request("GET", "/job", headers = {"slave-id": self.slave_id})
+            except (OSError, http.client.HTTPException):
+                self.stats.add("connection_errors")
+                time.sleep(1)
+                continue
+
+            if status != http.client.OK:
+                # no job available
+                time.sleep(1)
+                continue
+
+            self.stats.dispatched(time.perf_counter() - time_start)
+
+            job_id = response.getheader("job-id")
+            for frame in json.loads(str(content, encoding='utf8'))["frames"]:
+                time.sleep(self.render_time)
+
+                if self.sendResult(job_id, frame["number"]) and time.time() < self.deadline:
+                    self.stats.add("frames")
+
+class CancelSlave(Slave):
+    def __init__(self, address, index, deadline, render_time, stats, poll):
+        super().__init__(address, index, deadline, render_time, stats)
+        self.poll = poll
+
+    def render(self, job_id, frame_number):
+        """Take --render-time seconds to render the frame, watching for the job to be cancelled, return False if it was"""
+        conn = http.client.HTTPConnection(*self.address, timeout = netrender.slave.REQUEST_WAIT + 20)
+
+        if self.poll:
+            end_time = time.time() + self.render_time
+            last_time = time.time()
+
+            while time.time() < end_time:
+                time.sleep(max(min(netrender.slave.CANCEL_POLL_SPEED / 2, end_time - time.time()), 0))
+                if time.time() - last_time > netrender.slave.CANCEL_POLL_SPEED:
+                    last_time = time.time()
+                    try:
+                        if netrender.slave.testCancel(conn, job_id, frame_number):
+                            return False
+                    except (OSError, http.client.HTTPException):
+                        self.stats.add("connection_errors")
+                    finally:
+                        conn.close()
+
+            return True
+        else:
+            cancel_watch = netrender.slave.CancelWatch(conn, job_id, frame_number)
+            cancel_watch.start()
+
+            cancelled = cancel_watch.wait(self.render_time)
+            cancel_watch.stop()
+
+            return not cancelled
+
+    def run(self):
+        if not self.register():
+            return
+
+        bisleep = netrender.utils.BreakableIncrementedSleep(netrender.slave.INCREMENT_TIMEOUT, 1, netrender.slave.MAX_TIMEOUT, lambda: time.time() >= self.deadline)
+
+        while time.time() < self.deadline:
+            headers = {"slave-id": self.slave_id}
+            if not self.poll:
+                headers["wait"] = str(netrender.slave.REQUEST_WAIT)
+
+            try:
+                status, response, content = self.request("GET", "/job", headers = headers)
+            except (OSError, http.client.HTTPException):
+                self.stats.add("connection_errors")
+                time.sleep(1)
+                continue
+
+            if status != http.client.OK:
+                # no job available, ask again right away when the master held the request
+                if self.poll:
+                    bisleep.sleep()
+                continue
+
+            bisleep.reset()
+
+            job_id = response.getheader("job-id")
+            self.stats.jobDispatched(job_id)
+
+            for frame in json.loads(str(content, encoding='utf8'))["frames"]:
+                if not self.render(job_id, frame["number"]):
+                    self.stats.jobCancelled(job_id)
+                    break
+
+                self.sendResult(job_id, frame["number"])
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+def benchmark(scenario, serve, slave_count, job_count, frame_count, duration, render_time, poll):
+    stats = Stats()
+
+    # the master prints each directory it creates and each frame it dispatches
+    with tempfile.TemporaryDirectory() as path, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        server_class = LoopMasterServer if serve == "loop" else netrender.master.RenderMasterServer
+        httpd = server_class(("127.0.0.1", 0), QuietHandler, path)
+        httpd.stats = lambda *args: None
+        httpd.load_stats = stats
+
+        if scenario == "load":
+            # methods of the server expect its lock to be held, it's reentrant
+            with httpd.lock:
+                for i in range(job_count):
+                    addJob(httpd, "job %i" % i, frame_count)
+
+        stop = startMaster(httpd, serve)
+
+        deadline = time.time() + duration
+        if scenario == "load":
+            slaves = [LoadSlave(httpd.server_address, i, deadline, render_time, stats) for i in range(slave_count)]
+        else:
+            slaves = [CancelSlave(httpd.server_address, i, deadline, render_time, stats, poll) for i in range(slave_count)]
+
+        for slave in slaves:
+            slave.start()
+
+        if scenario == "cancel":
+            submitJobs(httpd, deadline, frame_count, stats)
+
+        for slave in slaves:
+            # slaves might be holding a request for a job at the end
+            slave.join(max(deadline - time.time(), 0) + 5)
+
+        stop()
+        httpd.thumbnails.stop()
+        httpd.server_close()
+
+    return stats
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description = "Load test of the master with simulated slaves")
+    parser.add_argument("--scenario", choices = ("load", "cancel"), default = "load", help = "Jobs there from the start, or arriving and cancelled over time")
+    parser.add_argument("--serve", choices = ("forever", "loop"), default = "forever", help = "Serve requests as runMaster does, or with the former handle_request loop")
+    parser.add_argument("--poll", action = "store_true", help = "Slaves poll the master instead of waiting on it (cancel scenario)")
+    parser.add_argument("--slaves", default = "200", help = "Comma separated number of slaves of each run")
+    parser.add_argument("--jobs", type = int, default = 20, help = "Number of jobs (load scenario)")
+    parser.add_argument("--frames", type = int, help = "Number of frames of each job (default: 500 for load, 1 for cancel)")
+    parser.add_argument("--duration", type = float, help = "Seconds each run lasts (default: 15 for load, 60 for cancel)")
+    parser.add_argument("--render-time", type = float, help = "Seconds a slave takes to render a frame (default: 1 for load, 5 for cancel)")
+    args = parser.parse_args(argv)
+
+    load = args.scenario == "load"
+    frame_count = args.frames or (500 if load else 1)
+    duration = args.duration or (15 if load else 60)
+    render_time = args.render_time or (1 if load else 5)
+
+    if load:
+        print("%8s %18s %10s %16s %16s %16s" % ("slaves", "connection errors", "frames/s", "dispatch p50 (ms)", "dispatch p99 (ms)", "dispatch max (ms)"))
+    else:
+        print("%8s %18s %20s %18s %12s" % ("slaves", "connection errors", "dispatch latency (s)", "cancel latency (s)", "requests/s"))
+
+    for slave_count in [int(value) for value in args.slaves.split(",")]:
+        stats = benchmark(args.scenario, args.serve, slave_count, args.jobs, frame_count, duration, render_time, args.poll)
+
+        if load:
+            print("%8i %18i %10.1f %16.0f %16.0f %16.0f" % (
+                    slave_count,
+                    stats.connection_errors,
+                    stats.frames / duration,
+                    percentile(stats.dispatch_times, 0.5) * 1000,
+                    percentile(stats.dispatch_times, 0.99) * 1000,
+                    max(stats.dispatch_times, default = 0.0) * 1000,
+                    ))
+        else:
+            print("%8i %18i %20.2f %18.2f %12.1f" % (
+                    slave_count,
+                    stats.connection_errors,
+                    statistics.median(stats.dispatchLatencies() or [0.0]),
+                    statistics.median(stats.cancel_latencies or [0.0]),
+                    stats.requests / duration,
+                    ))
+
+if __name__ == "__main__":
+    main()
@@ -242,12 +242,21 @@ def sendJobBaking(conn, scene, can_save = True):
 
     # if not ACCEPTED (but not processed), send files
     if response.status == http.client.ACCEPTED:
-        for rfile in job.files:
-            sendFile(conn, fileURL(job_id, rfile.index), rfile.filepath)
-            # server will reply with ACCEPTED until all files are found
+        sendMissingFiles(conn, job, job_id, response)
 
     return job_id
 
+def sendMissingFiles(conn, job, job_id, response):
+    # the master lists the files it doesn't have already (older masters don't, send them all)
+    missing = response.getheader("missing-files")
+    if missing is not None:
+        missing = {int(index) for index in missing.split(",") if index}
+
+    for rfile in job.files:
+        if missing is None or rfile.index in missing:
+            sendFile(conn, fileURL(job_id, rfile.index), rfile.filepath)
+            # server will reply with ACCEPTED until all files are found
+
 def sendJobBlender(conn, scene, anim = False, can_save = True):
     netsettings = scene.network_render
     job = netrender.model.RenderJob()
@@ -326,9 +335,7 @@ def sendJobBlender(conn, scene, anim = False, can_save = True):
 
     # if not ACCEPTED (but not processed), send files
     if response.status == http.client.ACCEPTED:
-        for rfile in job.files:
-            sendFile(conn, fileURL(job_id, rfile.index), rfile.filepath)
-            # server will reply with ACCEPTED until all files are found
+        sendMissingFiles(conn, job, job_id, response)
 
     return job_id
 
@@ -18,10 +18,10 @@
 
 import sys, os
 import http, http.client, http.server, socket, socketserver
-import shutil, time, hashlib
-import pickle
+import shutil, time, hashlib, heapq
+import pickle, struct, zlib, io
 import zipfile
-import select # for select.error
+import threading
 import json
 
 
@@ -31,12 +31,24 @@ import netrender.balancing
 import netrender.master_html
 import netrender.thumbnail as thumbnail
 
+# cached archive of all the results of a job
+RESULT_ARCHIVE = "results.zip"
+# result files added to archives without compression
+STORED_RESULTS = {".exr", ".png", ".jpg", ".jpeg"}
+# seconds a thumbnail request waits for a thumbnail being generated
+THUMBNAIL_TIMEOUT = 10
+# the journal is compacted when it's larger than this many times its last snapshot (and than the minimum size)
+JOURNAL_COMPACT_RATIO = 4
+JOURNAL_COMPACT_MIN_SIZE = 16 * 1024 * 1024
+# maximum seconds a request is held on the master when a slave asks to wait (for a job or for its job to be cancelled)
+MAX_REQUEST_WAIT = 60
+
 class MRenderFile(netrender.model.RenderFile):
     def __init__(self, filepath, index, start, end, signature):
         super().__init__(filepath, index, start, end, signature)
         self.found = False
 
-    def updateStatus(self):
+    def updateStatus(self, file_store = None):
         self.found = os.path.exists(self.filepath)
 
         if self.found and self.signature is not None:
@@ -45,12 +57,17 @@ class MRenderFile(netrender.model.RenderFile):
             if not self.found:
                 print("Signature mismatch", self.signature, found_signature)
 
+        # same file already uploaded (for another job)
+        if not self.found and file_store and file_store.contains(self.signature):
+            self.filepath = file_store.filePath(self.signature)
+            self.found = True
+
         return self.found
 
-    def test(self):
+    def test(self, file_store = None):
         # don't check when forcing upload and only until found
         if not self.force and not self.found:
-            self.updateStatus()
+            self.updateStatus(file_store)
 
         return self.found
 
@@ -81,6 +98,16 @@ class MRenderSlave(netrender.model.RenderSlave):
 
 class MRenderJob(netrender.model.RenderJob):
     def __init__(self, job_id, job_info):
+        # counter of jobs per status shared with the server, set when added to it
+        self.status_counter = None
+        # called when frames might be dispatched, set by the server when added to it
+        self.queued_callback = None
+        # incremented on changes that affect balancing, see Balancer
+        self.balance_version = 0
+        # incremented when results of done frames are discarded, see updateResultArchive
+        self.results_version = 0
+        self.results_lock = threading.Lock()
+
         super().__init__(job_info)
         self.id = job_id
         self.last_dispatched = time.time()
@@ -98,6 +125,126 @@ class MRenderJob(netrender.model.RenderJob):
         self.save_path = ""
         self.files = [MRenderFile(rfile.filepath, rfile.index, rfile.start, rfile.end, rfile.signature) for rfile in job_info.files]
 
+        self.indexFrames()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # indices are rebuilt when loaded, the counter is the server's
+        for key in ("results_lock", "status_counter", "queued_callback", "frames_map", "frames_status", "frames_queued", "dispatched_slaves", "frames_changed"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("status_counter", None)
+        self.__dict__.setdefault("queued_callback", None)
+        self.__dict__.setdefault("balance_version", 0)
+        self.__dict__.setdefault("results_version", 0)
+        self.results_lock = threading.Lock()
+        # rebuild the frame indices, they might be missing from older saves
+        self.indexFrames()
+
+    def _setStatus(self, value):
+        if self.status_counter is not None:
+            self.status_counter[self.status] -= 1
+            self.status_counter[value] += 1
+
+        self.balance_version += 1
+        netrender.model.RenderJob.status.fset(self, value)
+
+        if value == netrender.model.JOB_QUEUED and self.queued_callback:
+            self.queued_callback()
+
+    status = property(netrender.model.RenderJob.status.fget, _setStatus, doc = netrender.model.RenderJob.status.__doc__)
+
+    def indexFrames(self):
+        """(Re)build the frame indices, kept up to date by frameStatusChanged when a frame changes status"""
+        frames = self.frames
+
+        self.frames = []
+        self.frames_map = {} # frame number -> frame
+        self.frames_status = {status: 0 for status in netrender.model.FRAME_STATUS_TEXT} # status -> number of frames
+        self.frames_queued = [] # heap of the order of frames which might be queued, see getFrames
+        self.dispatched_slaves = {} # slave -> number of frames dispatched to it
+        self.frames_changed = set() # frames changed since they were last journaled, see MasterJournal
+
+        for frame in frames:
+            self._indexFrame(frame)
+
+    def _indexFrame(self, frame):
+        frame.job = None
+        frame.order = len(self.frames)
+
+        self.frames.append(frame)
+        self.frames_map[frame.number] = frame
+        self.frames_status[frame.status] += 1
+
+        if frame.status == netrender.model.FRAME_QUEUED:
+            heapq.heappush(self.frames_queued, frame.order)
+        elif frame.status == netrender.model.FRAME_DISPATCHED:
+            frame.dispatched_slave = frame.slave
+            self.dispatched_slaves[frame.slave] = self.dispatched_slaves.get(frame.slave, 0) + 1
+
+        frame.job = self
+
+    def restoreFrame(self, copy):
+        """Update the frame of the same order from a copy of it (see MasterJournal), keeping the indices up to date"""
+        frame = self.frames[copy.order]
+
+        state = copy.__dict__.copy()
+        status = state.pop("_status")
+        for key in ("job", "order", "dispatched_slave"):
+            state.pop(key, None)
+
+        frame.__dict__.update(state)
+        frame.status = status
+
+    def frameChanged(self, frame):
+        self.frames_changed.add(frame)
+
+    def frameStatusChanged(self, frame, status):
+        previous = frame.status
+        if previous == status:
+            return
+
+        self.balance_version += 1
+        self.frameChanged(frame)
+
+        self.frames_status[previous] -= 1
+        self.frames_status[status] += 1
+
+        if previous == netrender.model.FRAME_DISPATCHED:
+            count = self.dispatched_slaves[frame.dispatched_slave] - 1
+            if count:
+                self.dispatched_slaves[frame.dispatched_slave] = count
+            else:
+                del self.dispatched_slaves[frame.dispatched_slave]
+            frame.dispatched_slave = None
+
+        if status == netrender.model.FRAME_QUEUED:
+            heapq.heappush(self.frames_queued, frame.order)
+
+            if self.queued_callback:
+                self.queued_callback()
+        elif status == netrender.model.FRAME_DISPATCHED:
+            frame.dispatched_slave = frame.slave
+            self.dispatched_slaves[frame.slave] = self.dispatched_slaves.get(frame.slave, 0) + 1
+
+    def countFrames(self, status=netrender.model.FRAME_QUEUED):
+        return self.frames_status[status]
+
+    def countSlaves(self):
+        return len(self.dispatched_slaves)
+
+    def framesStatus(self):
+        return dict(self.frames_status)
+
+    def __contains__(self, frame_number):
+        return frame_number in self.frames_map
+
+    def __getitem__(self, frame_number):
+        return self.frames_map.get(frame_number)
+
     def setForceUpload(self, force):
         for rfile in self.files:
             rfile.force = force
@@ -113,6 +260,8 @@ class MRenderJob(netrender.model.RenderJob):
             f.close()
 
     def edit(self, info_map):
+        self.balance_version += 1
+
         if "status" in info_map:
             self.status = info_map["status"]
 
@@ -122,22 +271,23 @@ class MRenderJob(netrender.model.RenderJob):
         if "chunks" in info_map:
             self.chunks = info_map["chunks"]
 
-    def testStart(self):
+    def testStart(self, file_store = None):
         # Don't test files for versioned jobs
         if not self.version_info:
+            found = True
+            # test all files, to know which ones are missing
             for f in self.files:
-                if not f.test():
-                    return False
+                found = f.test(file_store) and found
+
+            if not found:
+                return False
 
         self.start()
         self.initInfo()
         return True
 
     def testFinished(self):
-        for f in self.frames:
-            if f.status in {netrender.model.FRAME_QUEUED, netrender.model.FRAME_DISPATCHED, netrender.model.FRAME_ERROR}:
-                break
-        else:
+        if self.frames_status[netrender.model.FRAME_DONE] == len(self.frames):
             self.status = netrender.model.JOB_FINISHED
             self.finish_time=time.time()
 
@@ -165,10 +315,11 @@ class MRenderJob(netrender.model.RenderJob):
             frame = self[number]
             if frame:
                 frame.log_path = log_path
+                self.frameChanged(frame)
 
     def addFrame(self, frame_number, command):
         frame = MRenderFrame(frame_number, command)
-        self.frames.append(frame)
+        self._indexFrame(frame)
         return frame
 
     def reset(self, all):
@@ -179,9 +330,12 @@ class MRenderJob(netrender.model.RenderJob):
             self.status = netrender.model.JOB_QUEUED
 
     def getFrames(self):
+        # the returned frames are expected to be dispatched
+        # frames that aren't queued anymore (or are already returned) have stale entries in the heap, skip them
         frames = []
-        for f in self.frames:
-            if f.status == netrender.model.FRAME_QUEUED:
+        while self.frames_queued:
+            f = self.frames[heapq.heappop(self.frames_queued)]
+            if f.status == netrender.model.FRAME_QUEUED and (not frames or f is not frames[-1]):
                 self.last_dispatched = time.time()
                 frames.append(f)
                 if len(frames) >= self.chunks:
@@ -192,8 +346,63 @@ class MRenderJob(netrender.model.RenderJob):
     def getResultPath(self, filename):
         return os.path.join(self.save_path, filename)
 
+    def getResultFiles(self, frame_ranges = None):
+        """Result files of done frames, only of frames in frame_ranges (list of (first, last)) if given"""
+        filenames = []
+        for frame in self.frames:
+            if frame.status == netrender.model.FRAME_DONE:
+                if frame_ranges is None or any(first <= frame.number <= last for first, last in frame_ranges):
+                    # a result sent again is listed twice
+                    filenames.extend(dict.fromkeys(frame.results))
+
+        return filenames
+
+    def writeResult(self, zfile, filename):
+        # images are already compressed, deflating them is slow for nothing
+        if os.path.splitext(filename)[1].lower() in STORED_RESULTS:
+            compress_type = zipfile.ZIP_STORED
+        else:
+            compress_type = zipfile.ZIP_DEFLATED
+
+        zfile.write(self.getResultPath(filename), filename, compress_type)
+
+    def updateResultArchive(self, filenames):
+        """
+        Add the missing result files to the cached archive of results and return its path.
+        The archive is rebuilt when results it contains were discarded. The caller must hold results_lock.
+        """
+        zip_filepath = self.getResultPath(RESULT_ARCHIVE)
+        comment = str(self.results_version).encode()
+
+        try:
+            zfile = zipfile.ZipFile(zip_filepath, "a")
+            if zfile.comment != comment:
+                zfile.close()
+                zfile = None
+        except (FileNotFoundError, zipfile.BadZipFile):
+            # not there yet or interrupted while it was written
+            zfile = None
+
+        if zfile is None:
+            zfile = zipfile.ZipFile(zip_filepath, "w")
+            zfile.comment = comment
+
+        with zfile:
+            names = set(zfile.namelist())
+            for filename in filenames:
+                if filename not in names:
+                    self.writeResult(zfile, filename)
+
+        return zip_filepath
+
 class MRenderFrame(netrender.model.RenderFrame):
     def __init__(self, frame, command):
+        # job indexing this frame, set when added to it
+        self.job = None
+        self.order = 0
+        self.dispatched_slave = None
+        self._status = None
+
         super().__init__()
         self.number = frame
         self.slave = None
@@ -202,6 +411,30 @@ class MRenderFrame(netrender.model.RenderFrame):
         self.command = command
 
         self.log_path = None
+        # signature of the render result, the key of its thumbnail
+        self.result_signature = None
+
+    def __setstate__(self, state):
+        # frames saved before their status was indexed
+        if "status" in state:
+            state["_status"] = state.pop("status")
+
+        state.setdefault("job", None)
+        state.setdefault("order", 0)
+        state.setdefault("dispatched_slave", None)
+        state.setdefault("result_signature", None)
+        self.__dict__.update(state)
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        if self.job is not None:
+            self.job.frameStatusChanged(self, value)
+
+        self._status = value
 
     def addDefaultRenderResult(self):
         self.results.append(self.getRenderFilename())
@@ -211,6 +444,11 @@ class MRenderFrame(netrender.model.RenderFrame):
 
     def reset(self, all):
         if all or self.status == netrender.model.FRAME_ERROR:
+            if self.status == netrender.model.FRAME_DONE and self.job is not None:
+                self.job.results_version += 1
+
+            self.results = []
+            self.result_signature = None
             self.log_path = None
             self.slave = None
             self.time = 0
@@ -223,7 +461,7 @@ class MRenderFrame(netrender.model.RenderFrame):
 # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 file_pattern = re.compile("/file_([a-zA-Z0-9]+)_([0-9]+)")
 render_pattern = re.compile("/render_([a-zA-Z0-9]+)_([0-9]+).exr")
-result_pattern = re.compile("/result_([a-zA-Z0-9]+).zip")
+result_pattern = re.compile("/result_([a-zA-Z0-9]+).zip(?:\\?frames=(.+))?$")
 thumb_pattern = re.compile("/thumb_([a-zA-Z0-9]+)_([0-9]+).jpg")
 log_pattern = re.compile("/log_([a-zA-Z0-9]+)_([0-9]+).log")
 reset_pattern = re.compile("/reset(all|)_([a-zA-Z0-9]+)_([0-9]+)")
@@ -232,13 +470,10 @@ pause_pattern = re.compile("/pause_([a-zA-Z0-9]+)")
 edit_pattern = re.compile("/edit_([a-zA-Z0-9]+)")
 
 class RenderHandler(http.server.BaseHTTPRequestHandler):
-    def write_file(self, file_path, mode = 'wb'):
+    def write_file(self, file_path, mode = 'wb', hasher = None):
         length = int(self.headers['content-length'])
-        f = open(file_path, mode)
-        buf = self.rfile.read(length)
-        f.write(buf)
-        f.close()
-        del buf
+        with open(file_path, mode) as f:
+            copyStream(self.rfile, f, length, hasher)
 
     def log_message(self, format, *args):
         # override because the original calls self.address_string(), which
@@ -270,12 +505,19 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
         if self.path == "/status":
             job_id = self.headers.get('job-id', "")
             job_frame = int(self.headers.get('job-frame', -1))
+            # slaves rendering the job can wait for it to be cancelled instead of asking again later
+            deadline = time.time() + min(float(self.headers.get('wait', 0)), MAX_REQUEST_WAIT)
 
-            job = self.server.getJobID(job_id)
-            if job:
-                frame = job[job_frame]
+            with self.server.lock:
+                job = self.server.getJobID(job_id)
 
+                while job and time.time() < deadline:
+                    self.server.changed.wait(deadline - time.time())
+                    job = self.server.getJobID(job_id)
 
+                frame = job[job_frame] if job else None
+
+            if job:
                 if frame:
                     self.send_head(http.client.OK)
                 else:
@@ -337,28 +579,38 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
         elif self.path.startswith("/result"):
             match = result_pattern.match(self.path)
 
+            frame_ranges = None
+            if match and match.groups()[1]:
+                frame_ranges = parseFrameRanges(match.groups()[1])
+                if not frame_ranges:
+                    match = None
+
             if match:
                 job_id = match.groups()[0]
 
-                job = self.server.getJobID(job_id)
+                with self.server.lock:
+                    job = self.server.getJobID(job_id)
+                    if job:
+                        filenames = job.getResultFiles(frame_ranges)
 
                 if job:
                     self.server.stats("", "Sending result to client")
 
-                    zip_filepath = job.getResultPath("results.zip")
-                    with zipfile.ZipFile(zip_filepath, "w") as zfile:
-                        for frame in job.frames:
-                            if frame.status == netrender.model.FRAME_DONE:
-                                for filename in frame.results:
-                                    filepath = job.getResultPath(filename)
-
-                                    zfile.write(filepath, filename)
-
+                    if frame_ranges is None:
+                        # All results: extend the cached archive with the frames done since the last download.
+                        # The lock is held while sending, appending to the archive rewrites its end.
+                        with job.results_lock:
+                            zip_filepath = job.updateResultArchive(filenames)
 
-                    f = open(zip_filepath, 'rb')
-                    self.send_head(content = "application/x-zip-compressed")
-                    shutil.copyfileobj(f, self.wfile)
-                    f.close()
+                            with open(zip_filepath, 'rb') as f:
+                                self.send_head(headers = {"content-length": os.path.getsize(zip_filepath)}, content = "application/x-zip-compressed")
+                                copyStream(f, self.wfile)
+                    else:
+                        # Some results: stream a new archive straight to the client
+                        self.send_head(content = "application/x-zip-compressed")
+                        with zipfile.ZipFile(self.wfile, "w") as zfile:
+                            for filename in filenames:
+                                job.writeResult(zfile, filename)
                 else:
                     # no such job id
                     self.send_head(http.client.NO_CONTENT)
@@ -384,7 +636,24 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         elif frame.status == netrender.model.FRAME_DONE:
                             filename = job.getResultPath(frame.getRenderFilename())
 
-                            thumbname = thumbnail.generate(filename)
+                            # results received before thumbnails were cached don't have a signature
+                            # it's computed once, without the lock, and only kept if the frame wasn't reset meanwhile
+                            result_signature = frame.result_signature
+                            if result_signature is None and os.path.exists(filename):
+                                result_signature = hashFile(filename)
+
+                                with self.server.lock:
+                                    if frame.status == netrender.model.FRAME_DONE and frame.result_signature is None:
+                                        frame.result_signature = result_signature
+
+                            thumbname = None
+                            if result_signature:
+                                # usually generated when the result was received
+                                if not self.server.thumbnails.request(result_signature, filename).wait(THUMBNAIL_TIMEOUT):
+                                    self.send_head(http.client.ACCEPTED)
+                                    return
+
+                                thumbname = self.server.thumbnails.path(result_signature)
 
                             if thumbname:
                                 f = open(thumbname, 'rb')
@@ -444,30 +713,31 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
             job_id = self.headers.get('job-id', "")
             job_frame = int(self.headers.get('job-frame', -1))
 
-            if job_id:
+            with self.server.lock:
+                if job_id:
 
-                job = self.server.getJobID(job_id)
-                if job:
-                    if job_frame != -1:
-                        frame = job[frame]
+                    job = self.server.getJobID(job_id)
+                    if job:
+                        if job_frame != -1:
+                            frame = job[job_frame]
 
-                        if frame:
-                            message = frame.serialize()
+                            if frame:
+                                message = frame.serialize()
+                            else:
+                                # no such frame
+                                self.send_head(http.client.NO_CONTENT)
+                                return
                         else:
-                            # no such frame
-                            self.send_head(http.client.NO_CONTENT)
-                            return
+                            message = job.serialize()
                     else:
-                        message = job.serialize()
-                else:
-                    # no such job id
-                    self.send_head(http.client.NO_CONTENT)
-                    return
-            else: # status of all jobs
-                message = []
+                        # no such job id
+                        self.send_head(http.client.NO_CONTENT)
+                        return
+                else: # status of all jobs
+                    message = []
 
-                for job in self.server:
-                    message.append(job.serialize())
+                    for job in self.server:
+                        message.append(job.serialize())
 
 
             self.server.stats("", "Sending status")
@@ -476,35 +746,50 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         elif self.path == "/job":
-            self.server.balance()
-
             slave_id = self.headers['slave-id']
+            # slaves can wait for a job to be available instead of asking again later
+            deadline = time.time() + min(float(self.headers.get('wait', 0)), MAX_REQUEST_WAIT)
 
-            slave = self.server.getSeenSlave(slave_id)
+            with self.server.lock:
+                slave = self.server.getSeenSlave(slave_id)
 
-            if slave: # only if slave id is valid
-                job, frames = self.server.newDispatch(slave)
+                while slave: # only if slave id is valid
+                    self.server.balance()
 
-                if job and frames:
-                    for f in frames:
-                        print("dispatch", f.number)
-                        f.status = netrender.model.FRAME_DISPATCHED
-                        f.slave = slave
+                    job, frames = self.server.newDispatch(slave)
 
-                    slave.job = job
-                    slave.job_frames = [f.number for f in frames]
+                    if job and frames:
+                        for f in frames:
+                            print("dispatch", f.number)
+                            f.slave = slave
+                            f.status = netrender.model.FRAME_DISPATCHED
+
+                        slave.job = job
+                        slave.job_frames = [f.number for f in frames]
+
+                        message = job.serialize(frames)
+                        break
+                    else:
+                        # no job available
+                        slave.job = None
+                        slave.job_frames = []
 
+                        if time.time() >= deadline:
+                            break
+
+                        self.server.changed.wait(deadline - time.time())
+                        # the slave might have timed out meanwhile
+                        slave = self.server.getSeenSlave(slave_id)
+
+            if slave: # only if slave id is valid
+                if job and frames:
                     self.send_head(headers={"job-id": job.id})
 
-                    message = job.serialize(frames)
                     self.wfile.write(bytes(json.dumps(message), encoding='utf8'))
 
                     self.server.stats("", "Sending job to slave")
                 else:
                     # no job available, return error code
-                    slave.job = None
-                    slave.job_frames = []
-
                     self.send_head(http.client.ACCEPTED)
             else: # invalid slave id
                 self.send_head(http.client.NO_CONTENT)
@@ -530,12 +815,23 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                     if render_file:
                         self.server.stats("", "Sending file to slave")
-                        f = open(render_file.filepath, 'rb')
-
-                        self.send_head()
-                        shutil.copyfileobj(f, self.wfile)
-
-                        f.close()
+                        with open(render_file.filepath, 'rb') as f:
+                            size = os.fstat(f.fileno()).st_size
+
+                            if "range" in self.headers:
+                                byte_range = parseRange(self.headers["range"], size)
+                                if not byte_range:
+                                    self.send_head(http.client.REQUESTED_RANGE_NOT_SATISFIABLE, headers={"content-range": "bytes */%i" % size})
+                                    return
+
+                                # resume a download
+                                start, end = byte_range
+                                f.seek(start)
+                                self.send_head(http.client.PARTIAL_CONTENT, headers={"accept-ranges": "bytes", "content-range": "bytes %i-%i/%i" % (start, end, size), "content-length": end - start + 1})
+                                copyStream(f, self.wfile, end - start + 1)
+                            else:
+                                self.send_head(headers={"accept-ranges": "bytes", "content-length": size})
+                                copyStream(f, self.wfile)
                     else:
                         # no such file
                         self.send_head(http.client.NO_CONTENT)
@@ -550,16 +846,24 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
             self.server.stats("", "Sending slaves status")
 
-            for slave in self.server.slaves:
-                message.append(slave.serialize())
+            with self.server.lock:
+                for slave in self.server.slaves:
+                    message.append(slave.serialize())
 
             self.send_head()
 
             self.wfile.write(bytes(json.dumps(message), encoding='utf8'))
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         else:
-            # hand over the rest to the html section
-            netrender.master_html.get(self)
+            # hand over the rest to the html section, the page is sent once the lock is released
+            with self.server.lock:
+                response = netrender.master_html.get(self)
+
+            if response:
+                content, f = response
+                with f:
+                    self.send_head(content = content)
+                    shutil.copyfileobj(f, self.wfile)
 
     # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
     # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
@@ -574,24 +878,32 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
             length = int(self.headers['content-length'])
 
             job_info = netrender.model.RenderJob.materialize(json.loads(str(self.rfile.read(length), encoding='utf8')))
-            job_id = self.server.nextJobID()
 
-            job = MRenderJob(job_id, job_info)
+            with self.server.lock:
+                job_id = self.server.nextJobID()
 
-            job.setForceUpload(self.server.force)
+                job = MRenderJob(job_id, job_info)
 
-            for frame in job_info.frames:
-                frame = job.addFrame(frame.number, frame.command)
+                job.setForceUpload(self.server.force)
 
-            self.server.addJob(job)
+                for frame in job_info.frames:
+                    frame = job.addFrame(frame.number, frame.command)
+
+                self.server.addJob(job)
+
+                started = job.testStart(self.server.file_store)
 
             headers={"job-id": job_id}
 
-            if job.testStart():
+            if started:
                 self.server.stats("", "New job, started")
                 self.send_head(headers=headers, content = None)
             else:
-                self.server.stats("", "New job, missing files (%i total)" % len(job.files))
+                # files already on the master don't need to be sent again
+                missing = [rfile.index for rfile in job.files if not rfile.found]
+                headers["missing-files"] = ",".join(str(index) for index in missing)
+
+                self.server.stats("", "New job, missing files (%i of %i total)" % (len(missing), len(job.files)))
                 self.send_head(http.client.ACCEPTED, headers=headers)
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         elif self.path.startswith("/edit"):
@@ -605,7 +917,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                 if job:
                     info_map = self.getInfoMap()
 
-                    job.edit(info_map)
+                    with self.server.lock:
+                        job.edit(info_map)
                     self.send_head(content = None)
                 else:
                     # no such job id
@@ -616,22 +929,24 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         elif self.path == "/balance_limit":
             info_map = self.getInfoMap()
-            for rule_id, limit in info_map.items():
-                try:
-                    rule = self.server.balancer.ruleByID(rule_id)
-                    if rule:
-                        rule.setLimit(limit)
-                except:
-                    pass # invalid type
+            with self.server.lock:
+                for rule_id, limit in info_map.items():
+                    try:
+                        rule = self.server.balancer.ruleByID(rule_id)
+                        if rule:
+                            rule.setLimit(limit)
+                    except:
+                        pass # invalid type
 
             self.send_head(content = None)
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         elif self.path == "/balance_enable":
             info_map = self.getInfoMap()
-            for rule_id, enabled in info_map.items():
-                rule = self.server.balancer.ruleByID(rule_id)
-                if rule:
-                    rule.enabled = enabled
+            with self.server.lock:
+                for rule_id, enabled in info_map.items():
+                    rule = self.server.balancer.ruleByID(rule_id)
+                    if rule:
+                        rule.enabled = enabled
 
             self.send_head(content = None)
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
@@ -648,7 +963,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                 if job:
                     self.server.stats("", "Cancelling job")
-                    self.server.removeJob(job, clear)
+                    with self.server.lock:
+                        self.server.removeJob(job, clear)
                     self.send_head(content = None)
                 else:
                     # no such job id
@@ -670,7 +986,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                 if job:
                     self.server.stats("", "Pausing job")
-                    job.pause(status)
+                    with self.server.lock:
+                        job.pause(status)
                     self.send_head(content = None)
                 else:
                     # no such job id
@@ -685,7 +1002,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
             clear = info_map.get("clear", False)
 
             self.server.stats("", "Clearing jobs")
-            self.server.clear(clear)
+            with self.server.lock:
+                self.server.clear(clear)
 
             self.send_head(content = None)
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
@@ -705,7 +1023,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         frame = job[job_frame]
                         if frame:
                             self.server.stats("", "Reset job frame")
-                            frame.reset(all)
+                            with self.server.lock:
+                                frame.reset(all)
                             self.send_head(content = None)
                         else:
                             # no such frame
@@ -713,7 +1032,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                     else:
                         self.server.stats("", "Reset job")
-                        job.reset(all)
+                        with self.server.lock:
+                            job.reset(all)
                         self.send_head(content = None)
 
                 else: # job not found
@@ -731,7 +1051,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
             slave_info.address = self.client_address
 
-            slave_id = self.server.addSlave(slave_info)
+            with self.server.lock:
+                slave_id = self.server.addSlave(slave_info)
 
             self.send_head(headers = {"slave-id": slave_id}, content = None)
         # =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
@@ -749,7 +1070,8 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                 if job:
                     self.server.stats("", "Log announcement")
-                    job.addLog(log_info.frames)
+                    with self.server.lock:
+                        job.addLog(log_info.frames)
                     self.send_head(content = None)
                 else:
                     # no such job id
@@ -791,15 +1113,23 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
 
                         # add same temp file + renames as slave
 
-                        self.write_file(file_path)
+                        # hash while receiving, to make sure we have the right file
+                        hasher = hashlib.md5()
+                        self.write_file(file_path, hasher = hasher)
+                        found = rfile.signature is None or rfile.signature == hasher.hexdigest()
+
+                        if found and rfile.signature is not None:
+                            self.server.file_store.add(file_path, rfile.signature)
 
-                        rfile.filepath = file_path # set the new path
-                        found = rfile.updateStatus() # make sure we have the right file
+                        with self.server.lock:
+                            rfile.filepath = file_path # set the new path
+                            rfile.found = found
+                            started = found and job.testStart(self.server.file_store)
 
                         if not found: # checksum mismatch
                             self.server.stats("", "File upload but checksum mismatch, this shouldn't happen")
                             self.send_head(http.client.CONFLICT)
-                        elif job.testStart(): # started correctly
+                        elif started: # started correctly
                             self.server.stats("", "File upload, starting job")
                             self.send_head(content = None)
                         else:
@@ -837,23 +1167,34 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                     if frame:
                         self.send_head(content = None)
 
-                        if job.hasRenderResult():
-                            if job_result == netrender.model.FRAME_DONE:
-                                frame.addDefaultRenderResult()
-                                self.write_file(job.getResultPath(frame.getRenderFilename()))
+                        result_signature = None
+                        if job.hasRenderResult() and job_result == netrender.model.FRAME_DONE:
+                            hasher = hashlib.md5()
+                            filename = job.getResultPath(frame.getRenderFilename())
+                            self.write_file(filename, hasher = hasher)
+                            result_signature = hasher.hexdigest()
+
+                            # generate the thumbnail now, it's likely to be requested
+                            self.server.thumbnails.request(result_signature, filename)
 
-                            elif job_result == netrender.model.FRAME_ERROR:
-                                # blacklist slave on this job on error
-                                # slaves might already be in blacklist if errors on the whole chunk
-                                if not slave.id in job.blacklist:
-                                    job.blacklist.append(slave.id)
+                        with self.server.lock:
+                            if job.hasRenderResult():
+                                if job_result == netrender.model.FRAME_DONE:
+                                    frame.addDefaultRenderResult()
+                                    frame.result_signature = result_signature
 
-                        slave.finishedFrame(job_frame)
+                                elif job_result == netrender.model.FRAME_ERROR:
+                                    # blacklist slave on this job on error
+                                    # slaves might already be in blacklist if errors on the whole chunk
+                                    if not slave.id in job.blacklist:
+                                        job.blacklist.append(slave.id)
 
-                        frame.status = job_result
-                        frame.time = job_time
+                            slave.finishedFrame(job_frame)
 
-                        job.testFinished()
+                            frame.status = job_result
+                            frame.time = job_time
+
+                            job.testFinished()
 
                     else: # frame not found
                         self.send_head(http.client.NO_CONTENT)
@@ -888,17 +1229,21 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         if job_result == netrender.model.FRAME_DONE:
                             result_filename = self.headers['result-filename']
 
-                            frame.results.append(result_filename)
                             self.write_file(job.getResultPath(result_filename))
 
-                        if job_finished:
-                            job_time = float(self.headers['job-time'])
-                            slave.finishedFrame(job_frame)
+                        with self.server.lock:
+                            if job_result == netrender.model.FRAME_DONE:
+                                frame.results.append(result_filename)
+                                job.frameChanged(frame)
 
-                            frame.status = job_result
-                            frame.time = job_time
+                            if job_finished:
+                                job_time = float(self.headers['job-time'])
+                                slave.finishedFrame(job_frame)
 
-                            job.testFinished()
+                                frame.status = job_result
+                                frame.time = job_time
+
+                                job.testFinished()
                     else: # frame not found
                         self.send_head(http.client.NO_CONTENT)
                 else: # job not found
@@ -966,13 +1311,30 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                 self.send_head(http.client.NO_CONTENT)
 
 class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    # Each request is handled in its own thread, don't wait for them on shutdown
+    daemon_threads = True
+    # Many slaves can connect at once, the default of 5 refuses connections
+    request_queue_size = 128
+
     def __init__(self, address, handler_class, path, force=False, subdir=True):
+        # Locking model:
+        # `lock` protects the jobs, the slaves (including the state of their frames) and the balancer.
+        # It must be held to iterate or change them, the methods of this class expect the caller to hold it.
+        # Looking up a single job by id doesn't need it.
+        # It's never held while transferring files, so slow uploads and downloads don't stall dispatching.
+        self.lock = threading.RLock()
+        # Notified when frames might be dispatched or jobs were removed, wakes up requests waiting for either.
+        self.changed = threading.Condition(self.lock)
+
         self.jobs = []
         self.jobs_map = {}
+        self.jobs_status = {status: 0 for status in netrender.model.JOB_STATUS_TEXT} # status -> number of jobs
         self.slaves = []
         self.slaves_map = {}
         self.job_id = 0
         self.force = force
+        # set by createMaster, changes are only saved when there's one
+        self.journal = None
 
         if subdir:
             self.path = os.path.join(path, "master_" + str(os.getpid()))
@@ -981,6 +1343,11 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
 
         verifyCreateDir(self.path)
 
+        # job files, by signature
+        self.file_store = FileStore(os.path.join(self.path, "files"))
+        # thumbnails of render results, by signature of the result
+        self.thumbnails = thumbnail.ThumbnailService(os.path.join(self.path, "thumbs"))
+
         self.slave_timeout = 5 # 5 mins: need a parameter for that
 
         self.balancer = netrender.balancing.Balancer()
@@ -996,11 +1363,16 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
     def restore(self, jobs, slaves, balancer = None):
         self.jobs = jobs
         self.jobs_map = {}
+        self.jobs_status = {status: 0 for status in netrender.model.JOB_STATUS_TEXT}
 
         for job in self.jobs:
             self.jobs_map[job.id] = job
             self.job_id = max(self.job_id, int(job.id))
 
+            self.jobs_status[job.status] += 1
+            job.status_counter = self.jobs_status
+            job.queued_callback = self.notifyChanged
+
         self.slaves = slaves
         for slave in self.slaves:
             self.slaves_map[slave.id] = slave
@@ -1009,6 +1381,9 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
             self.balancer = balancer
 
 
+    def notifyChanged(self):
+        self.changed.notify_all()
+
     def nextJobID(self):
         self.job_id += 1
         return str(self.job_id)
@@ -1018,12 +1393,18 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
         self.slaves.append(slave)
         self.slaves_map[slave.id] = slave
 
+        if self.journal:
+            self.journal.addSlave(slave)
+
         return slave.id
 
     def removeSlave(self, slave):
         self.slaves.remove(slave)
         self.slaves_map.pop(slave.id)
 
+        if self.journal:
+            self.journal.removeSlave(slave)
+
     def getSlave(self, slave_id):
         return self.slaves_map.get(slave_id)
 
@@ -1051,6 +1432,8 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
             self.removeSlave(slave)
 
     def updateUsage(self):
+        self.balancer.invalidate()
+
         blend = 0.5
         for job in self.jobs:
             job.usage *= (1 - blend)
@@ -1076,12 +1459,7 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
         return self.jobs
 
     def countJobs(self, status = netrender.model.JOB_QUEUED):
-        total = 0
-        for j in self.jobs:
-            if j.status == status:
-                total += 1
-
-        return total
+        return self.jobs_status[status]
 
     def countSlaves(self):
         return len(self.slaves)
@@ -1090,6 +1468,16 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
         self.jobs.remove(job)
         self.jobs_map.pop(job.id)
 
+        self.jobs_status[job.status] -= 1
+        job.status_counter = None
+        job.queued_callback = None
+
+        if self.journal:
+            self.journal.removeJob(job)
+
+        # cancels the job on slaves waiting for it
+        self.notifyChanged()
+
         if clear_files:
             shutil.rmtree(job.save_path)
 
@@ -1102,12 +1490,19 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
         self.jobs.append(job)
         self.jobs_map[job.id] = job
 
+        self.jobs_status[job.status] += 1
+        job.status_counter = self.jobs_status
+        job.queued_callback = self.notifyChanged
+
         # create job directory
         job.save_path = os.path.join(self.path, "job_" + job.id)
         verifyCreateDir(job.save_path)
 
         job.save()
 
+        if self.journal:
+            self.journal.addJob(job)
+
     def getJobID(self, id):
         return self.jobs_map.get(id)
 
@@ -1128,33 +1523,342 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
 
         return None, None
 
+class MasterScheduler(threading.Thread):
+    """Periodic housekeeping of the master (slave timeouts, usage and broadcast), separate from request handling."""
+    def __init__(self, httpd, address, broadcast, interval = 2):
+        super().__init__(daemon = True)
+        self.httpd = httpd
+        self.address = address
+        self.broadcast = broadcast
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        if self.broadcast:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+        while True:
+            with self.httpd.lock:
+                self.httpd.timeoutSlaves()
+
+                self.httpd.updateUsage()
+
+                # balancing changed with the usage, slaves waiting for a job might get one now
+                self.httpd.notifyChanged()
+
+            if self.httpd.journal:
+                self.httpd.journal.save(self.httpd)
+
+            if self.broadcast:
+                print("broadcasting address")
+                s.sendto(bytes("%i" % self.address[1], encoding='utf8'), 0, ('<broadcast>', 8000))
+
+            if self.stop_event.wait(self.interval):
+                break
+
+        if self.broadcast:
+            s.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+class JournalPickler(pickle.Pickler):
+    """Pickle jobs and slaves referenced by a journal record by id, except the record's own root object"""
+    def __init__(self, file, root = None):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.root = root
+
+    def persistent_id(self, obj):
+        if obj is self.root:
+            return None
+        elif isinstance(obj, MRenderJob):
+            return ("job", obj.id)
+        elif isinstance(obj, MRenderSlave):
+            return ("slave", obj.id)
+
+        return None
+
+class JournalUnpickler(pickle.Unpickler):
+    def __init__(self, file, jobs, slaves):
+        super().__init__(file)
+        self.jobs = jobs
+        self.slaves = slaves
+
+    def persistent_load(self, pid):
+        kind, id = pid
+        if kind == "job":
+            return self.jobs.get(id)
+        else:
+            return self.slaves.get(id)
+
+class MasterJournal:
+    """
+    Append only journal of the state of the master, so it can be restored after a crash.
+
+    It starts with a snapshot of all jobs and slaves, followed by the changes to them:
+    added and removed jobs and slaves, jobs and frames which changed (saved whole, without the frames of jobs)
+    and slaves dispatched to other frames. Records are length prefixed and checksummed,
+    so a record cut by a crash is detected and dropped.
+
+    Changes are saved periodically by the scheduler. The journal is compacted to a new snapshot
+    when it grows too large compared to the last one, so restoring it takes time proportional to the live state.
+    """
+    header = struct.Struct("<II") # length, crc32
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = None
+        self.lock = threading.Lock() # serializes writes to the file, taken before the server lock
+
+        # pending records and what's already journaled, protected by the server lock
+        self.records = []
+        self.job_versions = {} # job id -> balance version journaled
+        self.slave_frames = {} # slave id -> (job id, frames) journaled
+
+        self.size = 0
+        self.snapshot_size = 0
+
+    def _record(self, record, root = None):
+        data = io.BytesIO()
+        JournalPickler(data, root).dump(record)
+        data = data.getvalue()
+        return self.header.pack(len(data), zlib.crc32(data)) + data
+
+    def load(self):
+        """Replay the journal, return (path, jobs, slaves) or None if there's nothing to restore"""
+        path = None
+        jobs = {}
+        slaves = {}
+
+        try:
+            f = open(self.filepath, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            while True:
+                header = f.read(self.header.size)
+                if len(header) < self.header.size:
+                    break
+
+                length, crc = self.header.unpack(header)
+                data = f.read(length)
+                if len(data) < length or zlib.crc32(data) != crc:
+                    print("dropping the end of the master journal, it was interrupted")
+                    break
+
+                record = JournalUnpickler(io.BytesIO(data), jobs, slaves).load()
+                kind = record[0]
+
+                if kind == "state":
+                    path = record[1]
+                    jobs = {job.id: job for job in record[2]}
+                    slaves = {slave.id: slave for slave in record[3]}
+                elif kind == "job":
+                    jobs[record[1].id] = record[1]
+                elif kind == "remove_job":
+                    jobs.pop(record[1], None)
+                elif kind == "job_state":
+                    job = jobs.get(record[1])
+                    if job:
+                        job.__dict__.update(record[2])
+                elif kind == "frames":
+                    job = jobs.get(record[1])
+                    if job:
+                        for frame in record[2]:
+                            job.restoreFrame(frame)
+                elif kind == "slave":
+                    slave = slaves.get(record[1].id)
+                    if slave:
+                        # frames reference the slave loaded first
+                        slave.__dict__.update(record[1].__dict__)
+                    else:
+                        slaves[record[1].id] = record[1]
+                elif kind == "remove_slave":
+                    slaves.pop(record[1], None)
+
+        if path is None:
+            return None
+
+        for job in jobs.values():
+            job.frames_changed.clear()
+
+        for slave in slaves.values():
+            # give slaves time to come back before they're timed out
+            slave.seen()
+
+        return path, list(jobs.values()), list(slaves.values())
+
+    def addJob(self, job):
+        self.records.append(self._record(("job", job), root = job))
+        self.job_versions[job.id] = job.balance_version
+        job.frames_changed.clear()
+
+    def removeJob(self, job):
+        self.records.append(self._record(("remove_job", job.id)))
+        self.job_versions.pop(job.id, None)
+
+    def addSlave(self, slave):
+        self.records.append(self._record(("slave", slave), root = slave))
+        self.slave_frames[slave.id] = (slave.job.id if slave.job else None, tuple(slave.job_frames))
+
+    def removeSlave(self, slave):
+        self.records.append(self._record(("remove_slave", slave.id)))
+        self.slave_frames.pop(slave.id, None)
+
+    def _collect(self, httpd):
+        """Records of the changes since the last save, the server lock must be held"""
+        records = self.records
+        self.records = []
+
+        for job in httpd.jobs:
+            if job.frames_changed:
+                frames = sorted(job.frames_changed, key = lambda frame: frame.order)
+                job.frames_changed.clear()
+                records.append(self._record(("frames", job.id, frames)))
+
+            if self.job_versions.get(job.id) != job.balance_version:
+                state = job.__getstate__()
+                del state["frames"]
+                records.append(self._record(("job_state", job.id, state)))
+                self.job_versions[job.id] = job.balance_version
+
+        for slave in httpd.slaves:
+            frames = (slave.job.id if slave.job else None, tuple(slave.job_frames))
+            if self.slave_frames.get(slave.id) != frames:
+                records.append(self._record(("slave", slave), root = slave))
+                self.slave_frames[slave.id] = frames
+
+        return b"".join(records)
+
+    def save(self, httpd):
+        """Append the changes since the last save, compacting the journal if it grew too large"""
+        with self.lock:
+            if self.size > max(JOURNAL_COMPACT_MIN_SIZE, self.snapshot_size * JOURNAL_COMPACT_RATIO):
+                self._compact(httpd)
+                return
+
+            with httpd.lock:
+                data = self._collect(httpd)
+
+            if data:
+                self.file.write(data)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.size += len(data)
+
+    def compact(self, httpd):
+        """Replace the journal by a snapshot of the current state"""
+        with self.lock:
+            self._compact(httpd)
+
+    def _compact(self, httpd):
+        # The snapshot is taken a job at a time, so requests aren't held up while all of them are pickled.
+        # Changes made meanwhile are journaled after it, replaying the ones it already has is harmless.
+        temp_path = self.filepath + ".temp"
+        with open(temp_path, "wb") as f:
+            with httpd.lock:
+                # everything pending is part of the snapshot
+                self.records = []
+                for job in httpd.jobs:
+                    job.frames_changed.clear()
+                self.job_versions = {job.id: job.balance_version for job in httpd.jobs}
+                self.slave_frames = {slave.id: (slave.job.id if slave.job else None, tuple(slave.job_frames)) for slave in httpd.slaves}
+
+                jobs = list(httpd.jobs)
+
+                # slaves come first as frames reference them, their jobs aren't restored yet
+                data = self._record(("state", httpd.path, [], []))
+                data += b"".join(self._record(("slave", slave), root = slave) for slave in httpd.slaves)
+
+            f.write(data)
+            size = len(data)
+
+            for job in jobs:
+                with httpd.lock:
+                    if httpd.getJobID(job.id) is not job:
+                        continue # removed in the meantime, its record follows
+
+                    data = self._record(("job", job), root = job)
+
+                f.write(data)
+                size += len(data)
+
+            with httpd.lock:
+                # the changes made while taking the snapshot, then slaves again now that their jobs are restored
+                data = self._collect(httpd)
+                data += b"".join(self._record(("slave", slave), root = slave) for slave in httpd.slaves if slave.job)
+
+            f.write(data)
+            size += len(data)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self.file:
+            self.file.close()
+        os.replace(temp_path, self.filepath)
+
+        self.file = open(self.filepath, "ab")
+        self.size = self.snapshot_size = size
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.filepath)
+        except FileNotFoundError:
+            pass
+
 def clearMaster(path):
     shutil.rmtree(path)
 
 def createMaster(address, clear, force, path):
+    journal = MasterJournal(os.path.join(path, "blender_master.journal"))
+    # saved by versions without a journal
     filepath = os.path.join(path, "blender_master.data")
 
-    if not clear and os.path.exists(filepath):
-        print("loading saved master:", filepath)
-        with open(filepath, 'rb') as f:
-            path, jobs, slaves = pickle.load(f)
+    state = None
+    if not clear:
+        state = journal.load()
 
-            httpd = RenderMasterServer(address, RenderHandler, path, force=force, subdir=False)
-            httpd.restore(jobs, slaves)
+        if state:
+            print("restoring master from journal:", journal.filepath)
+        elif os.path.exists(filepath):
+            print("loading saved master:", filepath)
+            with open(filepath, 'rb') as f:
+                state = pickle.load(f)
 
-            return httpd
+    if state:
+        path, jobs, slaves = state
 
-    return RenderMasterServer(address, RenderHandler, path, force=force)
+        httpd = RenderMasterServer(address, RenderHandler, path, force=force, subdir=False)
+        httpd.restore(jobs, slaves)
+    else:
+        httpd = RenderMasterServer(address, RenderHandler, path, force=force)
 
-def saveMaster(path, httpd):
-    filepath = os.path.join(path, "blender_master.data")
+    # start the journal over from the restored state
+    httpd.journal = journal
+    journal.compact(httpd)
+
+    if os.path.exists(filepath):
+        os.remove(filepath)
 
-    with open(filepath, 'wb') as f:
-        pickle.dump((httpd.path, httpd.jobs, httpd.slaves), f, pickle.HIGHEST_PROTOCOL)
+    return httpd
+
+def saveMaster(path, httpd):
+    httpd.journal.compact(httpd)
+    httpd.journal.close()
 
 def runMaster(address, broadcast, clear, force, path, update_stats, test_break,use_ssl=False,cert_path="",key_path=""):
     httpd = createMaster(address, clear, force, path)
-    httpd.timeout = 1
     httpd.stats = update_stats
     if use_ssl:
         import ssl
@@ -1166,30 +1870,26 @@ def runMaster(address, broadcast, clear, force, path, update_stats, test_break,u
                 ciphers="ALL",
                 ssl_version=ssl.PROTOCOL_SSLv23,
                 )
-    if broadcast:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
-    start_time = time.time() - 2
+    # Requests are accepted & handled in their own threads, housekeeping runs in the scheduler,
+    # this thread only waits for the render to be cancelled (`test_break` must be called from it).
+    server_thread = threading.Thread(target = httpd.serve_forever, kwargs = {"poll_interval": 0.5}, daemon = True)
+    server_thread.start()
 
-    while not test_break():
-        try:
-            httpd.handle_request()
-        except select.error:
-            pass
-
-        if time.time() - start_time >= 2: # need constant here
-            httpd.timeoutSlaves()
+    scheduler = MasterScheduler(httpd, address, broadcast)
+    scheduler.start()
 
-            httpd.updateUsage()
+    while not test_break():
+        time.sleep(0.5)
 
-            if broadcast:
-                print("broadcasting address")
-                s.sendto(bytes("%i" % address[1], encoding='utf8'), 0, ('<broadcast>', 8000))
-                start_time = time.time()
+    httpd.shutdown()
+    server_thread.join()
+    scheduler.stop()
+    httpd.thumbnails.stop()
 
     httpd.server_close()
     if clear:
         clearMaster(httpd.path)
+        httpd.journal.remove()
     else:
         saveMaster(path, httpd)
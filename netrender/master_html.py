@@ -17,7 +17,7 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import os
-import shutil
+import io
 from netrender.utils import *
 import netrender.model
 import json
@@ -48,9 +48,19 @@ def countFiles(job):
     return tot_cache,tot_fluid,tot_other;
 
 
+# build the page (or open the file) for handler.path, the server lock must be held
+# nothing is sent, so the lock can be released before sending
+# returns (content type, file object to send) or None when there's nothing to send
 def get(handler):
+    response = None
+    page = io.BytesIO()
+
+    def send_head(content, f=page):
+        nonlocal response
+        response = (content, f)
+
     def output(text):
-        handler.wfile.write(bytes(text, encoding='utf8'))
+        page.write(bytes(text, encoding='utf8'))
 
     def head(title, refresh = False):
         output("<html><head>")
@@ -114,16 +124,11 @@ def get(handler):
         return """<input type="checkbox" title="%s" %s %s>""" % (title, "checked" if value else "", ("onclick=\"%s\"" % script) if script else "")
 
     def sendjson(message):
-        handler.send_head(content = "application/json")
+        send_head("application/json")
         output(json.dumps(message,sort_keys=False))
 
     def sendFile(filename,content_type):
-        f = open(os.path.join(src_folder,filename), 'rb')
-
-        handler.send_head(content = content_type)
-        shutil.copyfileobj(f, handler.wfile)
-
-        f.close()
+        send_head(content_type, open(os.path.join(src_folder,filename), 'rb'))
     # return serialized version of job for html interface
     # job: the base job
     # includeFiles: boolean to indicate if we want file to be serialized too into job
@@ -304,7 +309,7 @@ def get(handler):
            sendjson(message)
     # here begin code for simple ui
     elif handler.path == "/html" or handler.path == "/":
-        handler.send_head(content = "text/html")
+        send_head("text/html")
         head("NetRender", refresh = True)
 
         output("<h2>Jobs</h2>")
@@ -423,7 +428,7 @@ def get(handler):
         output("</body></html>")
 
     elif handler.path.startswith("/html/job"):
-        handler.send_head(content = "text/html")
+        send_head("text/html")
         job_id = handler.path[9:]
 
         head("NetRender")
@@ -558,3 +563,6 @@ def get(handler):
         output(link("Back to Main Page", "/html"))
 
         output("</body></html>")
+
+    page.seek(0)
+    return response
@@ -17,7 +17,7 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import sys, os, platform, shutil
-import http, http.client, http.server
+import http, http.client, http.server, socket
 import subprocess, time, threading
 import json
 
@@ -34,6 +34,8 @@ CANCEL_POLL_SPEED = 2
 MAX_TIMEOUT = 10
 INCREMENT_TIMEOUT = 1
 MAX_CONNECT_TRY = 10
+# seconds the master holds a request for a job (or to the status of the job being rendered) until something happens
+REQUEST_WAIT = 30
 
 def clearSlave(path):
     shutil.rmtree(path)
@@ -54,9 +56,9 @@ def slave_Info(netsettings):
 
     return slave
 
-def testCancel(conn, job_id, frame_number):
+def testCancel(conn, job_id, frame_number, wait = 0):
         with ConnectionContext():
-            conn.request("HEAD", "/status", headers={"job-id":job_id, "job-frame": str(frame_number)})
+            conn.request("HEAD", "/status", headers={"job-id":job_id, "job-frame": str(frame_number), "wait": str(wait)})
 
         # canceled if job isn't found anymore
         if responseStatus(conn) == http.client.NO_CONTENT:
@@ -64,7 +66,19 @@ def testCancel(conn, job_id, frame_number):
         else:
             return False
 
-def testFile(conn, job_id, slave_id, rfile, job_prefix, main_path=None):
+def testFile(conn, job_id, slave_id, rfile, job_prefix, main_path=None, file_store=None):
+    # files already in the store (from previous jobs) don't need to be downloaded or checked again
+    if file_store and file_store.contains(rfile.signature):
+        job_full_path = createLocalPath(rfile, job_prefix, main_path, True)
+
+        try:
+            file_store.link(rfile.signature, job_full_path)
+        except FileNotFoundError:
+            pass # removed from the store in the meantime (by another slave using it)
+        else:
+            rfile.filepath = job_full_path
+            return job_full_path
+
     job_full_path = createLocalPath(rfile, job_prefix, main_path, rfile.force)
 
     found = os.path.exists(job_full_path)
@@ -80,30 +94,114 @@ def testFile(conn, job_id, slave_id, rfile, job_prefix, main_path=None):
     if not found:
         # Force prefix path if not found
         job_full_path = createLocalPath(rfile, job_prefix, main_path, True)
-        print("Downloading", job_full_path)
-        temp_path = os.path.join(job_prefix, "slave.temp")
-        with ConnectionContext():
-            conn.request("GET", fileURL(job_id, rfile.index), headers={"slave-id":slave_id})
-        response = conn.getresponse()
 
-        if response.status != http.client.OK:
-            return None # file for job not returned by server, need to return an error code to server
+        if file_store and rfile.signature is not None:
+            # files shared by jobs are only downloaded once
+            if not file_store.contains(rfile.signature):
+                print("Downloading", job_full_path)
+                temp_path = file_store.partialPath(rfile.signature)
 
-        f = open(temp_path, "wb")
-        buf = response.read(1024)
+                if not downloadFile(conn, fileURL(job_id, rfile.index), temp_path, headers={"slave-id":slave_id}, signature=rfile.signature):
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    return None # file for job not returned by server, need to return an error code to server
 
-        while buf:
-            f.write(buf)
-            buf = response.read(1024)
+                file_store.add(temp_path, rfile.signature, move=True)
 
-        f.close()
+            file_store.link(rfile.signature, job_full_path)
+        else:
+            print("Downloading", job_full_path)
+            temp_path = os.path.join(job_prefix, "slave.temp")
+            # can't be resumed without a signature to check it
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            if not downloadFile(conn, fileURL(job_id, rfile.index), temp_path, headers={"slave-id":slave_id}):
+                return None # file for job not returned by server, need to return an error code to server
 
-        os.renames(temp_path, job_full_path)
+            os.renames(temp_path, job_full_path)
 
     rfile.filepath = job_full_path
 
     return job_full_path
 
+class CancelWatch(threading.Thread):
+    """Wait on the master for the job to be cancelled while it's rendered, on a connection of its own"""
+    def __init__(self, conn, job_id, frame_number):
+        super().__init__(daemon = True)
+        self.conn = type(conn)(conn.host, conn.port, timeout = REQUEST_WAIT + 20)
+        self.job_id = job_id
+        self.frame_number = frame_number
+        self.cancel_event = threading.Event()
+        self.stopped = False
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def wait(self, timeout):
+        """Wait for the job to be cancelled at most timeout seconds, return True if it was"""
+        return self.cancel_event.wait(timeout)
+
+    def run(self):
+        while not self.stopped:
+            request_time = time.time()
+            try:
+                if testCancel(self.conn, self.job_id, self.frame_number, REQUEST_WAIT):
+                    self.cancel_event.set()
+                    break
+            except (OSError, http.client.HTTPException):
+                if self.stopped:
+                    break
+
+            # masters which don't hold requests (or errors) answer right away
+            if time.time() - request_time < CANCEL_POLL_SPEED:
+                time.sleep(CANCEL_POLL_SPEED)
+
+    def stop(self):
+        self.stopped = True
+        closeConnection(self.conn)
+
+def closeConnection(conn):
+    """Close the connection, interrupting a request waiting for its response in another thread"""
+    try:
+        if conn.sock:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    conn.close()
+
+def waitResponse(conn, method, url, headers, test_break):
+    """
+    Send a request the master might hold (see REQUEST_WAIT), from another thread so test_break is still checked.
+    Return the status and content of the response, None if it was broken.
+    """
+    result = []
+
+    def request():
+        try:
+            with ConnectionContext():
+                conn.request(method, url, headers=headers)
+            with conn.getresponse() as response:
+                result.append((response.status, response.read()))
+        except (OSError, http.client.HTTPException) as exp:
+            result.append(exp)
+
+    thread = threading.Thread(target = request, daemon = True)
+    thread.start()
+
+    while thread.is_alive():
+        thread.join(CANCEL_POLL_SPEED / 4)
+        if thread.is_alive() and test_break():
+            closeConnection(conn)
+            thread.join()
+            return None
+
+    if isinstance(result[0], Exception):
+        raise result[0]
+
+    return result[0]
+
 def breakable_timeout(timeout):
     for i in range(timeout):
         time.sleep(1)
@@ -152,17 +250,27 @@ def render_slave(engine, netsettings, threads):
         NODE_PREFIX = os.path.join(slave_path, "slave_" + slave_id)
         verifyCreateDir(NODE_PREFIX)
 
+        if netsettings.slave_cache_size:
+            # kept between sessions, so jobs from the same project start without downloading files again
+            file_store = FileStore(os.path.join(slave_path, "cache"), size_limit = netsettings.slave_cache_size * 1024 ** 3)
+        else:
+            file_store = FileStore(os.path.join(NODE_PREFIX, "files"))
+
         engine.update_stats("", "Network render connected to master, waiting for jobs")
 
         while not engine.test_break():
-            with ConnectionContext():
-                conn.request("GET", "/job", headers={"slave-id":slave_id})
-            response = conn.getresponse()
+            # the master answers when a job is available (or after REQUEST_WAIT)
+            request_time = time.time()
+            response = waitResponse(conn, "GET", "/job", {"slave-id":slave_id, "wait": str(REQUEST_WAIT)}, engine.test_break)
+            if response is None:
+                break
 
-            if response.status == http.client.OK:
+            response_status, content = response
+
+            if response_status == http.client.OK:
                 bisleep.reset()
 
-                job = netrender.model.RenderJob.materialize(json.loads(str(response.read(), encoding='utf8')))
+                job = netrender.model.RenderJob.materialize(json.loads(str(content, encoding='utf8')))
                 engine.update_stats("", "Network render processing job from master")
 
                 job_prefix = os.path.join(NODE_PREFIX, "job_" + job.id)
@@ -177,12 +285,12 @@ def render_slave(engine, netsettings, threads):
                     job_path = job.files[0].original_path # original path of the first file
                     main_path, main_file = os.path.split(job_path)
 
-                    job_full_path = testFile(conn, job.id, slave_id, job.files[0], job_prefix)
+                    job_full_path = testFile(conn, job.id, slave_id, job.files[0], job_prefix, file_store=file_store)
                     print("Fullpath", job_full_path)
                     print("File:", main_file, "and %i other files" % (len(job.files) - 1,))
 
                     for rfile in job.files[1:]:
-                        testFile(conn, job.id, slave_id, rfile, job_prefix, main_path)
+                        testFile(conn, job.id, slave_id, rfile, job_prefix, main_path, file_store=file_store)
                         print("\t", rfile.filepath)
 
                     netrender.repath.update(job)
@@ -280,10 +388,19 @@ def render_slave(engine, netsettings, threads):
 
                 process_thread.start()
 
+                # the master tells when the job is cancelled
+                cancel_watch = CancelWatch(conn, job.id, first_frame)
+                cancel_watch.start()
+
                 while not data.cancelled and process_thread.is_alive():
-                    time.sleep(CANCEL_POLL_SPEED / 2)
+                    cancel_watch.wait(CANCEL_POLL_SPEED / 2)
                     current_time = time.time()
                     data.cancelled = engine.test_break()
+
+                    if cancel_watch.cancelled:
+                        engine.update_stats("", "Job canceled by Master")
+                        data.cancelled = True
+
                     if current_time - data.last_time > CANCEL_POLL_SPEED:
 
                         data.lock.acquire()
@@ -312,9 +429,8 @@ def render_slave(engine, netsettings, threads):
                         data.lock.release()
 
                         data.last_time = current_time
-                        if testCancel(conn, job.id, first_frame):
-                            engine.update_stats("", "Job canceled by Master")
-                            data.cancelled = True
+
+                cancel_watch.stop()
 
                 process_thread.join()
                 del process_thread
@@ -414,7 +530,8 @@ def render_slave(engine, netsettings, threads):
                             continue
 
                 engine.update_stats("", "Network render connected to master, waiting for jobs")
-            else:
+            elif time.time() - request_time < REQUEST_WAIT / 2:
+                # masters which don't hold requests answer right away
                 bisleep.sleep()
 
         conn.close()
@@ -16,33 +16,46 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import sys, os
+import sys, os, time
 import subprocess
+import threading
+import collections
 
 import bpy
 
+from netrender.utils import FileStore
+
+# number of processes generating thumbnails at once on the master
+THUMBNAIL_WORKERS = 2
+# maximum number of thumbnails generated by one process
+THUMBNAIL_BATCH = 8
+# seconds before a thumbnail which couldn't be generated is tried again
+THUMBNAIL_RETRY = 300
+
 def generate(filename, external=True):
     if external:
-        process = subprocess.Popen(
-            [bpy.app.binary_path,
-             "-b",
-             "-y",
-             "-noaudio",
-             "-P", __file__,
-             "--",
-             filename,
-             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            )
-        while process.poll() is None:
-            process.stdout.read(1024) # empty buffer to be sure
-        process.stdout.read()
+        _external([filename])
 
         return _thumbname(filename)
     else:
         return _internal(filename)
 
+def _external(filenames):
+    process = subprocess.Popen(
+        [bpy.app.binary_path,
+         "-b",
+         "-y",
+         "-noaudio",
+         "-P", __file__,
+         "--",
+         ] + filenames,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        )
+    while process.poll() is None:
+        process.stdout.read(1024) # empty buffer to be sure
+    process.stdout.read()
+
 def _thumbname(filename):
     root = os.path.splitext(filename)[0]
     return root + ".jpg"
@@ -82,10 +95,106 @@ def _internal(filename):
 
     return None
 
+class ThumbnailService:
+    """
+    Generate thumbnails of render results in the background with a bounded number of processes.
+
+    Thumbnails are cached by signature of their result. Queued results are generated in batches,
+    one Blender process for up to THUMBNAIL_BATCH results, so its startup time is shared.
+    """
+    def __init__(self, path, workers = THUMBNAIL_WORKERS, batch = THUMBNAIL_BATCH):
+        self.store = FileStore(path)
+        self.batch = batch
+
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.queue = collections.OrderedDict() # signature -> result filename, waiting for a worker
+        self.pending = {} # signature -> event set when done, queued or being generated
+        self.failed = {} # signature -> time, thumbnails which couldn't be generated
+        self.stopped = False
+
+        self.workers = [threading.Thread(target = self._work, daemon = True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def path(self, signature):
+        """Path of the cached thumbnail, None if there's none"""
+        with self.lock:
+            return self.store.filePath(signature) if self.store.contains(signature) else None
+
+    def request(self, signature, filename):
+        """Queue the thumbnail of the result filename (with that signature) if it isn't cached, return an event set when it's done"""
+        with self.lock:
+            event = self.pending.get(signature)
+            if event:
+                return event
+
+            event = threading.Event()
+
+            thumbname = _thumbname(filename)
+            if self.store.contains(signature):
+                pass
+            elif os.path.exists(thumbname):
+                # already generated, by the slave or an older master
+                self.store.add(thumbname, signature, move = True)
+            elif signature in self.failed and time.time() < self.failed[signature] + THUMBNAIL_RETRY:
+                pass # don't start a process for it every time it's requested
+            else:
+                self.failed.pop(signature, None)
+                self.queue[signature] = filename
+                self.pending[signature] = event
+                self.condition.notify()
+                return event
+
+        event.set()
+        return event
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _work(self):
+        while True:
+            with self.lock:
+                while not self.queue and not self.stopped:
+                    self.condition.wait()
+
+                if self.stopped:
+                    return
+
+                batch = [self.queue.popitem(last = False) for _ in range(min(self.batch, len(self.queue)))]
+
+            try:
+                _external([filename for signature, filename in batch])
+            except Exception as exp:
+                print("Error while generating thumbnails")
+                print(exp)
+
+            with self.lock:
+                for signature, filename in batch:
+                    try:
+                        thumbname = _thumbname(filename)
+                        if os.path.exists(thumbname):
+                            self.store.add(thumbname, signature, move = True)
+                        else:
+                            self.failed[signature] = time.time()
+                    except Exception as exp:
+                        print("Error while storing thumbnail")
+                        print(exp)
+                        self.failed[signature] = time.time()
+                    finally:
+                        self.pending.pop(signature).set()
+
 if __name__ == "__main__":
     try:
         start = sys.argv.index("--") + 1
     except ValueError:
         start = 0
     for filename in sys.argv[start:]:
-        generate(filename, external=False)
+        # one process generates a batch of thumbnails, don't let a broken result stop it
+        try:
+            generate(filename, external=False)
+        except Exception as exp:
+            print("Error while generating thumbnail of", filename)
+            print(exp)
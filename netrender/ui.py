@@ -167,6 +167,7 @@ class RENDER_PT_network_slave_settings(NetRenderButtonsPanel, bpy.types.Panel):
         layout.prop(netsettings, "slave_render")
         layout.prop(netsettings, "slave_bake")
         layout.prop(netsettings, "use_slave_clear")
+        layout.prop(netsettings, "slave_cache_size")
         layout.prop(netsettings, "use_slave_thumb")
         layout.prop(netsettings, "use_slave_output_log")
         layout.label(text="Threads:")
@@ -438,6 +439,13 @@ class NetRenderSettings(bpy.types.PropertyGroup):
                         description="delete downloaded files on exit",
                         default = True)
 
+        NetRenderSettings.slave_cache_size = IntProperty(
+                        name="Cache size (GB)",
+                        description="Size of the cache of job files kept between jobs and sessions, 0 to only keep files for this session",
+                        default = 20,
+                        min=0,
+                        max=65535)
+
         NetRenderSettings.use_slave_thumb = BoolProperty(
                         name="Generate thumbnails",
                         description="Generate thumbnails on slaves instead of master",
@@ -18,7 +18,7 @@
 
 import sys, os, re, platform
 import http, http.client, http.server, socket
-import subprocess, time, hashlib
+import subprocess, time, hashlib, shutil, tempfile
 
 import netrender, netrender.model
 
@@ -28,8 +28,21 @@ try:
 except:
   bpy = None
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 VERSION = bytes(".".join((str(n) for n in netrender.bl_info["version"])), encoding='utf8')
 
+# size of the buffer used when transferring and hashing files
+TRANSFER_CHUNK_SIZE = 1024 * 1024
+# number of times a download is resumed after the connection failed
+MAX_DOWNLOAD_RETRY = 3
+
+# Linux ioctl to clone a file (copy on write), see cloneFile
+FICLONE = 0x40049409
+
 try:
     system = platform.system()
 except UnicodeDecodeError:
@@ -222,8 +235,11 @@ def fileURL(job_id, file_index):
 def logURL(job_id, frame_number):
     return "/log_%s_%i.log" % (job_id, frame_number)
 
-def resultURL(job_id):
-    return "/result_%s.zip" % job_id
+def resultURL(job_id, frame_ranges = None):
+    if frame_ranges:
+        return "/result_%s.zip?frames=%s" % (job_id, ",".join(str(first) if first == last else "%i-%i" % (first, last) for first, last in frame_ranges))
+    else:
+        return "/result_%s.zip" % job_id
 
 def renderURL(job_id, frame_number):
     return "/render_%s_%i.exr" % (job_id, frame_number)
@@ -232,16 +248,262 @@ def cancelURL(job_id):
     return "/cancel_%s" % (job_id)
 
 def hashFile(path):
-    f = open(path, "rb")
-    value = hashData(f.read())
-    f.close()
-    return value
+    m = hashlib.md5()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(TRANSFER_CHUNK_SIZE), b""):
+            m.update(buf)
+    return m.hexdigest()
 
 def hashData(data):
     m = hashlib.md5()
     m.update(data)
     return m.hexdigest()
 
+def copyStream(source, destination, length = None, hasher = None):
+    """Copy from source to destination in chunks (up to length bytes if given), hasher is updated with the copied data"""
+    copied = 0
+    while length is None or copied < length:
+        buf = source.read(TRANSFER_CHUNK_SIZE if length is None else min(TRANSFER_CHUNK_SIZE, length - copied))
+        if not buf:
+            break
+
+        destination.write(buf)
+        if hasher:
+            hasher.update(buf)
+        copied += len(buf)
+
+    return copied
+
+def parseRange(value, size):
+    """Parse a single "bytes=start-end" range header, return (start, end) with end included or None if invalid"""
+    match = re.match(r"bytes=([0-9]*)-([0-9]*)$", value.strip()) if value else None
+    if not match or not any(match.groups()):
+        return None
+
+    start, end = match.groups()
+    if not start: # suffix range, the last bytes of the file
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+
+    if start > end:
+        return None
+
+    return start, end
+
+def parseFrameRanges(value):
+    """Parse comma separated frame numbers and "first-last" ranges, return a list of (first, last) or None if invalid"""
+    frame_ranges = []
+    for item in value.split(","):
+        match = re.match(r"([0-9]+)(?:-([0-9]+))?$", item.strip())
+        if not match:
+            return None
+
+        first, last = match.groups()
+        frame_ranges.append((int(first), int(last) if last else int(first)))
+
+    return frame_ranges
+
+def downloadFile(conn, url, filepath, headers = {}, signature = None):
+    """
+    Download url to filepath, resuming from the partial file at filepath if any (and when the connection fails).
+    The downloaded data is checked against the signature if given. Return True when the file was downloaded.
+    """
+    for i in range(MAX_DOWNLOAD_RETRY + 1):
+        hasher = hashlib.md5()
+        offset = 0
+
+        if os.path.exists(filepath):
+            with open(filepath, "rb") as f:
+                for buf in iter(lambda: f.read(TRANSFER_CHUNK_SIZE), b""):
+                    hasher.update(buf)
+                    offset += len(buf)
+
+            # already complete (interrupted after the download)
+            if signature is not None and hasher.hexdigest() == signature:
+                return True
+
+        request_headers = dict(headers)
+        if offset:
+            request_headers["range"] = "bytes=%i-" % offset
+
+        try:
+            with ConnectionContext():
+                conn.request("GET", url, headers=request_headers)
+            with conn.getresponse() as response:
+                if response.status == http.client.PARTIAL_CONTENT:
+                    mode = "ab"
+                elif response.status == http.client.OK:
+                    # whole file sent, start again
+                    hasher = hashlib.md5()
+                    mode = "wb"
+                elif response.status == http.client.REQUESTED_RANGE_NOT_SATISFIABLE:
+                    # partial file is not part of this file, start again
+                    response.read()
+                    os.remove(filepath)
+                    continue
+                else:
+                    response.read()
+                    return False
+
+                with open(filepath, mode) as f:
+                    copyStream(response, f, hasher = hasher)
+
+        except (OSError, http.client.HTTPException) as e:
+            print("Download of %s interrupted (%s), resuming" % (url, e))
+            conn.close()
+            continue
+
+        if signature is not None and hasher.hexdigest() != signature:
+            print("Download of %s has a signature mismatch" % url)
+            os.remove(filepath)
+            return False
+
+        return True
+
+    return False
+
+def cloneFile(source, destination):
+    """Copy a file as a reflink, sharing the data until either is modified. Return False if not supported"""
+    if fcntl is None or system != "Linux":
+        return False
+
+    with open(source, "rb") as src:
+        try:
+            with open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            if os.path.exists(destination):
+                os.remove(destination)
+            return False
+
+    return True
+
+class FileStore:
+    """
+    Content addressed store of files, named by their signature so files shared by jobs are only stored once.
+
+    When a size limit is given, the least recently used files are removed when the store is larger.
+    The modification time of files is their last use, so the order is kept between sessions.
+    A store can be shared by processes (slaves using the same path), it's scanned again before evicting
+    so files added by the others count towards the size limit.
+    """
+    def __init__(self, path, size_limit = 0):
+        self.path = path
+        self.size_limit = size_limit # in bytes, no limit when 0
+        verifyCreateDir(path)
+
+        self.entries = {} # signature -> size, from least to most recently used
+        self.size = 0
+
+        if size_limit:
+            self.scan()
+
+    def scan(self):
+        entries = []
+        for directory in os.scandir(self.path):
+            if directory.is_dir():
+                for entry in os.scandir(directory.path):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue # removed by another process using the store
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        entries.sort()
+
+        self.entries = {signature: size for mtime, signature, size in entries}
+        self.size = sum(self.entries.values())
+
+    def use(self, signature):
+        """Mark the file as the most recently used, returns False when it was removed (by another process using the store)"""
+        size = self.entries.pop(signature, None)
+        try:
+            os.utime(self.filePath(signature))
+
+            if size is None:
+                size = os.path.getsize(self.filePath(signature))
+                self.size += size
+        except FileNotFoundError:
+            # a cache miss, forget about it
+            if size is not None:
+                self.size -= size
+            return False
+
+        self.entries[signature] = size
+        return True
+
+    def evict(self):
+        """Remove the least recently used files (except the last one) until the store fits in its size limit"""
+        if self.size_limit:
+            self.scan()
+
+        while self.size_limit and self.size > self.size_limit and len(self.entries) > 1:
+            signature = next(iter(self.entries))
+            self.size -= self.entries.pop(signature)
+
+            try:
+                os.remove(self.filePath(signature))
+            except FileNotFoundError:
+                pass
+
+    def filePath(self, signature):
+        return os.path.join(self.path, signature[:2], signature)
+
+    def partialPath(self, signature):
+        """Path of a new empty file to download to, unique so processes sharing the store don't download to the same file"""
+        fd, partial_path = tempfile.mkstemp(dir=self.path, prefix=signature + ".", suffix=".part")
+        os.close(fd)
+        return partial_path
+
+    def contains(self, signature):
+        return signature is not None and os.path.exists(self.filePath(signature))
+
+    def add(self, filepath, signature, move = False):
+        """Add the file (which must match the signature) to the store, moving it or linking it when possible"""
+        store_path = self.filePath(signature)
+        if os.path.exists(store_path):
+            if move:
+                os.remove(filepath)
+            return store_path
+
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+
+        if move:
+            os.replace(filepath, store_path)
+        else:
+            # link or copy to a temporary file first, so the store never has incomplete files
+            fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".temp")
+            os.close(fd)
+            os.remove(temp_path)
+            try:
+                os.link(filepath, temp_path)
+            except OSError:
+                shutil.copyfile(filepath, temp_path)
+            os.replace(temp_path, store_path)
+
+        self.use(signature)
+        self.evict()
+
+        return store_path
+
+    def link(self, signature, filepath):
+        """Make the stored file available at filepath, as a reflink or a hard link when possible, a copy otherwise"""
+        store_path = self.filePath(signature)
+
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+        if not cloneFile(store_path, filepath):
+            try:
+                os.link(store_path, filepath)
+            except OSError:
+                shutil.copyfile(store_path, filepath)
+
+        self.use(signature)
+
+        return filepath
+
 def verifyCreateDir(directory_path):
     original_path = directory_path
     directory_path = os.path.expanduser(directory_path)